@@ -0,0 +1,82 @@
+"""Run time of the example and embedded workloads with and without fused handlers.
+
+Run with `python benchmarks/bench_compiler.py`.
+"""
+import random
+import timeit
+
+from ringneck.program import Program
+
+
+GENERATOR = """
+colors=['red', 'green', 'blue']
+
+$.color = choice(colors)
+$.doors = randint(2, 5)
+"""
+
+EMBEDDED = """kin = {
+    1: 'Human',
+    2: 'Elf'
+}
+
+names = {
+    'Human': ['A', 'B'],
+    'Elf': ['C', 'D']
+}
+names.get("Human")
+$.kin = random_table(kin)
+$.name = random_table(names.get($.kin))
+"""
+
+# Shapes typical of stat rolling scripts.
+STATS = """strength = 10
+dexterity = 10
+bonus = 0
+strength += 2
+dexterity -= 1
+$.strength = roll(strength, 6)
+$.dexterity = roll(dexterity, 6)
+$.class = choice(classes)
+if $.class == 'fighter':
+bonus += 2
+$.weapon = choice(weapons)
+endif
+$.bonus = bonus
+"""
+
+
+def random_table(table):
+    if isinstance(table, dict):
+        return random.choice(list(table.values()))
+    return random.choice(table)
+
+
+BUILTINS = {
+    'choice': random.choice,
+    'randint': random.randint,
+    'random_table': random_table,
+    'roll': lambda base, sides: base + random.randint(1, sides),
+    'classes': ['fighter', 'wizard'],
+    'weapons': ['sword', 'axe'],
+}
+
+
+def bench(name: str, source: str, number: int):
+    print(name)
+    for fused in (False, True):
+        program = Program(source, fused=fused)
+
+        def run():
+            program.run(global_variables={}, builtins=BUILTINS)
+
+        elapsed = min(timeit.repeat(run, number=number, repeat=5))
+        print(f"  {'fused' if fused else 'visitor':<8} {elapsed / number * 1e6:8.1f} us/run")
+
+
+if __name__ == '__main__':
+    bench("examples/generator.py", GENERATOR, 20000)
+    bench("tests/test_embedded.py", EMBEDDED, 20000)
+    bench("stat rolling", STATS, 20000)
+    bench("repeat accumulator", "a = 0\nrepeat a += 1 times 10000", 20)
+    bench("repeat builtin", "a = 1\nrepeat $.last = roll(a, 6) times 1000", 20)
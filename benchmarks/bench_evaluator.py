@@ -0,0 +1,36 @@
+"""Compare recursive and iterative evaluation of long expressions.
+
+Run with `python benchmarks/bench_evaluator.py`.
+"""
+import timeit
+
+from ringneck.evaluator import EvaluationStrategy
+from ringneck.interpreter import Interpreter
+from ringneck.parser import Parser
+from ringneck.resolver import resolve
+from ringneck.scanner import Scanner
+
+
+def parse(program: str):
+    return Parser(Scanner(program).scan_tokens()).parse()
+
+
+def bench(name: str, program: str, number: int):
+    statements = parse(program)
+    scope = resolve(statements)
+    print(name)
+    for strategy in EvaluationStrategy:
+        def run():
+            Interpreter(strategy=strategy).interpret(statements, scope)
+
+        try:
+            elapsed = timeit.timeit(run, number=number)
+            print(f"  {strategy.value:<10} {elapsed / number * 1e6:10.1f} us/run")
+        except RecursionError:
+            print(f"  {strategy.value:<10} RecursionError")
+
+
+if __name__ == '__main__':
+    bench("short formulas", "a = 1\nb = (a + 2) * 3 - a / 2\nc = b > 4 and a < 2", 20000)
+    bench("chain of 200 terms", "a = 1\nb = a" + " + a" * 200, 2000)
+    bench("chain of 5000 terms", "a = 1" + " + 1" * 5000, 50)
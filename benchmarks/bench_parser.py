@@ -0,0 +1,23 @@
+"""Parsing time for a large table script.
+
+Run with `python benchmarks/bench_parser.py`.
+"""
+import timeit
+
+from ringneck.parser import Parser
+from ringneck.scanner import Scanner
+
+
+def table_script(rows: int) -> str:
+    lines = ["names = {"]
+    lines.extend(f"    {i}: ['Name {i}', {i} * 2 + 1, {i} > 10 and {i} < 100]," for i in range(rows))
+    lines.append("}")
+    lines.extend(f"$.value{i} = names.get({i}) if {i} == {i} else (1 + 2) * 3" for i in range(rows))
+    return "\n".join(lines)
+
+
+if __name__ == '__main__':
+    tokens = Scanner(table_script(2000)).scan_tokens()
+    number = 10
+    elapsed = timeit.timeit(lambda: Parser(tokens).parse(), number=number)
+    print(f"{len(tokens)} tokens: {elapsed / number * 1e3:.1f} ms/parse")
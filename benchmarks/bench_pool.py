@@ -0,0 +1,42 @@
+"""Per run overhead of one line scripts, with a new interpreter per run and with pooled ones.
+
+Run with `python benchmarks/bench_pool.py`.
+"""
+import timeit
+
+from ringneck.interpreter import Interpreter
+from ringneck.program import Program
+
+
+SCRIPTS = {
+    'assign': "$.a = 1",
+    'builtin': "$.a = double(2)",
+    'local': "a = 1",
+}
+
+RUNS = 20000
+REPEAT = 25
+
+
+def fresh(program: Program, global_variables: dict, builtins: dict):
+    """What `Program.run` did before interpreters were pooled."""
+    Interpreter(global_variables=global_variables, builtins=builtins).interpret(program.statements, program.scope)
+
+
+def main():
+    builtins = {'double': lambda value: value * 2}
+    for name, source in SCRIPTS.items():
+        program = Program(source)
+        record: dict = {}
+        # Alternate the two, so both see the same machine load.
+        before = after = float('inf')
+        for _ in range(REPEAT):
+            before = min(before, timeit.timeit(lambda: fresh(program, record, builtins), number=RUNS) / RUNS)
+            after = min(after, timeit.timeit(
+                lambda: program.run(global_variables=record, builtins=builtins), number=RUNS) / RUNS)
+        print(f"{name:8} new interpreter {before * 1e6:6.2f} us  pooled {after * 1e6:6.2f} us  "
+              f"({before / after:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""Peak memory and time of scanning a large table script from a str and from a file.
+
+Run with `python benchmarks/bench_scanner.py`.
+"""
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from bench_parser import table_script
+
+from ringneck.scanner import Scanner
+
+
+def measure(name: str, scan):
+    tracemalloc.start()
+    start = time.perf_counter()
+    tokens = scan()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"  {name:<10} {len(tokens)} tokens, {elapsed * 1e3:7.1f} ms, peak {peak / 2 ** 20:6.1f} MiB")
+    return tokens
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "table.rn"
+        path.write_text(table_script(20000), encoding="utf-8")
+        print(f"{path.stat().st_size / 2 ** 20:.1f} MiB script")
+
+        measure("str", lambda: Scanner(path.read_text(encoding="utf-8")).scan_tokens())
+        tokens = measure("from_file", lambda: Scanner.from_file(path).scan_tokens())
+        print(f"  token arrays {tokens.nbytes / 2 ** 20:.1f} MiB")
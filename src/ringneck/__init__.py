@@ -1,25 +1,27 @@
-from typing import Any
+from typing import Any, Optional
+from ringneck.diagnostics import Diagnostic, check
 from ringneck.error_handler import ErrorHandler
-from ringneck.interpreter import Interpreter
+from ringneck.interpreter import Interpreter, OutputMode
 from ringneck.parser import Parser
+from ringneck.program import Program
 
 from ringneck.scanner import Scanner
+from ringneck.transaction import Commit
 
 
-def run(program: str, *, global_variables: Any = None, builtins: Any = None):
-    ErrorHandler.reset()
-    scanner = Scanner(program)
-    tokens = scanner.scan_tokens()
+def run(program: str, *, global_variables: Any = None, builtins: Any = None,
+        transactional: bool = False, commit: Optional[Commit] = None,
+        output: OutputMode = OutputMode.COLLECT):
+    compiled = Program(program)
 
-    parser = Parser(tokens)
-    tree = parser.parse()
-
-    if ErrorHandler.errors:
-        for error in ErrorHandler.errors:
+    if compiled.errors:
+        for error in compiled.errors:
             print(error)
         return
 
-    interpreter = Interpreter(
+    return compiled.run(
         global_variables=global_variables,
-        builtins=builtins)
-    return interpreter.interpret(tree)
+        builtins=builtins,
+        transactional=transactional,
+        commit=commit,
+        output=output)
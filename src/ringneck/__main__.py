@@ -0,0 +1,3 @@
+from ringneck.main import app
+
+app(prog_name="ringneck")
@@ -0,0 +1,107 @@
+"""Inline caches for reading variable paths."""
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, List, Mapping, MutableMapping, Optional, Sequence, Tuple
+
+
+Getter = Callable[[Any], Any]
+
+
+class KeyedMapping(MutableMapping[str, Any]):
+    """A mapping whose names in a path are always its keys, never its attributes.
+
+    Paths into other objects look for an attribute first, so the methods
+    of a mapping, such as `keys`, would hide keys of the same name.
+    """
+
+
+def walk(result: Any, parts: Sequence[str]):
+    """Generic lookup of a path, attributes first, then mapping keys."""
+    for part in parts:
+        result = step(result, part)
+    return result
+
+
+def step(result: Any, part: str):
+    if isinstance(result, KeyedMapping):
+        return result.get(part)
+
+    if hasattr(result, part):
+        return getattr(result, part)
+
+    if isinstance(result, Mapping):
+        return result.get(part)
+
+    return result
+
+
+def descend(result: Any, parts: Sequence[str]):
+    """Strict lookup of the container a value is assigned into."""
+    for part in parts:
+        if isinstance(result, Mapping):
+            result = result[part]
+        else:
+            result = getattr(result, part)
+    return result
+
+
+def assign(container: Any, part: str, value: Any):
+    if isinstance(container, MutableMapping):
+        container[part] = value
+    else:
+        setattr(container, part, value)
+
+
+class PathAccessor:
+    """Reads a fixed path, caching per segment how objects of one type are accessed.
+
+    The first part names the root, which is looked up by the caller.
+    Each following segment remembers the type it last saw and an
+    `attrgetter` or `itemgetter` for it. When an object of another type
+    shows up the segment falls back to the generic lookup and respecializes.
+    """
+
+    root: str
+    parts: Tuple[str, ...]
+    entries: List[Optional[Tuple[type, Getter]]]
+
+    hits: int = 0
+    misses: int = 0
+    deopts: int = 0
+
+    def __init__(self, parts: Sequence[str]):
+        self.root = parts[0]
+        self.parts = tuple(parts[1:])
+        self.entries = [None] * len(self.parts)
+
+    def __call__(self, result: Any):
+        entries = self.entries
+        for index, part in enumerate(self.parts):
+            entry = entries[index]
+            if entry is not None and type(result) is entry[0]:
+                try:
+                    result = entry[1](result)
+                    self.hits += 1
+                    continue
+                except (AttributeError, KeyError):
+                    pass
+            result = self.specialize(index, part, result)
+        return result
+
+    def specialize(self, index: int, part: str, result: Any):
+        self.misses += 1
+        entry = self.entries[index]
+        getter: Optional[Getter] = None
+
+        if isinstance(result, KeyedMapping):
+            getter = itemgetter(part)
+        elif hasattr(result, part):
+            getter = attrgetter(part)
+        elif isinstance(result, Mapping):
+            getter = itemgetter(part)
+
+        if getter is not None and (entry is None or entry[0] is not type(result)):
+            if entry is not None:
+                self.deopts += 1
+            self.entries[index] = (type(result), getter)
+
+        return step(result, part)
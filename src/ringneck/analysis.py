@@ -0,0 +1,236 @@
+"""Static analysis of what statements read and write."""
+from dataclasses import dataclass, field
+from typing import AbstractSet, Any, Iterable, List, Set, Tuple
+
+from ringneck.ast import expression, statement
+from ringneck.ast.base import Visitor, VisitorType
+from ringneck.interpreter import literal_values, split_address
+
+
+Path = Tuple[str, ...]
+
+
+@dataclass
+class Effects:
+    """Locals and `$` paths a statement reads and writes, and builtins it calls.
+
+    Global paths are stored without the leading `$`; the empty path
+    stands for all of `$`, used when the keys written are only known at
+    run time. A method call such as `names.get(x)` counts as reading and
+    writing the object it is called on, and as a call of `names.get`.
+    Calls are recorded by the callee's full dotted name, an empty name is
+    a callee that is not a name.
+    """
+
+    reads: Set[str] = field(default_factory=set)
+    writes: Set[str] = field(default_factory=set)
+    global_reads: Set[Path] = field(default_factory=set)
+    global_writes: Set[Path] = field(default_factory=set)
+    calls: Set[str] = field(default_factory=set)
+
+    def effectful(self, pure: AbstractSet[str] = frozenset()) -> bool:
+        """Whether the statement calls a builtin not declared pure."""
+        return not self.calls <= pure
+
+
+def overlaps(paths: Iterable[Path], others: AbstractSet[Path]) -> bool:
+    """Whether any path is a prefix of, or has as prefix, one of the others."""
+    for path in paths:
+        for other in others:
+            length = min(len(path), len(other))
+            if path[:length] == other[:length]:
+                return True
+    return False
+
+
+class Analyzer(Visitor[VisitorType]):
+    """Collects the effects of one statement at a time."""
+
+    effects: Effects
+
+    def analyze(self, stmt: statement.Statement) -> Effects:
+        self.effects = Effects()
+        stmt.accept(self)
+        return self.effects
+
+    def read(self, parts: Path):
+        if parts[0] == "$":
+            self.effects.global_reads.add(tuple(part for part in parts[1:] if part))
+        else:
+            self.effects.reads.add(parts[0])
+
+    def write(self, parts: Path):
+        if parts[0] == "$":
+            self.effects.global_writes.add(tuple(part for part in parts[1:] if part))
+            return
+
+        self.effects.writes.add(parts[0])
+        if len(parts) > 1:
+            self.effects.reads.add(parts[0])
+
+    def iterator_paths(self, expr: expression.VariableIterator) -> List[Path]:
+        prefix = expr.prefix.literal
+        keys = literal_values(expr.iterator)
+        if keys is None:
+            expr.iterator.accept(self)
+            return [split_address(prefix)]
+        return [split_address(f"{prefix}{key}") for key in keys]
+
+    def visit_all(self, values: Any):
+        if isinstance(values, expression.Expression):
+            values.accept(self)
+            return
+
+        for value in values:
+            value.accept(self)
+
+    def visit_Expression_Statement(self, stmt: statement.Expression):
+        stmt.expr.accept(self)
+
+    def visit_If_Statement(self, stmt: statement.If):
+        stmt.condition.accept(self)
+        self.visit_all(stmt.thenbranch)
+
+    def visit_Repeat_Statement(self, stmt: statement.Repeat):
+        stmt.count.accept(self)
+        stmt.stmt.accept(self)
+
+    def visit_Literal_Expression(self, expr: expression.Literal):
+        ...
+
+    def visit_IteratorValue_Expression(self, expr: expression.IteratorValue):
+        ...
+
+    def visit_Variable_Expression(self, expr: expression.Variable):
+        self.read(split_address(expr.name.literal))
+
+    def visit_VariableIterator_Expression(self, expr: expression.VariableIterator):
+        for parts in self.iterator_paths(expr):
+            self.read(parts)
+
+    def visit_Assign_Expression(self, expr: expression.Assign):
+        parts = split_address(expr.name.literal)
+        if expr.operator.lexeme == "?=":
+            self.read(parts)
+        self.write(parts)
+        expr.value.accept(self)
+
+    def visit_AugmentedAssign_Expression(self, expr: expression.AugmentedAssign):
+        parts = split_address(expr.left.name.literal)
+        self.read(parts)
+        self.write(parts)
+        expr.right.accept(self)
+
+    def visit_MultiAssign_Expression(self, expr: expression.MultiAssign):
+        for identifier in expr.identifiers.values:
+            self.write(split_address(identifier.name.literal))
+        expr.values.accept(self)
+
+    def visit_AssignIterator_Expression(self, expr: expression.AssignIterator):
+        for parts in self.iterator_paths(expr.iterator):
+            self.write(parts)
+        expr.value.accept(self)
+
+    def visit_Grouping_Expression(self, expr: expression.Grouping):
+        self.visit_Binary_Expression(expr)
+
+    def visit_Binary_Expression(self, expr: expression.Binary | expression.Grouping):
+        pending: List[expression.Expression] = [expr]
+        while pending:
+            node = pending.pop()
+            if isinstance(node, expression.Binary):
+                pending.extend([node.right, node.left])
+            elif isinstance(node, expression.Grouping):
+                pending.append(node.expression)
+            else:
+                node.accept(self)
+
+    def visit_Unary_Expression(self, expr: expression.Unary):
+        expr.right.accept(self)
+
+    def visit_Starred_Expression(self, expr: expression.Starred):
+        expr.value.accept(self)
+
+    def visit_ExpressionList_Expression(self, expr: expression.ExpressionList):
+        self.visit_all(expr.expressions)
+
+    def visit_Tuple_Expression(self, expr: expression.Tuple):
+        self.visit_all(expr.values)
+
+    def visit_List_Expression(self, expr: expression.List):
+        self.visit_all(expr.values)
+
+    def visit_KeyDatum_Expression(self, expr: expression.KeyDatum):
+        expr.key.accept(self)
+        expr.datum.accept(self)
+
+    def visit_Dict_Expression(self, expr: expression.Dict):
+        self.visit_all(expr.values)
+
+    def visit_Shared_Expression(self, expr: expression.Shared):
+        expr.expression.accept(self)
+
+    def visit_Call_Expression(self, expr: expression.Call):
+        if isinstance(expr.callee, expression.Variable):
+            parts = split_address(expr.callee.name.literal)
+            self.read(parts)
+            if len(parts) > 1:
+                self.write(parts[:-1])
+            self.effects.calls.add(expr.callee.name.literal)
+        else:
+            expr.callee.accept(self)
+            self.effects.calls.add("")
+
+        if expr.arguments is not None:
+            expr.arguments.accept(self)
+
+    def visit_Conditional_Expression(self, expr: expression.Conditional):
+        expr.left.accept(self)
+        expr.condition.accept(self)
+        if expr.right is not None:
+            expr.right.accept(self)
+
+
+def analyze(statements: Iterable[statement.Statement]) -> List[Effects]:
+    """Effects of each statement."""
+    analyzer: Analyzer[Any] = Analyzer()
+    return [analyzer.analyze(stmt) for stmt in statements]
+
+
+def backward_slice(statements: List[statement.Statement], effects: List[Effects],
+                   outputs: Iterable[str], pure: AbstractSet[str] = frozenset()) -> List[statement.Statement]:
+    """The statements needed to compute the outputs, in program order.
+
+    Outputs are addresses such as `$.name` or `total`. Statements that
+    call builtins not declared pure are always kept, and since such a
+    builtin may read anything, so is every statement before them that
+    writes something.
+    """
+    needed: Set[str] = set()
+    global_needed: Set[Path] = set()
+    for output in outputs:
+        parts = split_address(output)
+        if parts[0] == "$":
+            global_needed.add(tuple(part for part in parts[1:] if part))
+        else:
+            needed.add(parts[0])
+
+    everything = False
+    kept: List[statement.Statement] = []
+    for stmt, effect in zip(reversed(statements), reversed(effects)):
+        effectful = effect.effectful(pure)
+        if everything:
+            relevant = effectful or bool(effect.writes) or bool(effect.global_writes)
+        else:
+            relevant = effectful or bool(effect.writes & needed) or overlaps(effect.global_writes, global_needed)
+
+        if not relevant:
+            continue
+
+        kept.append(stmt)
+        everything = everything or effectful
+        needed |= effect.reads
+        global_needed |= effect.global_reads
+
+    kept.reverse()
+    return kept
@@ -1,7 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import operator
-from typing import Any, List as TList, Optional, Union
+from typing import Any, Hashable, List as TList, Optional, Tuple as TTuple, Union
 
+from ringneck.accessor import PathAccessor
+from ringneck.specialize import BinarySite
 from ringneck.ast.base import Node, Visitor, VisitorType
 from ..tokens import Token
 
@@ -25,6 +27,8 @@ class Binary(Expression):
     left: Expression
     operator: Token
     right: Expression
+    code: Optional[TList[TList[Any]]] = field(default=None, init=False, repr=False, compare=False)
+    site: Optional[BinarySite] = field(default=None, init=False, repr=False, compare=False)
 
     def __str__(self):
         return f"Binary({self.left} {self.operator.literal} {self.right}"
@@ -33,6 +37,7 @@ class Binary(Expression):
 @dataclass
 class Grouping(Expression):
     expression: Expression
+    code: Optional[TList[TList[Any]]] = field(default=None, init=False, repr=False, compare=False)
 
 
 @dataclass
@@ -49,6 +54,8 @@ class Unary(Expression):
 @dataclass
 class Variable(Expression):
     name: Token
+    accessor: Optional[PathAccessor] = field(default=None, init=False, repr=False, compare=False)
+    slot: Optional[int] = field(default=None, init=False, repr=False, compare=False)
 
     def __str__(self):
         return f"Variable({self.name.literal})"
@@ -58,6 +65,8 @@ class Variable(Expression):
 class VariableIterator(Expression):
     prefix: Expression
     iterator: 'List'
+    # Keys and split addresses, filled in on first use when the iterator is a literal list.
+    paths: Optional[TTuple[TTuple[Any, TTuple[str, ...]], ...]] = field(default=None, init=False, repr=False, compare=False)
 
 
 @dataclass
@@ -65,6 +74,9 @@ class Assign(Expression):
     name: Token
     operator: Token
     value: Any
+    slot: Optional[int] = field(default=None, init=False, repr=False, compare=False)
+    # Keys of shared expressions reading the target, set by the optimizer.
+    invalidates: Optional[TTuple[Hashable, ...]] = field(default=None, init=False, repr=False, compare=False)
 
 
 @dataclass
@@ -72,6 +84,7 @@ class MultiAssign(Expression):
     identifiers: Union['Tuple', 'List']
     operator: Token
     values: Expression
+    invalidates: Optional[TTuple[Hashable, ...]] = field(default=None, init=False, repr=False, compare=False)
 
 
 @dataclass
@@ -79,6 +92,7 @@ class AssignIterator(Expression):
     iterator: VariableIterator
     operator: Token
     value: Any
+    invalidates: Optional[TTuple[Hashable, ...]] = field(default=None, init=False, repr=False, compare=False)
 
 
 @dataclass
@@ -132,3 +146,11 @@ class AugmentedAssign(Expression):
     left: Variable
     operator: Token
     right: Expression
+    invalidates: Optional[TTuple[Hashable, ...]] = field(default=None, init=False, repr=False, compare=False)
+
+
+@dataclass
+class Shared(Expression):
+    """A pure expression used more than once, evaluated once until its inputs change."""
+    expression: Expression
+    key: Hashable
@@ -56,6 +56,9 @@ class ASTPrinter(Visitor[VisitorType]):
 
         return f"(list {', '.join([str(v.accept(self)) for v in expr.values])})"
 
+    def visit_Shared_Expression(self, expr: expression.Shared):
+        return expr.expression.accept(self)
+
     def visit_Variable_Expression(self, expr: expression.Variable):
         return f"{expr.name.literal}"
 
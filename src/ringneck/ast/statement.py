@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import List, Optional
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional
 
 from ringneck.ast.base import Node, Visitor, VisitorType
 from ringneck.ast import expression
@@ -11,7 +11,10 @@ class StatementVisitor(Visitor[VisitorType]):
 
 @dataclass
 class Statement(Node):
-    ...
+    # Fused handler taking the interpreter, set by `ringneck.compiler`.
+    handler: Optional[Callable[[Any], Any]] = field(default=None, init=False, repr=False, compare=False)
+    # Scope the locals of a top level statement were resolved in, set by `ringneck.resolver`.
+    scope: Optional[Any] = field(default=None, init=False, repr=False, compare=False)
 
 
 @dataclass
@@ -29,3 +32,5 @@ class If(Statement):
 class Repeat(Statement):
     count: int
     stmt: Statement
+    # Iterations run by the interpreter, counted for `ringneck.tiering`.
+    iterations: int = field(default=0, init=False, repr=False, compare=False)
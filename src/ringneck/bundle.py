@@ -0,0 +1,181 @@
+"""Script libraries scanned ahead of time into one memory mapped file.
+
+`write_bundle` scans every script of a directory and writes one bundle
+file: a string table holding the UTF-8 names and sources of the
+scripts, the token arrays of each script, see `TokenArray`, and an index.
+`Bundle` maps the file read only and parses a script the first time it
+is looked up, straight from the mapped token arrays, so workers skip
+scanning and share the sources and tokens through the page cache
+instead of each keeping a copy.
+
+What a worker does keep of each script it looks up is the syntax tree,
+with a token object, holding its decoded lexeme, for every token the
+tree refers to, plus the resolved scope and, when fused, the compiled
+handlers. That is about what the same script costs parsed from source,
+less the list of its lines: the source is decoded from the mapping only
+if the program reads it, as `Program.update` and a `RunCache` do.
+
+The layout, all little endian, is a header of magic, version, script
+count and index offset, then the string table, then the token arrays of
+each script, each array aligned to 8 bytes, then one index entry per
+script.
+"""
+import mmap
+import os
+import stat
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Tuple, Union
+
+from ringneck.bytescanner import ByteScanner, TokenArray
+from ringneck.program import Program
+
+
+StrPath = Union[str, os.PathLike]
+
+MAGIC = b"RNB\0"
+VERSION = 1
+HEADER = struct.Struct("<4sIIQ")
+# Name offset and length, source offset and length, token arrays offset and token count.
+ENTRY = struct.Struct("<QIQIQI")
+# Type codes of the token arrays, in the order they are stored.
+ARRAYS = (('types', "B"), ('starts', "I"), ('ends', "I"), ('lines', "I"), ('columns', "I"))
+
+
+class BundleError(Exception):
+    """A file that is not a bundle this version can read."""
+
+
+def padding(size: int) -> bytes:
+    return b"\0" * (-size % 8)
+
+
+def write_bundle(directory: StrPath, output: StrPath, pattern: str = "*.rn") -> int:
+    """Bundle the scripts matching pattern in directory, recursively, returning how many.
+
+    Scripts are named by their path relative to directory, without the
+    suffix, as in a `ScriptLibrary`. Check scripts for errors first, a
+    bundle is not checked when it is loaded.
+    """
+    directory = Path(directory)
+    scripts: List[Tuple[bytes, bytes]] = []
+    for path in sorted(directory.rglob(pattern)):
+        if path.is_file():
+            name = path.relative_to(directory).with_suffix('').as_posix()
+            scripts.append((name.encode(), path.read_bytes()))
+
+    strings = bytearray()
+    places: List[Tuple[int, int, int, int]] = []
+    for name, source in scripts:
+        places.append((HEADER.size + len(strings), len(name), HEADER.size + len(strings) + len(name), len(source)))
+        strings += name + source
+
+    # Written next to output and moved over it, so workers that mapped the
+    # old bundle keep reading it instead of crashing on a truncated file.
+    output = Path(output)
+    descriptor, temporary = tempfile.mkstemp(prefix=output.name + ".", suffix=".tmp", dir=output.parent)
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, len(scripts), 0))
+            file.write(strings)
+            file.write(padding(file.tell()))
+
+            entries = []
+            for (name_offset, name_length, source_offset, source_length), (_, source) in zip(places, scripts):
+                tokens = ByteScanner(source).scan_tokens()
+                entries.append(ENTRY.pack(name_offset, name_length, source_offset, source_length,
+                                          file.tell(), len(tokens)))
+                for attribute, typecode in ARRAYS:
+                    values = array(typecode, getattr(tokens, attribute))
+                    if sys.byteorder != "little":
+                        values.byteswap()
+                    file.write(values.tobytes())
+                    file.write(padding(file.tell()))
+
+            index = file.tell()
+            for entry in entries:
+                file.write(entry)
+            file.seek(0)
+            file.write(HEADER.pack(MAGIC, VERSION, len(scripts), index))
+        os.chmod(temporary, stat.S_IMODE(output.stat().st_mode) if output.exists() else 0o644)
+        os.replace(temporary, output)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return len(scripts)
+
+
+class Bundle(Mapping[str, Program]):
+    """The scripts of a bundle file, parsed when first looked up.
+
+    Programs keep views of the mapped file, which stays mapped as long
+    as any of them is alive. `write_bundle` replaces the file rather than
+    writing over it, so an open bundle keeps reading the scripts it was
+    opened with.
+    """
+
+    path: Path
+    programs: Dict[str, Program]
+
+    def __init__(self, path: StrPath, optimize: bool = False, fused: bool = True):
+        self.path = Path(path)
+        self.optimize = optimize
+        self.fused = fused
+        self.programs = {}
+        self._lock = threading.Lock()
+        with open(path, "rb") as file:
+            self._buffer = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+        if len(self._buffer) < HEADER.size:
+            raise BundleError(f"{path} is not a ringneck bundle")
+        magic, version, count, index = HEADER.unpack_from(self._buffer)
+        if magic != MAGIC or version != VERSION or sys.byteorder != "little":
+            raise BundleError(f"{path} is not a version {VERSION} ringneck bundle")
+
+        self._entries: Dict[str, Tuple[int, int, int, int]] = {}
+        for number in range(count):
+            name_offset, name_length, *entry = ENTRY.unpack_from(self._buffer, index + number * ENTRY.size)
+            name = str(self._buffer[name_offset:name_offset + name_length], "utf-8")
+            self._entries[name] = tuple(entry)  # type: ignore[assignment]
+
+    def source(self, name: str) -> str:
+        source_offset, source_length, _, _ = self._entries[name]
+        return str(self._buffer[source_offset:source_offset + source_length], "utf-8")
+
+    def tokens(self, name: str) -> TokenArray:
+        """Tokens of a script, as views of the mapped file."""
+        source_offset, source_length, offset, count = self._entries[name]
+        tokens = TokenArray(self._buffer[source_offset:source_offset + source_length])
+        for attribute, typecode in ARRAYS:
+            size = count * struct.calcsize(typecode)
+            setattr(tokens, attribute, self._buffer[offset:offset + size].cast(typecode))
+            offset += size + len(padding(size))
+        return tokens
+
+    def __getitem__(self, name: str) -> Program:
+        program = self.programs.get(name)
+        if program is not None:
+            return program
+
+        with self._lock:
+            program = self.programs.get(name)
+            if program is None:
+                if name not in self._entries:
+                    raise KeyError(name)
+                program = self.programs[name] = Program(
+                    partial(self.source, name), optimize=self.optimize, fused=self.fused, tokens=self.tokens(name))
+        return program
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, name: Any) -> bool:
+        return name in self._entries
@@ -0,0 +1,292 @@
+"""Scanning of UTF-8 bytes into compact token arrays.
+
+`ByteScanner` tokenizes a bytes-like buffer, such as `bytes`, a
+`memoryview` or an `mmap`, without decoding it. Tokens are stored as
+offsets into the buffer in a `TokenArray`, and lexemes and literals are
+only decoded when a token's `lexeme` or `literal` is read.
+"""
+import re
+import sys
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union, overload
+
+from ringneck.error_handler import ErrorHandler
+from ringneck.tokens import Token, TokenType, keywords
+
+
+Buffer = Union[bytes, bytearray, memoryview, Any]
+
+
+TOKEN_TYPES: List[TokenType] = list(TokenType)
+TYPE_INDEX: Dict[TokenType, int] = {tokentype: index for index, tokentype in enumerate(TOKEN_TYPES)}
+KEYWORDS: Dict[bytes, TokenType] = {word.encode(): tokentype for word, tokentype in keywords.items()}
+
+# Single and two byte operators, as the str scanner produces them.
+OPERATORS: Dict[int, TokenType] = {
+    ord("+"): TokenType.PLUS, ord("-"): TokenType.MINUS, ord("*"): TokenType.STAR, ord("/"): TokenType.SLASH,
+    ord("%"): TokenType.PERCENT, ord("<"): TokenType.LESS, ord(">"): TokenType.GREATER,
+    ord("("): TokenType.LEFT_PAREN, ord(")"): TokenType.RIGHT_PAREN,
+    ord("{"): TokenType.LEFT_BRACE, ord("}"): TokenType.RIGHT_BRACE,
+    ord("["): TokenType.LEFT_BRACKET, ord("]"): TokenType.RIGHT_BRACKET,
+    ord("="): TokenType.EQUAL, ord("."): TokenType.DOT, ord(":"): TokenType.COLON, ord(","): TokenType.COMMA,
+}
+WITH_EQUAL: Dict[int, TokenType] = {
+    ord("+"): TokenType.PLUS_EQUAL, ord("-"): TokenType.MINUS_EQUAL, ord("<"): TokenType.LESS_EQUAL,
+    ord(">"): TokenType.GREATER_EQUAL, ord("="): TokenType.EQUAL_EQUAL, ord("!"): TokenType.BANG_EQUAL,
+    ord("?"): TokenType.MAYBE_EQUAL,
+}
+
+NEWLINE = ord("\n")
+EQUAL = ord("=")
+QUOTES = (ord('"'), ord("'"))
+DOLLAR = ord("$")
+
+# Bytes of a multi byte UTF-8 sequence count as letters.
+IDENTIFIER = re.compile(rb"[A-Za-z$\x80-\xff][A-Za-z0-9_.\x80-\xff]*")
+NUMBER = re.compile(rb"[0-9]+(?:\.[0-9]+)?")
+BLANKS = re.compile(rb"[ \t]+")
+CONTINUATION = re.compile(rb"[\x80-\xbf]")
+LINE_END = re.compile(rb"\n")
+CLOSING = {quote: re.compile(bytes((quote,))) for quote in QUOTES}
+GLOBAL_NAME_END = {quote: re.compile(rb"[\n" + bytes((quote,)) + rb"]") for quote in QUOTES}
+
+
+def characters(data: bytes) -> int:
+    """Number of characters in UTF-8 data."""
+    if data.isascii():
+        return len(data)
+    return len(data) - len(CONTINUATION.findall(data))
+
+
+class LazyToken(Token):
+    """A token that decodes its lexeme and literal from the buffer when first read."""
+
+    _lexeme: Optional[str] = None
+    _literal: Any = NotImplemented
+
+    def __init__(self, tokens: 'TokenArray', index: int):
+        self.tokentype = TOKEN_TYPES[tokens.types[index]]
+        self.line = tokens.lines[index]
+        self.column = tokens.columns[index]
+        self._buffer = tokens.buffer
+        self._start = tokens.starts[index]
+        self._end = tokens.ends[index]
+
+    @property  # type: ignore[override]
+    def lexeme(self) -> str:
+        # Kept once read, as tokens in a syntax tree are read on every run.
+        lexeme = self._lexeme
+        if lexeme is None:
+            if self.tokentype == TokenType.EOF:
+                lexeme = "\0"
+            else:
+                lexeme = str(self._buffer[self._start:self._end], "utf-8")
+            self._lexeme = lexeme
+        return lexeme
+
+    @property  # type: ignore[override]
+    def literal(self) -> Any:
+        literal = self._literal
+        if literal is NotImplemented:
+            literal = self._literal = self.decode_literal()
+        return literal
+
+    def decode_literal(self) -> Any:
+        tokentype = self.tokentype
+        if tokentype in (TokenType.EOL, TokenType.EOF):
+            return None
+
+        lexeme = self.lexeme
+        if tokentype == TokenType.STRING:
+            return lexeme[1:-1]
+        if tokentype == TokenType.NUMBER:
+            return float(lexeme) if "." in lexeme else int(lexeme, 10)
+        return lexeme
+
+
+class TokenArray(Sequence[Token]):
+    """Tokens stored as parallel arrays of types and offsets into a buffer.
+
+    Indexing returns a `LazyToken`. The most recently used tokens are
+    cached, so the parser looking at the same few tokens repeatedly gets
+    the same objects without keeping every token alive.
+    """
+
+    CACHE_SIZE = 64
+    CACHE_MASK = CACHE_SIZE - 1
+
+    buffer: Buffer
+    types: array
+    starts: array
+    ends: array
+    lines: array
+    columns: array
+
+    def __init__(self, buffer: Buffer):
+        self.buffer = buffer
+        self.types = array("B")
+        self.starts = array("Q")
+        self.ends = array("Q")
+        self.lines = array("I")
+        self.columns = array("I")
+        self._cached: List[Optional[LazyToken]] = [None] * self.CACHE_SIZE
+        self._cached_index = [sys.maxsize] * self.CACHE_SIZE
+
+    def append(self, tokentype: TokenType, start: int, end: int, line: int, column: int):
+        self.types.append(TYPE_INDEX[tokentype])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line)
+        self.columns.append(column)
+
+    def __len__(self):
+        return len(self.types)
+
+    @overload
+    def __getitem__(self, index: int) -> Token: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[Token]: ...
+
+    def __getitem__(self, index: Any) -> Any:
+        try:
+            slot = index & self.CACHE_MASK
+        except TypeError:
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if self._cached_index[slot] == index:
+            return self._cached[slot]
+
+        if index < 0:
+            index += len(self.types)
+        if not 0 <= index < len(self.types):
+            raise IndexError("token index out of range")
+
+        token = LazyToken(self, index)
+        slot = index & self.CACHE_MASK
+        self._cached[slot] = token
+        self._cached_index[slot] = index
+        return token
+
+    def __iter__(self) -> Iterator[Token]:
+        for index in range(len(self.types)):
+            yield self[index]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the token arrays."""
+        arrays = (self.types, self.starts, self.ends, self.lines, self.columns)
+        return sum(len(values) * values.itemsize for values in arrays)
+
+
+class ByteScanner:
+    """Scans UTF-8 bytes the same way `Scanner` scans a str.
+
+    Lines and columns count characters, as for a str. The EOF token's
+    column is its byte offset.
+    """
+
+    buffer: Buffer
+    tokens: TokenArray
+
+    def __init__(self, buffer: Buffer, line: int = 1):
+        if isinstance(buffer, memoryview):
+            buffer = buffer.cast("B")
+        self.buffer = buffer
+        self._line = line
+
+    def scan_tokens(self) -> TokenArray:
+        buffer = self.buffer
+        end = len(buffer)
+        tokens = self.tokens = TokenArray(buffer)
+        add = tokens.append
+
+        current = 0
+        line = self._line
+        column = 0
+
+        while current < end:
+            start = current
+            byte = buffer[current]
+            current += 1
+            column += 1
+
+            if byte in WITH_EQUAL and current < end and buffer[current] == EQUAL:
+                current += 1
+                column += 1
+                add(WITH_EQUAL[byte], start, current, line, column)
+                continue
+
+            if byte in OPERATORS:
+                add(OPERATORS[byte], start, current, line, column)
+                continue
+
+            if byte == NEWLINE:
+                if column > 1:
+                    add(TokenType.EOL, start, current, line, column)
+                while current < end and buffer[current] == NEWLINE:
+                    current += 1
+                    line += 1
+                line += 1
+                column = 0
+                continue
+
+            if byte == 0x20 or byte == 0x09:
+                match = BLANKS.match(buffer, current)
+                if match:
+                    column += match.end() - current
+                    current = match.end()
+                continue
+
+            if byte == ord("#"):
+                match = LINE_END.search(buffer, current)
+                if match is None:
+                    current = end
+                else:
+                    current = match.end()
+                    line += 1
+                    column = 0
+                continue
+
+            if byte in QUOTES:
+                match = CLOSING[byte].search(buffer, current)
+                if match is None:
+                    ErrorHandler.report(line, column, "Unterminated string")
+                    current = end
+                    continue
+
+                text = bytes(buffer[current:match.end()])
+                current = match.end()
+                newlines = text.count(b"\n")
+                if newlines:
+                    line += newlines
+                    column = 1 + characters(text[text.rindex(b"\n") + 1:])
+                else:
+                    column += characters(text)
+                add(TokenType.STRING, start, current, line, column)
+                continue
+
+            if 0x30 <= byte <= 0x39:
+                match = NUMBER.match(buffer, start)
+                current = match.end()
+                column += current - start - 1
+                add(TokenType.NUMBER, start, current, line, column)
+                continue
+
+            match = IDENTIFIER.match(buffer, start)
+            if match:
+                current = match.end()
+                if byte == DOLLAR and current < end and buffer[current] in QUOTES:
+                    closing = GLOBAL_NAME_END[buffer[current]].search(buffer, current + 1)
+                    if closing is not None and buffer[closing.start()] == NEWLINE:
+                        raise NotImplementedError("No newlines in global names")
+                    current = end if closing is None else closing.end()
+
+                identifier = bytes(buffer[start:current])
+                column += characters(identifier) - 1
+                add(KEYWORDS.get(identifier, TokenType.IDENTIFIER), start, current, line, column)
+                continue
+
+            ErrorHandler.report(line, column, f"Unexepected character: {chr(byte)}")
+
+        add(TokenType.EOF, current, current, line, current)
+        return tokens
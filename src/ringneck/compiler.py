@@ -0,0 +1,232 @@
+"""Fused handlers for the most common statement shapes.
+
+Most statements in generator scripts are one of a few shapes:
+
+- `target = builtin(literal or variable, ...)`
+- `name = literal`
+- `name += literal` and `name -= literal`
+- `if variable == literal:`
+- `repeat statement times count`, where the body is compiled once and an
+  `int` or `str` accumulator such as `x += 1` runs in closed form
+
+Each of them takes several visits through `Node.accept` in the
+interpreter. `compile_statement` recognizes the shapes and builds a
+closure with the operands resolved ahead of time, which the interpreter
+calls instead of visiting the statement. Other statements are left to
+the visitor.
+"""
+import operator
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from ringneck.ast import expression, statement
+from ringneck.frame import UNSET
+from ringneck.interpreter import Interpreter, OutputMode, split_address
+from ringneck.tokens import TokenType
+
+
+Handler = Callable[[Interpreter], Any]
+Loader = Callable[[Interpreter], Any]
+
+
+AUGMENTED_OPERATORS: Dict[TokenType, Callable[[Any, Any], Any]] = {
+    TokenType.PLUS_EQUAL: operator.add,
+    TokenType.MINUS_EQUAL: operator.sub,
+}
+
+
+def local_slot(expr: expression.Expression) -> Optional[int]:
+    """Slot of a variable that is a plain local name, otherwise None."""
+    if isinstance(expr, expression.Variable) and "." not in expr.name.literal:
+        return expr.slot
+    return None
+
+
+def loader(expr: expression.Expression) -> Optional[Loader]:
+    """Function reading a literal or variable operand, None for other operands."""
+    if isinstance(expr, expression.Literal):
+        value = expr.value
+        return lambda interpreter: value
+
+    slot = local_slot(expr)
+    if slot is not None:
+        def load(interpreter: Interpreter):
+            value = interpreter.frame.slots[slot]
+            return None if value is UNSET else value
+        return load
+
+    if isinstance(expr, expression.Variable):
+        return lambda interpreter: interpreter.visit_Variable_Expression(expr)
+
+    return None
+
+
+def store(expr: expression.Assign) -> Callable[[Interpreter, Any], None]:
+    """Function writing the target of an assignment."""
+    invalidates = expr.invalidates
+    slot = expr.slot
+    parts = split_address(expr.name.literal)
+
+    def write(interpreter: Interpreter, value: Any):
+        if slot is not None:
+            interpreter.frame.slots[slot] = value
+        else:
+            interpreter.set_path(parts, value)
+        if invalidates:
+            interpreter.forget(invalidates)
+    return write
+
+
+def compile_call(expr: expression.Assign) -> Optional[Handler]:
+    call = expr.value
+    if not isinstance(call, expression.Call) or local_slot(call.callee) is None:
+        return None
+    if not isinstance(call.arguments, expression.ExpressionList):
+        return None
+
+    loaders = [loader(argument) for argument in call.arguments.expressions]
+    if any(load is None for load in loaders):
+        return None
+
+    load_callee = loader(call.callee)
+    write = store(expr)
+    if all(isinstance(argument, expression.Literal) for argument in call.arguments.expressions):
+        constants = [argument.value for argument in call.arguments.expressions]
+
+        def handler(interpreter: Interpreter):
+            write(interpreter, interpreter.call(load_callee(interpreter), constants))
+        return handler
+
+    def handler(interpreter: Interpreter):
+        arguments = [load(interpreter) for load in loaders]
+        write(interpreter, interpreter.call(load_callee(interpreter), arguments))
+    return handler
+
+
+def compile_assign(expr: expression.Assign) -> Optional[Handler]:
+    if expr.operator.tokentype != TokenType.EQUAL:
+        return None
+
+    if not isinstance(expr.value, expression.Literal):
+        return compile_call(expr)
+
+    value = expr.value.value
+    if expr.slot is not None and not expr.invalidates:
+        slot = expr.slot
+
+        def handler(interpreter: Interpreter):
+            interpreter.frame.slots[slot] = value
+        return handler
+
+    write = store(expr)
+    return lambda interpreter: write(interpreter, value)
+
+
+def compile_augmented(expr: expression.AugmentedAssign) -> Optional[Handler]:
+    slot = local_slot(expr.left)
+    if slot is None or not isinstance(expr.right, expression.Literal) or expr.invalidates:
+        return None
+    if expr.operator.tokentype not in AUGMENTED_OPERATORS:
+        return None
+
+    operation = AUGMENTED_OPERATORS[expr.operator.tokentype]
+    amount = expr.right.value
+
+    def handler(interpreter: Interpreter):
+        slots = interpreter.frame.slots
+        value = slots[slot]
+        slots[slot] = operation(None if value is UNSET else value, amount)
+    return handler
+
+
+def compile_if(stmt: statement.If) -> Optional[Handler]:
+    condition = stmt.condition
+    if not isinstance(condition, expression.Binary) or condition.operator.tokentype != TokenType.EQUAL_EQUAL:
+        return None
+    if not isinstance(condition.left, expression.Variable) or not isinstance(condition.right, expression.Literal):
+        return None
+
+    load = loader(condition.left)
+    value = condition.right.value
+    body = stmt.thenbranch
+
+    def handler(interpreter: Interpreter):
+        if load(interpreter) == value:
+            if interpreter.output == OutputMode.COLLECT:
+                return [interpreter.execute(s) for s in body]
+
+            result = None
+            for s in body:
+                result = interpreter.execute(s)
+            return result
+    return handler
+
+
+def compile_repeat(stmt: statement.Repeat) -> Handler:
+    body = stmt.stmt
+    handler = body.handler
+    visit = f"visit_{type(body).__name__}_{type(body).__bases__[0].__name__}"
+
+    def loop(interpreter: Interpreter, count: int):
+        if handler is not None:
+            for _ in range(count):
+                handler(interpreter)
+            return
+
+        run = getattr(interpreter, visit)
+        for _ in range(count):
+            run(body)
+
+    accumulator = None
+    if isinstance(body, statement.Expression) and isinstance(body.expr, expression.AugmentedAssign):
+        expr = body.expr
+        slot = local_slot(expr.left)
+        amount = expr.right.value if isinstance(expr.right, expression.Literal) else None
+        if slot is not None and not expr.invalidates and type(amount) in (int, str):
+            accumulator = slot, expr.operator.tokentype == TokenType.MINUS_EQUAL, amount
+
+    if accumulator is None:
+        return lambda interpreter: loop(interpreter, interpreter.repeat_count(stmt))
+
+    slot, subtract, amount = accumulator
+
+    def closed_form(interpreter: Interpreter):
+        count = interpreter.repeat_count(stmt)
+        slots = interpreter.frame.slots
+        value = slots[slot]
+        if count > 0 and type(value) is type(amount) and not (subtract and type(amount) is str):
+            total = amount * count
+            slots[slot] = value - total if subtract else value + total
+            return
+
+        loop(interpreter, count)
+    return closed_form
+
+
+def compile_statement(stmt: statement.Statement) -> Optional[Handler]:
+    """Fused handler for a statement of a known shape, otherwise None."""
+    if isinstance(stmt, statement.If):
+        compile_statements(stmt.thenbranch)
+        return compile_if(stmt)
+
+    if isinstance(stmt, statement.Repeat):
+        compile_statements([stmt.stmt])
+        return compile_repeat(stmt)
+
+    if not isinstance(stmt, statement.Expression):
+        return None
+
+    if isinstance(stmt.expr, expression.Assign):
+        return compile_assign(stmt.expr)
+
+    if isinstance(stmt.expr, expression.AugmentedAssign):
+        return compile_augmented(stmt.expr)
+
+    return None
+
+
+def compile_statements(statements: Iterable[statement.Statement]) -> List[statement.Statement]:
+    """Set the fused handler of every statement that has one."""
+    statements = list(statements)
+    for stmt in statements:
+        stmt.handler = compile_statement(stmt)
+    return statements
@@ -0,0 +1,111 @@
+"""Checking many scripts for syntax errors at once.
+
+`check` parses every script, recovering after each error so one pass
+finds all the errors of a file, see `Parser.recover`. The scanner and
+parser report errors to the process wide `ErrorHandler`, so files are
+checked one at a time per process, holding its lock, spread over a
+process pool.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from ringneck.error_handler import ErrorHandler
+from ringneck.parser import Parser
+from ringneck.scanner import Scanner
+
+
+StrPath = Union[str, os.PathLike]
+
+# Fewer files than this are checked in this process.
+PARALLEL_FROM = 64
+
+
+@dataclass
+class Diagnostic:
+    path: str
+    line: int
+    column: int
+    message: str
+    severity: str = "error"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def __str__(self):
+        return f"{self.path}:{self.line}:{self.column}: {self.severity}: {self.message}"
+
+
+def position(source: str, offset: int) -> Tuple[int, int]:
+    """Line and column of an offset in source, counted as the scanner does."""
+    offset = min(offset, len(source))
+    return source.count("\n", 0, offset) + 1, offset - source.rfind("\n", 0, offset)
+
+
+def check_source(source: str, path: str = "<string>") -> List[Diagnostic]:
+    """Every syntax error of a script.
+
+    The scanner and parser give up on some errors by raising, such as a
+    script ending inside a string. That is reported as a diagnostic too,
+    where the token being read started.
+    """
+    with ErrorHandler.lock:
+        ErrorHandler.reset()
+        scanner = Scanner(source)
+        parser: Optional[Parser] = None
+        try:
+            parser = Parser(scanner.scan_tokens(), recover=True)
+            parser.parse()
+        except Exception as error:  # pylint: disable=broad-except
+            if parser is None:
+                line, column = position(source, scanner._start)
+                message = "Unexpected end of script" if isinstance(error, IndexError) else str(error)
+            else:
+                token = parser.peek()
+                line, column = token.line, token.column
+                message = f"Cannot parse further: {type(error).__name__}: {error}"
+            ErrorHandler.report(line, column, message)
+        finally:
+            errors = list(ErrorHandler.errors)
+            ErrorHandler.reset()
+    errors.sort(key=lambda error: (error.line, error.column))
+    return [Diagnostic(path, error.line, error.column, error.msg) for error in errors]
+
+
+def check_file(path: str) -> List[Diagnostic]:
+    try:
+        source = Path(path).read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError) as error:
+        return [Diagnostic(path, 0, 0, f"Cannot read script: {error}")]
+    return check_source(source, path)
+
+
+def script_paths(paths: Iterable[StrPath], pattern: str = "*.rn") -> List[str]:
+    """Files given, and the files matching pattern in directories given, recursively."""
+    found = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            found.extend(sorted(str(script) for script in path.rglob(pattern) if script.is_file()))
+        else:
+            found.append(str(path))
+    return found
+
+
+def check(paths: Iterable[StrPath], workers: Optional[int] = None, pattern: str = "*.rn") -> List[Diagnostic]:
+    """Diagnostics of the scripts in paths, by file in the order given, then by position.
+
+    Directories are searched for files matching pattern. Files are
+    checked by workers processes, by default one per CPU.
+    """
+    files = script_paths(paths, pattern)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(files) < PARALLEL_FROM:
+        results: Iterable[List[Diagnostic]] = map(check_file, files)
+        return [diagnostic for diagnostics in results for diagnostic in diagnostics]
+
+    with ProcessPoolExecutor(workers) as executor:
+        chunksize = max(1, len(files) // (workers * 8))
+        results = executor.map(check_file, files, chunksize=chunksize)
+        return [diagnostic for diagnostics in results for diagnostic in diagnostics]
@@ -1,4 +1,5 @@
 
+import threading
 from dataclasses import dataclass
 
 from typing import List
@@ -15,6 +16,9 @@ class Error:
 
 class ErrorHandler:
     errors: List[Error] = []
+    # Held from reset until the errors are read by whoever scans and parses,
+    # as threads share the one list of errors.
+    lock = threading.RLock()
 
     @classmethod
     def report(cls, line: int, column: int, msg: str):
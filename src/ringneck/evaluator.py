@@ -0,0 +1,145 @@
+"""Evaluation of arithmetic and logic expressions with an explicit stack.
+
+Binary operations, groupings and literals are flattened into postfix code,
+which runs in a loop instead of recursing through `Node.accept`. Any other
+node is kept as a single instruction and evaluated by the visitor.
+"""
+import operator
+from enum import Enum, unique
+from typing import Any, Callable, Dict, List
+
+from ringneck.ast import expression
+from ringneck.ast.base import Visitor
+from ringneck.specialize import BinarySite
+from ringneck.tokens import TokenType
+
+
+BINARY_OPERATORS: Dict[TokenType, Callable[[Any, Any], Any]] = {
+    TokenType.PLUS: operator.add,
+    TokenType.MINUS: operator.sub,
+    TokenType.STAR: operator.mul,
+    TokenType.SLASH: operator.truediv,
+    TokenType.LESS: operator.lt,
+    TokenType.LESS_EQUAL: operator.le,
+    TokenType.GREATER: operator.gt,
+    TokenType.GREATER_EQUAL: operator.ge,
+    TokenType.EQUAL_EQUAL: operator.eq,
+    TokenType.BANG_EQUAL: operator.ne,
+}
+
+
+@unique
+class EvaluationStrategy(Enum):
+    RECURSIVE = 'recursive'
+    ITERATIVE = 'iterative'
+
+
+# Opcodes
+CONST = 0
+EVAL = 1
+BINARY = 2
+JUMP_IF_FALSE_OR_POP = 3
+JUMP_IF_TRUE_OR_POP = 4
+
+# Work items while linearizing
+VISIT = 0
+EMIT = 1
+PATCH = 2
+
+
+Instruction = List[Any]
+
+
+def binary_site(expr: expression.Binary) -> BinarySite:
+    """The specializing site of an arithmetic or comparison operator."""
+    if expr.site is None:
+        tokentype = expr.operator.tokentype
+        if tokentype not in BINARY_OPERATORS:
+            raise RuntimeError(f"Unknown operator '{expr.operator.lexeme}'")
+        expr.site = BinarySite(BINARY_OPERATORS[tokentype])
+    return expr.site
+
+
+def linearize(expr: expression.Expression) -> List[Instruction]:
+    """Postfix code for an expression tree, built without recursion.
+
+    Instructions are `[opcode, argument, node]`, where node is the binary
+    expression an operator came from, used for error messages.
+    """
+    code: List[Instruction] = []
+    work: List[Any] = [(VISIT, expr)]
+
+    while work:
+        action, item = work.pop()
+
+        if action == EMIT:
+            code.append(item)
+            continue
+
+        if action == PATCH:
+            item[1] = len(code)
+            continue
+
+        if isinstance(item, expression.Grouping):
+            work.append((VISIT, item.expression))
+            continue
+
+        if isinstance(item, expression.Literal):
+            code.append([CONST, item.value, item])
+            continue
+
+        if isinstance(item, expression.Binary):
+            tokentype = item.operator.tokentype
+            if tokentype in (TokenType.AND, TokenType.OR):
+                opcode = JUMP_IF_FALSE_OR_POP if tokentype == TokenType.AND else JUMP_IF_TRUE_OR_POP
+                jump = [opcode, None, item]
+                work.extend([(PATCH, jump), (VISIT, item.right), (EMIT, jump), (VISIT, item.left)])
+                continue
+
+            if tokentype not in BINARY_OPERATORS:
+                raise RuntimeError(f"Unknown operator '{item.operator.lexeme}'")
+
+            work.extend([(EMIT, [BINARY, BINARY_OPERATORS[tokentype], item]), (VISIT, item.right), (VISIT, item.left)])
+            continue
+
+        code.append([EVAL, item, item])
+
+    return code
+
+
+def execute(code: List[Instruction], visitor: Visitor[Any]):
+    """Run postfix code, evaluating leaf nodes with the visitor."""
+    stack: List[Any] = []
+    pc = 0
+    end = len(code)
+
+    while pc < end:
+        opcode, argument, node = code[pc]
+        pc += 1
+
+        if opcode == CONST:
+            stack.append(argument)
+
+        elif opcode == EVAL:
+            stack.append(argument.accept(visitor))
+
+        elif opcode == BINARY:
+            right = stack.pop()
+            try:
+                stack[-1] = argument(stack[-1], right)
+            except TypeError as exp:
+                raise RuntimeError(f"Wrong types in expression at {node.operator.line}, {node.operator.column}: {exp}") from exp
+
+        elif opcode == JUMP_IF_FALSE_OR_POP:
+            if stack[-1]:
+                stack.pop()
+            else:
+                pc = argument
+
+        elif opcode == JUMP_IF_TRUE_OR_POP:
+            if stack[-1]:
+                pc = argument
+            else:
+                stack.pop()
+
+    return stack[-1]
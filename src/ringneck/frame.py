@@ -0,0 +1,127 @@
+"""Storage for the local variables of a run."""
+from typing import Any, Dict, Iterator, List, Mapping, MutableMapping, Optional
+
+from ringneck.resolver import Scope
+
+
+class Unset:
+    def __repr__(self):
+        return "<unset>"
+
+
+UNSET = Unset()
+
+# Builtins every run has, unless builtins of the same name are given, such as
+# `table` once the host calls `ringneck.tables.install`.
+INTRINSICS: Dict[str, Any] = {}
+
+
+class Frame:
+    """Locals of one run, stored in the slots assigned by a `Scope`.
+
+    Slots of names that are also builtins start out holding the builtin,
+    so they are resolved once per run instead of on every access. Names
+    the scope does not know about are kept in `extra`.
+    """
+
+    scope: Scope
+    slots: List[Any]
+    extra: Dict[str, Any]
+    builtins: Mapping[str, Any]
+
+    def __init__(self, scope: Scope, builtins: Mapping[str, Any], values: Optional[Mapping[str, Any]] = None):
+        self.scope = scope
+        self.builtins = builtins
+        self.slots = []
+        self.extra = {}
+        self.grow()
+
+        for name, value in (values or {}).items():
+            self.store(name, value)
+
+    def grow(self):
+        """Make room for names added to the scope after the frame was made."""
+        if len(self.slots) < len(self.scope.names):
+            for name in list(self.scope.names)[len(self.slots):]:
+                self.slots.append(self.builtins.get(name, INTRINSICS.get(name, UNSET)))
+
+    def reset(self, scope: Scope, builtins: Mapping[str, Any]):
+        """Empty the frame for another run, keeping the slots a scope assigned."""
+        self.scope = scope
+        self.builtins = builtins
+        names = scope.names
+        if not names:
+            self.slots = []
+        elif builtins:
+            self.slots = [builtins.get(name, INTRINSICS.get(name, UNSET)) for name in names]
+        else:
+            self.slots = [INTRINSICS.get(name, UNSET) for name in names]
+        if self.extra:
+            self.extra = {}
+
+    def rebind(self, scope: Scope) -> 'Frame':
+        """A frame for another scope, holding the same values."""
+        return Frame(scope, self.builtins, dict(self.items()))
+
+    def load(self, name: str):
+        index = self.scope.names.get(name)
+        if index is not None and index < len(self.slots):
+            value = self.slots[index]
+            return None if value is UNSET else value
+        return self.extra.get(name, self.builtins.get(name, INTRINSICS.get(name)))
+
+    def store(self, name: str, value: Any):
+        index = self.scope.names.get(name)
+        if index is None:
+            self.extra[name] = value
+            return
+
+        self.grow()
+        self.slots[index] = value
+
+    def items(self) -> Iterator[Any]:
+        for name, index in self.scope.names.items():
+            if index < len(self.slots) and self.slots[index] is not UNSET:
+                yield name, self.slots[index]
+        yield from self.extra.items()
+
+
+class FrameState(MutableMapping[str, Any]):
+    """Dict style view of a frame and the builtins behind it."""
+
+    def __init__(self, frame: 'Frame'):
+        self.frame = frame
+
+    def __getitem__(self, name: str):
+        frame = self.frame
+        index = frame.scope.names.get(name)
+        if index is not None and index < len(frame.slots) and frame.slots[index] is not UNSET:
+            return frame.slots[index]
+        if name in frame.extra:
+            return frame.extra[name]
+        if name in frame.builtins:
+            return frame.builtins[name]
+        return INTRINSICS[name]
+
+    def __setitem__(self, name: str, value: Any):
+        self.frame.store(name, value)
+
+    def __delitem__(self, name: str):
+        frame = self.frame
+        index = frame.scope.names.get(name)
+        if index is not None and index < len(frame.slots) and frame.slots[index] is not UNSET:
+            frame.slots[index] = UNSET
+            return
+        del frame.extra[name]
+
+    def __iter__(self):
+        seen = set()
+        for name, _ in self.frame.items():
+            seen.add(name)
+            yield name
+        for name in self.frame.builtins:
+            if name not in seen:
+                yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
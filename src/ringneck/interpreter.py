@@ -1,35 +1,285 @@
-from collections import ChainMap
-from typing import Any, Dict, List, Mapping, MutableMapping, Optional
+import threading
+from enum import Enum, unique
+from time import perf_counter
+from typing import Any, Dict, Generator, Hashable, Iterable, Iterator, List, MutableMapping, Optional, Tuple
 
 
+from ringneck.accessor import PathAccessor, assign, descend, walk
 from ringneck.ast.expression import Binary, Expression, ExpressionVisitor, Grouping, Literal
 from ringneck.ast import statement, expression
 from ringneck.error_handler import ErrorHandler
+from ringneck.evaluator import EvaluationStrategy, binary_site, execute, linearize
+from ringneck.frame import UNSET, Frame, FrameState
+from ringneck.metrics import REGISTRY, Registry
+from ringneck.resolver import Resolver, Scope
 from ringneck.tokens import TokenType
+from ringneck.transaction import Changeset, Commit
+
+
+def unquote(part: str) -> str:
+    if part[:1] in ['"', "'"] and part[0] == part[-1]:
+        return part[1:-1]
+    return part
+
+
+def split_address(variable_address: str) -> Tuple[str, ...]:
+    return tuple(unquote(part) for part in variable_address.split("."))
+
+
+def literal_values(expr: expression.Expression) -> Optional[Tuple[Any, ...]]:
+    """Values of a list made up of literals only, otherwise None."""
+    if not isinstance(expr, expression.List):
+        return None
+
+    values = expr.values
+    if isinstance(values, expression.ExpressionList):
+        values = values.expressions
+    if isinstance(values, expression.Starred):
+        return None
+
+    if not all(isinstance(value, Literal) for value in values):
+        return None
+
+    return tuple(value.value for value in values)
+
+
+@unique
+class OutputMode(Enum):
+    """What `Interpreter.interpret` returns of the statement results."""
+    COLLECT = 'collect'
+    STREAM = 'stream'
+    LAST = 'last'
+    DISCARD = 'discard'
 
 
 class Interpreter(ExpressionVisitor[Expression], statement.StatementVisitor[statement.Statement]):
     globals: Optional[Any] = None
-
-    def __init__(self, global_variables: Optional[Any] = None, builtins: Optional[Dict[str, Any]] = None, **kwargs: Any):
+    iterator_value: Any = None
+    changeset: Optional[Changeset] = None
+    frame: Frame
+    metrics: Optional[Registry] = None
+    # Steps a suspendable run takes between pauses, and steps left until the next one.
+    quantum: int = 1000
+    budget: int = 1000
+    _state: Optional[FrameState] = None
+
+    def __init__(self, global_variables: Optional[Any] = None, builtins: Optional[Dict[str, Any]] = None,
+                 transactional: bool = False, commit: Optional[Commit] = None,
+                 output: OutputMode = OutputMode.COLLECT,
+                 strategy: EvaluationStrategy = EvaluationStrategy.RECURSIVE, **kwargs: Any):
+        self.builtins = builtins or {}
+        self.scope = Scope()
         super().__init__(**kwargs)
         if global_variables is not None:
             self.globals = global_variables
-        self.builtins = builtins or {}
-
-        self.state = ChainMap(self.builtins, self.state)
+        if transactional:
+            self.changeset = Changeset()
+        self.commit = commit
+        self.output = output
+        self.strategy = strategy
+        self.shared: Dict[Hashable, Any] = {}
+        if REGISTRY.enabled:
+            self.metrics = REGISTRY
+
+    def reset(self, global_variables: Optional[Any] = None, builtins: Optional[Dict[str, Any]] = None,
+              transactional: bool = False, commit: Optional[Commit] = None,
+              output: OutputMode = OutputMode.COLLECT,
+              strategy: EvaluationStrategy = EvaluationStrategy.RECURSIVE, scope: Optional[Scope] = None):
+        """Prepare for another run, as if the interpreter had just been made.
+
+        The locals of the previous run are dropped. With a scope, such as
+        a program's, the frame is laid out for it right away instead of
+        being rebound when the run starts.
+        """
+        builtins = self.builtins = builtins or {}
+        if scope is None:
+            scope = self.scope
+        else:
+            self.scope = scope
+        self.frame.reset(scope, builtins)
+        self.globals = global_variables
+        self.changeset = Changeset() if transactional else None
+        self.commit = commit
+        self.output = output
+        self.strategy = strategy
+        self.metrics = REGISTRY if REGISTRY.enabled else None
+        # Rarely set, so only touched when they were.
+        if self._state is not None:
+            self._state = None
+        if self.iterator_value is not None:
+            self.iterator_value = None
+        if self.shared:
+            self.shared.clear()
+
+    @property
+    def state(self) -> MutableMapping[str, Any]:
+        """The locals, with the builtins behind them, as a mapping."""
+        if self._state is None or self._state.frame is not self.frame:
+            self._state = FrameState(self.frame)
+        return self._state
+
+    @state.setter
+    def state(self, values: MutableMapping[str, Any]):
+        self.frame = Frame(self.scope, self.builtins, values)
+
+    def interpret(self, program: Iterable[statement.Statement], scope: Optional[Scope] = None):
+        """Run statements, resolving their locals first unless a scope is given."""
+        results = self.results(program, scope)
+        if self.output == OutputMode.STREAM:
+            return results
+
+        if self.output == OutputMode.COLLECT:
+            return list(results)
+
+        last = None
+        for last in results:
+            pass
+
+        if self.output == OutputMode.LAST:
+            return last
+        return None
+
+    def enter(self, scope: Optional[Scope]) -> Optional[Resolver]:
+        """Bind the frame to the scope of a run, a resolver if there is no scope yet."""
+        resolver = Resolver(self.scope) if scope is None else None
+        self.scope = scope or self.scope
+        if self.frame.scope is not self.scope:
+            self.frame = self.frame.rebind(self.scope)
+        self.shared.clear()
+        return resolver
+
+    def adopt(self, stmt: statement.Statement, resolver: Resolver):
+        """Resolve a statement into the run's scope, or switch to the scope it was resolved in."""
+        owner = stmt.scope
+        if owner is None:
+            resolver.resolve_statement(stmt)
+        elif owner is not self.scope:
+            self.scope = resolver.scope = owner
+            self.frame = self.frame.rebind(owner)
+        self.frame.grow()
+
+    def results(self, program: Iterable[statement.Statement], scope: Optional[Scope] = None) -> Iterator[Any]:
+        """Execute the program, yielding the result of each statement."""
+        resolver = self.enter(scope)
+        metrics = self.metrics
+        started = perf_counter() if metrics is not None else 0.0
 
-    def interpret(self, program: List[statement.Statement]):
-        output: List[Any] = []
         try:
             for stmt in program:
-                output.append(self.execute(stmt))
+                if resolver is not None:
+                    self.adopt(stmt, resolver)
+                yield self.execute(stmt)
         except RuntimeError as error:
+            if metrics is not None:
+                metrics.increment('ringneck_errors_total', kind=type(error.__cause__ or error).__name__)
             ErrorHandler.runtime_error(error)
+        finally:
+            if metrics is not None:
+                metrics.observe('ringneck_exec_seconds', perf_counter() - started)
+
+        if self.changeset is not None:
+            self.globals = self.changeset.apply(self.root("$"), self.commit)
+            self.changeset = Changeset()
+
+    def suspendable(self, program: Iterable[statement.Statement], scope: Optional[Scope] = None,
+                    quantum: int = 1000) -> Generator[None, None, Any]:
+        """Execute the program as a generator that pauses after every `quantum` steps.
+
+        A step is a statement, or an iteration of a `repeat`. Whoever
+        resumes the generator may set `budget` to the number of steps to
+        run before the next pause, otherwise it is `quantum` again. The
+        generator returns what `interpret` would, except that a stream is
+        collected.
+        """
+        self.quantum = self.budget = quantum
+        return self._suspendable(program, scope)
+
+    def _suspendable(self, program: Iterable[statement.Statement],
+                     scope: Optional[Scope]) -> Generator[None, None, Any]:
+        resolver = self.enter(scope)
+        metrics = self.metrics
+        started = perf_counter() if metrics is not None else 0.0
+        collected: List[Any] = []
+        last = None
 
-        return output
+        try:
+            for stmt in program:
+                if resolver is not None:
+                    self.adopt(stmt, resolver)
+                last = yield from self.suspendable_execute(stmt)
+                if self.output in (OutputMode.COLLECT, OutputMode.STREAM):
+                    collected.append(last)
+        except RuntimeError as error:
+            if metrics is not None:
+                metrics.increment('ringneck_errors_total', kind=type(error.__cause__ or error).__name__)
+            ErrorHandler.runtime_error(error)
+        finally:
+            if metrics is not None:
+                metrics.observe('ringneck_exec_seconds', perf_counter() - started)
+
+        if self.changeset is not None:
+            self.globals = self.changeset.apply(self.root("$"), self.commit)
+            self.changeset = Changeset()
+
+        if self.output in (OutputMode.COLLECT, OutputMode.STREAM):
+            return collected
+        return last if self.output == OutputMode.LAST else None
+
+    def pause(self) -> Generator[None, None, None]:
+        """Pause before the next step if the budget ran out."""
+        if self.budget <= 0:
+            yield
+            if self.budget <= 0:
+                self.budget = self.quantum
+
+    def suspendable_execute(self, stmt: statement.Statement) -> Generator[None, None, Any]:
+        # Pauses come before a step rather than after, so a run whose last
+        # step uses up the budget finishes instead of pausing.
+        if isinstance(stmt, statement.If):
+            yield from self.pause()
+            condition = self.evaluate(stmt.condition)
+            self.budget -= 1
+            if not condition:
+                return None
+
+            results = []
+            result = None
+            for s in stmt.thenbranch:
+                result = yield from self.suspendable_execute(s)
+                results.append(result)
+            return results if self.output == OutputMode.COLLECT else result
+
+        if isinstance(stmt, statement.Repeat):
+            body = stmt.stmt
+            remaining = self.repeat_count(stmt)
+            if isinstance(body, (statement.If, statement.Repeat)):
+                for _ in range(remaining):
+                    yield from self.suspendable_execute(body)
+                return None
+
+            # Simple bodies run as many iterations at a time as the budget allows.
+            execute = self.execute
+            while remaining > 0:
+                yield from self.pause()
+                steps = min(remaining, self.budget)
+                for _ in range(steps):
+                    execute(body)
+                remaining -= steps
+                self.budget -= steps
+            return None
+
+        # As pause(), without making a generator for every statement.
+        if self.budget <= 0:
+            yield
+            if self.budget <= 0:
+                self.budget = self.quantum
+        result = self.execute(stmt)
+        self.budget -= 1
+        return result
 
     def execute(self, stmt: statement.Statement):
+        if stmt.handler is not None:
+            return stmt.handler(self)
         return stmt.accept(self)
 
     def evaluate(self, expr: Expression):
@@ -38,61 +288,71 @@ class Interpreter(ExpressionVisitor[Expression], statement.StatementVisitor[stat
     def visit_Literal_Expression(self, literal: Literal):
         return literal.value
 
+    def evaluate_iteratively(self, expr: Binary | Grouping):
+        if expr.code is None:
+            expr.code = linearize(expr)
+        return execute(expr.code, self)
+
     def visit_Grouping_Expression(self, expr: Grouping):
+        if self.strategy == EvaluationStrategy.ITERATIVE:
+            return self.evaluate_iteratively(expr)
         return self.evaluate(expr.expression)
 
     def visit_Binary_Expression(self, expr: Binary):
-        try:
-            if expr.operator.tokentype == TokenType.PLUS:
-                return expr.left.accept(self) + expr.right.accept(self)
-
-            if expr.operator.tokentype == TokenType.MINUS:
-                return expr.left.accept(self) - expr.right.accept(self)
-
-            if expr.operator.tokentype == TokenType.STAR:
-                left_value = expr.left.accept(self)
-                right_value = expr.right.accept(self)
-                return left_value * right_value
-
-            if expr.operator.tokentype == TokenType.SLASH:
-                return expr.left.accept(self) / expr.right.accept(self)
-
-            if expr.operator.tokentype == TokenType.LESS:
-                return expr.left.accept(self) < expr.right.accept(self)
+        if self.strategy == EvaluationStrategy.ITERATIVE:
+            return self.evaluate_iteratively(expr)
 
-            if expr.operator.tokentype == TokenType.LESS_EQUAL:
-                return expr.left.accept(self) <= expr.right.accept(self)
-
-            if expr.operator.tokentype == TokenType.GREATER:
-                return expr.left.accept(self) > expr.right.accept(self)
-
-            if expr.operator.tokentype == TokenType.GREATER_EQUAL:
-                return expr.left.accept(self) >= expr.right.accept(self)
-
-            if expr.operator.tokentype == TokenType.AND:
+        site = expr.site
+        if site is None:
+            tokentype = expr.operator.tokentype
+            if tokentype == TokenType.AND:
                 return expr.left.accept(self) and expr.right.accept(self)
 
-            if expr.operator.tokentype == TokenType.OR:
+            if tokentype == TokenType.OR:
                 return expr.left.accept(self) or expr.right.accept(self)
 
-            if expr.operator.tokentype == TokenType.EQUAL_EQUAL:
-                return expr.left.accept(self) == expr.right.accept(self)
+            site = binary_site(expr)
 
-            if expr.operator.tokentype == TokenType.BANG_EQUAL:
-                return expr.left.accept(self) != expr.right.accept(self)
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+        if type(left) is site.left and type(right) is site.right:
+            site.hits += 1
+            return site.operation(left, right)
+
+        try:
+            return site.generic(left, right)
         except TypeError as exp:
             raise RuntimeError(f"Wrong types in expression at {expr.operator.line}, {expr.operator.column}: {exp}") from exp
 
-        raise RuntimeError(f"Unknown operator '{expr.operator.lexeme}'")
-
     def visit_AugmentedAssign_Expression(self, expr: expression.AugmentedAssign):
         if expr.operator.tokentype == TokenType.MINUS_EQUAL:
-            return self.set(expr.left.name.literal, self.get(expr.left.name.literal) - self.evaluate(expr.right))
+            value = self.evaluate(expr.left) - self.evaluate(expr.right)
+        elif expr.operator.tokentype == TokenType.PLUS_EQUAL:
+            value = self.evaluate(expr.left) + self.evaluate(expr.right)
+        else:
+            raise RuntimeError(f"Unknown operator '{expr.operator.lexeme}'")
 
-        if expr.operator.tokentype == TokenType.PLUS_EQUAL:
-            return self.set(expr.left.name.literal, self.get(expr.left.name.literal) + self.evaluate(expr.right))
+        self.set(expr.left.name.literal, value)
+        if expr.invalidates:
+            self.forget(expr.invalidates)
 
-        raise RuntimeError(f"Unknown operator '{expr.operator.lexeme}'")
+    def forget(self, keys: Iterable[Hashable]):
+        """Drop remembered values of shared expressions."""
+        for key in keys:
+            self.shared.pop(key, None)
+
+    def visit_Shared_Expression(self, expr: expression.Shared):
+        try:
+            value = self.shared[expr.key]
+        except KeyError:
+            if self.metrics is not None:
+                self.metrics.increment('ringneck_cache_misses_total', cache='shared')
+            value = self.shared[expr.key] = self.evaluate(expr.expression)
+            return value
+
+        if self.metrics is not None:
+            self.metrics.increment('ringneck_cache_hits_total', cache='shared')
+        return value
 
     def visit_Tuple_Expression(self, expr: expression.Tuple):
         return tuple([v.accept(self) for v in expr.values])
@@ -101,7 +361,14 @@ class Interpreter(ExpressionVisitor[Expression], statement.StatementVisitor[stat
         if expr.operator.tokentype == TokenType.MAYBE_EQUAL:
             if self.get(expr.name.literal) is not None:
                 return
-        self.set(expr.name.literal, self.evaluate(expr.value))
+
+        value = self.evaluate(expr.value)
+        if expr.slot is not None:
+            self.frame.slots[expr.slot] = value
+        else:
+            self.set(expr.name.literal, value)
+        if expr.invalidates:
+            self.forget(expr.invalidates)
 
     def visit_MultiAssign_Expression(self, expr: expression.MultiAssign):
         identifiers = [v.name.literal for v in expr.identifiers.values]
@@ -111,28 +378,60 @@ class Interpreter(ExpressionVisitor[Expression], statement.StatementVisitor[stat
             values = [self.evaluate(v) for v in expr.values.values]
         for identifier, value in zip(identifiers, values):
             self.set(f"{identifier}", value)
+        if expr.invalidates:
+            self.forget(expr.invalidates)
 
-    def visit_AssignIterator_Expression(self, expr: expression.AssignIterator):
-        prefix = expr.iterator.prefix.literal
-        iterator = expr.iterator.iterator.accept(self)
+    def iterator_paths(self, expr: expression.VariableIterator) -> Iterable[Tuple[Any, Tuple[str, ...]]]:
+        if expr.paths is not None:
+            return expr.paths
+
+        prefix = expr.prefix.literal
+        keys = literal_values(expr.iterator)
+        if keys is not None:
+            expr.paths = tuple((key, split_address(f"{prefix}{key}")) for key in keys)
+            return expr.paths
 
-        for it in iterator:
-            self.state["%"] = it
-            self.set(f"{prefix}{it}", self.evaluate(expr.value))
-        if "%" in self.state:
-            del self.state["%"]
+        keys = expr.iterator.accept(self)
+        return ((key, split_address(f"{prefix}{key}")) for key in keys)
+
+    def visit_AssignIterator_Expression(self, expr: expression.AssignIterator):
+        previous = self.iterator_value
+        try:
+            for key, parts in self.iterator_paths(expr.iterator):
+                self.iterator_value = key
+                self.set_path(parts, self.evaluate(expr.value))
+                if expr.invalidates:
+                    self.forget(expr.invalidates)
+        finally:
+            self.iterator_value = previous
 
     def visit_Variable_Expression(self, expr: expression.Variable):
-        return self.get(expr.name.literal)
+        accessor = expr.accessor
+        if accessor is None:
+            accessor = expr.accessor = PathAccessor(split_address(expr.name.literal))
+
+        if expr.slot is not None:
+            result = self.frame.slots[expr.slot]
+            if result is UNSET:
+                result = None
+            return accessor(result) if accessor.parts else result
+
+        if accessor.root == "$" and self.changeset is not None:
+            found, value = self.changeset.lookup(accessor.parts, self.root("$"))
+            if found:
+                return value
+        return accessor(self.root(accessor.root))
 
     def visit_IteratorValue_Expression(self, expr: expression.IteratorValue):
-        return self.state.get(expr.token.lexeme, None)
+        return self.iterator_value
 
-    def visit_VariableIterator_Expression(self, expr: expression.VariableIterator):
-        prefix = expr.prefix.literal
-        iterator = expr.iterator.accept(self)
+    def iterator_values(self, expr: expression.VariableIterator) -> Iterator[Any]:
+        """Values of an iterator variable, read as they are consumed."""
+        return (self.get_path(parts) for _, parts in self.iterator_paths(expr))
 
-        return [self.get(f"{prefix}{it}") for it in iterator]
+    def visit_VariableIterator_Expression(self, expr: expression.VariableIterator) -> List[Any]:
+        # Read now, the values can be stored and read again, or change before they are used.
+        return list(self.iterator_values(expr))
 
     def visit_Dict_Expression(self, expr: expression.Dict):
         output: Dict[Any, Any] = {}
@@ -178,17 +477,39 @@ class Interpreter(ExpressionVisitor[Expression], statement.StatementVisitor[stat
         for argument in in_arguments:
             arguments.append(self.evaluate(argument))
 
+        return self.call(callee, arguments)
+
+    def call(self, callee: Any, arguments: List[Any]):
+        """Call a builtin or method, giving builtins access to the state."""
         if hasattr(callee, "__globals__"):
             callee.__globals__["state"] = self.state
             callee.__globals__["globals"] = self.globals
 
         try:
-            return callee(*arguments)
+            if self.metrics is None:
+                result = callee(*arguments)
+            else:
+                result = self.timed_call(callee, arguments)
         except AttributeError as error:
             raise RuntimeError(f"Attribute error in expression: {error}") from error
         except TypeError as error:
             raise RuntimeError(f"Type error in expression: {error}") from error
 
+        # Builtins and methods can change anything shared expressions read.
+        if self.shared:
+            self.shared.clear()
+        return result
+
+    def timed_call(self, callee: Any, arguments: List[Any]):
+        assert self.metrics is not None
+        name = getattr(callee, "__qualname__", None) or type(callee).__name__
+        started = perf_counter()
+        try:
+            return callee(*arguments)
+        finally:
+            self.metrics.increment('ringneck_builtin_calls_total', builtin=name)
+            self.metrics.observe('ringneck_builtin_seconds', perf_counter() - started, builtin=name)
+
     def visit_Conditional_Expression(self, expr: expression.Conditional):
         if expr.condition.accept(self):
             return expr.left.accept(self)
@@ -197,70 +518,110 @@ class Interpreter(ExpressionVisitor[Expression], statement.StatementVisitor[stat
             return expr.right.accept(self)
 
     def visit_Starred_Expression(self, expr: expression.Starred):
+        if isinstance(expr.value, expression.VariableIterator):
+            # Unpacked right away, so there is no need for a list in between.
+            return self.iterator_values(expr.value)
         return self.evaluate(expr.value)
 
-    def get(self, variable_address: str):
-        parts = variable_address.split(".")
-        if parts[0] == "$":
+    def root(self, name: str):
+        if name == "$":
             if self.globals is None:
                 self.globals = {}
-            source = self.globals
-            parts.pop(0)
-        else:
-            source = self.state
+            return self.globals
 
-        result = source
-        while parts:
-            part = parts.pop(0)
+        return self.frame.load(name)
 
-            if part[0] in ['"', "'"] and part[0] == part[-1]:
-                part = part[1:-1]
+    def get(self, variable_address: str):
+        return self.get_path(split_address(variable_address))
 
-            if hasattr(result, part):
-                result = getattr(result, part)
-
-            elif isinstance(result, Mapping):
-                result = result.get(part)
-        return result
+    def get_path(self, parts: Tuple[str, ...]):
+        if parts[0] == "$" and self.changeset is not None:
+            found, value = self.changeset.lookup(parts[1:], self.root("$"))
+            if found:
+                return value
+        return walk(self.root(parts[0]), parts[1:])
 
     def set(self, variable_address: str, value: Any):
-        parts = variable_address.split(".")
-        if parts[0] == "$":
-            if self.globals is None:
-                self.globals = {}
+        self.set_path(split_address(variable_address), value)
 
-            source = self.globals
-            parts.pop(0)
-        else:
-            source = self.state
-
-        result = source
-        while len(parts) > 1:
-            part = parts.pop(0)
-            if part[0] in ['"', "'"] and part[0] == part[-1]:
-                part = part[1:-1]
-            if isinstance(result, Mapping):
-                result = result[part]
-            else:
-                result = getattr(result, part)
+    def set_path(self, parts: Tuple[str, ...], value: Any):
+        if len(parts) == 1:
+            self.frame.store(parts[0], value)
+            return
 
-        part = parts[0]
-        if part[0] in ['"', "'"] and part[0] == part[-1]:
-            part = part[1:-1]
+        if parts[0] == "$" and self.changeset is not None:
+            self.changeset.record(parts[1:], value)
+            return
 
-        if isinstance(result, MutableMapping):
-            result[part] = value
-        else:
-            setattr(result, part, value)
+        assign(descend(self.root(parts[0]), parts[1:-1]), parts[-1], value)
 
     def visit_Expression_Statement(self, stmt: statement.Expression):
         return self.evaluate(stmt.expr)
 
     def visit_If_Statement(self, stmt: statement.If):
         if self.evaluate(stmt.condition):
-            res = [self.execute(s) for s in stmt.thenbranch]
-            return res
+            if self.output == OutputMode.COLLECT:
+                return [self.execute(s) for s in stmt.thenbranch]
+
+            result = None
+            for s in stmt.thenbranch:
+                result = self.execute(s)
+            return result
+
+    def repeat_count(self, stmt: statement.Repeat) -> int:
+        count = self.evaluate(stmt.count)
+        if type(count) is not int:
+            raise RuntimeError(f"Repeat count must be an int, not {type(count).__name__}")
+        return count
 
     def visit_Repeat_Statement(self, stmt: statement.Repeat):
-        for _ in range(self.evaluate(stmt.count)):
-            self.execute(stmt.stmt)
+        execute = self.execute
+        body = stmt.stmt
+        count = self.repeat_count(stmt)
+        stmt.iterations += count
+        for _ in range(count):
+            execute(body)
+
+
+class InterpreterPool:
+    """Interpreters kept per thread, to be reset and reused by later runs.
+
+    A run takes an idle interpreter, or makes one if there is none, such
+    as when a builtin starts another run, and gives it back when it is
+    done. At most `size` idle interpreters are kept per thread.
+    """
+
+    size: int
+
+    def __init__(self, size: int = 4):
+        self.size = size
+        self._local = threading.local()
+
+    def idle(self) -> List[Interpreter]:
+        """The idle interpreters of the current thread."""
+        try:
+            return self._local.idle
+        except AttributeError:
+            idle = self._local.idle = []
+            return idle
+
+    def acquire(self, scope: Scope, global_variables: Optional[Any] = None,
+                builtins: Optional[Dict[str, Any]] = None, **options: Any) -> Interpreter:
+        idle = self.idle()
+        if idle:
+            interpreter = idle.pop()
+            interpreter.reset(global_variables, builtins, scope=scope, **options)
+            return interpreter
+
+        interpreter = Interpreter(global_variables, builtins, **options)
+        interpreter.scope = scope
+        interpreter.frame.reset(scope, interpreter.builtins)
+        return interpreter
+
+    def release(self, interpreter: Interpreter):
+        idle = self.idle()
+        if len(idle) < self.size:
+            # Let go of the run's values while the interpreter is idle.
+            interpreter.globals = None
+            interpreter.frame.slots = []
+            idle.append(interpreter)
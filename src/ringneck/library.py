@@ -0,0 +1,158 @@
+"""Directories of script files, compiled once and reloaded when they change."""
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+from ringneck.diagnostics import check_source
+from ringneck.error_handler import Error
+from ringneck.parser import ParserError
+from ringneck.program import Program
+
+
+@dataclass
+class ScriptStats:
+    name: str
+    path: Path
+    mtime: int
+    compile_time: float
+    memory: int = 0
+    errors: List[Error] = field(default_factory=list)
+
+
+class ScriptLibrary(Mapping[str, Program]):
+    """Compiled scripts of a directory, looked up by name.
+
+    A script's name is its path relative to the directory, without the
+    suffix. `refresh` recompiles files whose modification time changed
+    and publishes the new set of programs in one assignment, so runs that
+    already hold a program finish on that version. A script that fails to
+    compile keeps its previous version, with the errors in its stats. An
+    error refreshing from `watch` is kept in `error`, and polling goes on.
+    Refreshing from `watch` parses under `ErrorHandler.lock`, as every
+    `Program` does, so it does not mix its errors with those of parses
+    in other threads.
+    """
+
+    directory: Path
+    pattern: str
+    measure_memory: bool
+    programs: Dict[str, Program]
+    stats: Dict[str, ScriptStats]
+
+    def __init__(self, directory: str | Path, pattern: str = "*.rn", measure_memory: bool = False):
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.measure_memory = measure_memory
+        self.programs = {}
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.error: Optional[Exception] = None
+        self.refresh()
+
+    def __getitem__(self, name: str) -> Program:
+        return self.programs[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.programs)
+
+    def __len__(self):
+        return len(self.programs)
+
+    def refresh(self) -> List[str]:
+        """Recompile changed files, returning the names that changed."""
+        with self._lock:
+            programs = dict(self.programs)
+            stats = dict(self.stats)
+            changed: List[str] = []
+            found = set()
+
+            for path in sorted(self.directory.glob(self.pattern)):
+                name = path.relative_to(self.directory).with_suffix('').as_posix()
+                try:
+                    mtime = path.stat().st_mtime_ns
+                    found.add(name)
+                    if name in stats and stats[name].mtime == mtime:
+                        continue
+
+                    program, stats[name] = self.compile(name, path, mtime)
+                except OSError:
+                    # Removed or unreadable while refreshing, picked up next time.
+                    continue
+                if program is not None:
+                    programs[name] = program
+                changed.append(name)
+
+            for name in set(stats) - found:
+                programs.pop(name, None)
+                del stats[name]
+                changed.append(name)
+
+            self.programs = programs
+            self.stats = stats
+
+        return changed
+
+    def compile(self, name: str, path: Path, mtime: int) -> Tuple[Optional[Program], ScriptStats]:
+        try:
+            source = path.read_text(encoding="utf-8")
+        except UnicodeDecodeError as error:
+            return None, ScriptStats(name, path, mtime, 0.0, 0, [Error(0, 0, f"Cannot read script: {error}")])
+
+        tracing = self.measure_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0] if self.measure_memory else 0
+
+        start = time.perf_counter()
+        program: Optional[Program] = None
+        try:
+            program = Program(source)
+            errors = program.errors
+        except ParserError as error:
+            token, message = error.args
+            errors = [Error(token.line, token.column, message)]
+        except Exception as error:  # pylint: disable=broad-except
+            # The scanner gives up on some errors by raising, such as a
+            # script ending inside a string, `check_source` reports those.
+            errors = [Error(diagnostic.line, diagnostic.column, diagnostic.message)
+                      for diagnostic in check_source(source, str(path))]
+            errors = errors or [Error(0, 0, f"{type(error).__name__}: {error}")]
+        compile_time = time.perf_counter() - start
+
+        memory = tracemalloc.get_traced_memory()[0] - before if self.measure_memory else 0
+        if tracing:
+            tracemalloc.stop()
+
+        if errors:
+            program = None
+        return program, ScriptStats(name, path, mtime, compile_time, memory, errors)
+
+    def watch(self, interval: float = 1.0):
+        """Refresh in a background thread every interval seconds."""
+        if self._watcher is not None:
+            return
+
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._poll, args=(interval,), daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        if self._watcher is None:
+            return
+
+        self._stop.set()
+        self._watcher.join()
+        self._watcher = None
+
+    def _poll(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as error:  # pylint: disable=broad-except
+                # Kept for the host to look at, the next refresh may succeed.
+                self.error = error
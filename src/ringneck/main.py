@@ -0,0 +1,237 @@
+"""Command line interface."""
+import importlib
+import json
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from enum import Enum, unique
+from pathlib import Path
+from typing import Any, Deque, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+import typer
+
+from ringneck.bundle import write_bundle
+from ringneck.diagnostics import check as check_scripts
+from ringneck.interpreter import OutputMode
+from ringneck.parser import ParserError
+from ringneck.program import Program
+
+
+app = typer.Typer(help="Run ringneck scripts.")
+
+
+@unique
+class ErrorPolicy(Enum):
+    SKIP = 'skip'
+    EMIT = 'emit'
+    FAIL = 'fail'
+
+
+# Line number, output line or None, error message or None, seconds spent.
+Result = Tuple[int, Optional[str], Optional[str], float]
+
+
+def load_builtins(specs: Iterable[str]) -> Dict[str, Any]:
+    """Builtins from `module:attr` specs, naming a mapping or a function."""
+    builtins: Dict[str, Any] = {}
+    for spec in specs:
+        module_name, _, attribute = spec.partition(":")
+        if not module_name or not attribute:
+            raise ValueError(f"Builtins must be given as module:attr, got '{spec}'")
+
+        value = getattr(importlib.import_module(module_name), attribute)
+        if isinstance(value, dict):
+            builtins.update(value)
+        elif callable(value):
+            builtins[attribute] = value
+        else:
+            raise ValueError(f"'{spec}' is neither a mapping nor a function")
+    return builtins
+
+
+class Worker:
+    """A compiled program and its builtins, run against one record at a time."""
+
+    current: Optional['Worker'] = None
+
+    def __init__(self, source: str, specs: List[str]):
+        self.program = Program(source)
+        self.builtins = load_builtins(specs)
+
+    @classmethod
+    def start(cls, source: str, specs: List[str]):
+        cls.current = cls(source, specs)
+
+    def process(self, number: int, line: str) -> Result:
+        start = time.perf_counter()
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("Record is not a JSON object")
+            self.program.run(global_variables=record, builtins=dict(self.builtins), output=OutputMode.DISCARD)
+            output = json.dumps(record)
+        except Exception as error:  # pylint: disable=broad-except
+            return number, None, f"{type(error).__name__}: {error}", time.perf_counter() - start
+        return number, output, None, time.perf_counter() - start
+
+
+def process(number: int, line: str) -> Result:
+    assert Worker.current is not None
+    return Worker.current.process(number, line)
+
+
+class Stats:
+    """Counts and a bounded sample of latencies, for percentiles."""
+
+    SAMPLES = 10000
+
+    def __init__(self):
+        self.records = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+        self.latencies: List[float] = []
+        self._random = random.Random(0)
+
+    def add(self, latency: float, error: bool):
+        self.records += 1
+        self.errors += error
+        if len(self.latencies) < self.SAMPLES:
+            self.latencies.append(latency)
+        else:
+            index = self._random.randrange(self.records)
+            if index < self.SAMPLES:
+                self.latencies[index] = latency
+
+    def percentile(self, fraction: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def report(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        rate = self.records / elapsed if elapsed else 0.0
+        p50, p90, p99 = (self.percentile(fraction) * 1e3 for fraction in (0.5, 0.9, 0.99))
+        return (f"{self.records} records, {self.errors} errors in {elapsed:.2f}s ({rate:.0f} records/s), "
+                f"latency p50 {p50:.3f}ms p90 {p90:.3f}ms p99 {p99:.3f}ms")
+
+
+def numbered(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    for number, line in enumerate(lines, start=1):
+        if line.strip():
+            yield number, line
+
+
+def results(source: str, specs: List[str], lines: Iterable[str], workers: int) -> Iterator[Result]:
+    """Results in input order, with at most a few records per worker in flight."""
+    if workers <= 1:
+        Worker.start(source, specs)
+        for number, line in numbered(lines):
+            yield process(number, line)
+        return
+
+    window = workers * 4
+    with ProcessPoolExecutor(workers, initializer=Worker.start, initargs=(source, specs)) as executor:
+        pending: Deque[Future[Result]] = deque()
+        for number, line in numbered(lines):
+            pending.append(executor.submit(process, number, line))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+@app.callback()
+def main():
+    """Run ringneck scripts."""
+
+
+@app.command()
+def run(script: Path = typer.Argument(..., exists=True, dir_okay=False, help="Script to run."),
+        records: Optional[Path] = typer.Argument(None, exists=True, dir_okay=False,
+                                                 help="JSON lines file, standard input if not given."),
+        builtins: List[str] = typer.Option([], "--builtins", "-b", help="Builtins as module:attr, may be repeated."),
+        workers: int = typer.Option(1, "--workers", "-w", min=1, help="Processes running records in parallel."),
+        stats: bool = typer.Option(False, "--stats", help="Report throughput and latency on standard error."),
+        on_error: ErrorPolicy = typer.Option(ErrorPolicy.FAIL, "--on-error",
+                                             help="Skip failing records, emit them as error records, or stop.")):
+    """Run a script on every record of a JSON lines stream.
+
+    Each record is the script's `$`, and is written to standard output
+    after the script has changed it.
+    """
+    source = script.read_text(encoding="utf-8")
+    try:
+        program = Program(source)
+    except ParserError as error:
+        token, message = error.args
+        typer.echo(f"{script}:{token.line}:{token.column}: {message}", err=True)
+        raise typer.Exit(1)
+    if program.errors:
+        for error in program.errors:
+            typer.echo(f"{script}:{error.line}:{error.column}: {error.msg}", err=True)
+        raise typer.Exit(1)
+
+    try:
+        load_builtins(builtins)
+    except (ImportError, AttributeError, ValueError) as error:
+        typer.echo(f"Could not load builtins: {error}", err=True)
+        raise typer.Exit(2)
+
+    counters = Stats()
+    stream: IO[str] = sys.stdin if records is None else records.open(encoding="utf-8")
+    try:
+        for number, output, error, latency in results(source, builtins, stream, workers):
+            counters.add(latency, error is not None)
+            if error is None:
+                typer.echo(output)
+            elif on_error == ErrorPolicy.EMIT:
+                typer.echo(json.dumps({'error': error, 'line': number}))
+            elif on_error == ErrorPolicy.FAIL:
+                typer.echo(f"Record on line {number}: {error}", err=True)
+                raise typer.Exit(1)
+    finally:
+        if records is not None:
+            stream.close()
+        if stats:
+            typer.echo(counters.report(), err=True)
+
+
+@app.command()
+def check(paths: List[Path] = typer.Argument(..., exists=True, help="Scripts, or directories to search for them."),
+          workers: Optional[int] = typer.Option(None, "--workers", "-w", min=1,
+                                                help="Processes checking files, one per CPU if not given."),
+          pattern: str = typer.Option("*.rn", "--pattern", help="Scripts to check in directories."),
+          as_json: bool = typer.Option(False, "--json", help="Write the diagnostics as a JSON list.")):
+    """Report every syntax error of many scripts.
+
+    Exits with 1 if there are any.
+    """
+    diagnostics = check_scripts(paths, workers, pattern)
+    if as_json:
+        typer.echo(json.dumps([diagnostic.to_dict() for diagnostic in diagnostics], indent=2))
+    else:
+        for diagnostic in diagnostics:
+            typer.echo(str(diagnostic))
+    if diagnostics:
+        raise typer.Exit(1)
+
+
+@app.command()
+def bundle(directory: Path = typer.Argument(..., exists=True, file_okay=False, help="Directory of scripts."),
+           output: Path = typer.Option(..., "--output", "-o", dir_okay=False, help="Bundle file to write."),
+           pattern: str = typer.Option("*.rn", "--pattern", help="Scripts to bundle.")):
+    """Scan every script of a directory into one bundle file.
+
+    Nothing is written if any script has a syntax error.
+    """
+    diagnostics = check_scripts([directory], pattern=pattern)
+    if diagnostics:
+        for diagnostic in diagnostics:
+            typer.echo(str(diagnostic), err=True)
+        raise typer.Exit(1)
+
+    count = write_bundle(directory, output, pattern)
+    typer.echo(f"Bundled {count} scripts into {output} ({output.stat().st_size} bytes)", err=True)
@@ -0,0 +1,211 @@
+"""Opt-in runtime metrics.
+
+Metrics are off by default. While they are off, instrumented code does
+nothing beyond checking `REGISTRY.enabled`. Once `enable()` is called,
+programs record scan, parse and execution times, their token and node
+counts, builtin calls, cache hits and misses and errors. `snapshot()`
+returns them as a dict and `to_prometheus()` in the Prometheus text
+format.
+
+Interpreters check the flag when they are created, so enabling or
+disabling metrics applies to runs started afterwards.
+"""
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+Labels = Tuple[Tuple[str, str], ...]
+Key = Tuple[str, Labels]
+# Name, labels and value of a gauge computed when metrics are read.
+Sample = Tuple[str, Dict[str, str], float]
+Collector = Callable[[], Iterable[Sample]]
+
+
+SECONDS = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0, 10.0)
+SIZES = (10.0, 100.0, 1e3, 1e4, 1e5, 1e6)
+
+DESCRIPTIONS: Dict[str, str] = {
+    'ringneck_scan_seconds': "Time spent scanning a program.",
+    'ringneck_parse_seconds': "Time spent parsing a program.",
+    'ringneck_exec_seconds': "Time spent running a program.",
+    'ringneck_program_tokens': "Tokens per compiled program.",
+    'ringneck_program_nodes': "Syntax tree nodes per compiled program.",
+    'ringneck_builtin_calls_total': "Calls of builtins and methods.",
+    'ringneck_builtin_seconds': "Time spent in builtins and methods.",
+    'ringneck_cache_hits_total': "Cache hits.",
+    'ringneck_cache_misses_total': "Cache misses.",
+    'ringneck_cache_hits': "Hits of the caches of live programs.",
+    'ringneck_cache_misses': "Misses of the caches of live programs.",
+    'ringneck_errors_total': "Compile and runtime errors.",
+    'ringneck_promotions_total': "Tiered programs promoted to the compiled tier.",
+    'ringneck_promotion_seconds': "Time spent compiling promoted programs.",
+    'ringneck_promotion_failures_total': "Tiered programs that failed to compile when promoted.",
+}
+
+
+def labels_of(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+class Histogram:
+    """Counts of observed values per bucket, with their count and sum."""
+
+    bounds: Tuple[float, ...]
+    counts: List[int]
+    count: int
+    total: float
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def cumulative(self) -> Dict[str, int]:
+        """Counts of values at most each bound, as Prometheus buckets are."""
+        buckets: Dict[str, int] = {}
+        running = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            running += count
+            buckets['+Inf' if bound == float('inf') else repr(bound)] = running
+        return buckets
+
+
+class Registry:
+    """Counters and histograms, keyed by name and labels."""
+
+    enabled: bool
+    counters: Dict[Key, float]
+    histograms: Dict[Key, Histogram]
+    collectors: List[Collector]
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.counters = {}
+        self.histograms = {}
+        self.collectors = []
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, amount: float = 1, **labels: str):
+        key = (name, labels_of(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, bounds: Tuple[float, ...] = SECONDS, **labels: str):
+        key = (name, labels_of(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(bounds)
+            histogram.observe(value)
+
+    def register(self, collector: Collector):
+        """Add a function returning gauges to report along with the metrics."""
+        self.collectors.append(collector)
+
+    def gauges(self) -> Dict[Key, float]:
+        gauges: Dict[Key, float] = {}
+        for collector in self.collectors:
+            for name, labels, value in collector():
+                key = (name, labels_of(labels))
+                gauges[key] = gauges.get(key, 0) + value
+        return gauges
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+
+    def hit_rate(self, cache: str) -> Optional[float]:
+        """Share of hits of a cache, counted and live, None before any lookup."""
+        labels = (('cache', cache),)
+        values = dict(self.counters)
+        values.update(self.gauges())
+        hits = values.get(('ringneck_cache_hits_total', labels), 0) + values.get(('ringneck_cache_hits', labels), 0)
+        misses = (values.get(('ringneck_cache_misses_total', labels), 0)
+                  + values.get(('ringneck_cache_misses', labels), 0))
+        return hits / (hits + misses) if hits + misses else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Every metric as plain data, by name, one sample per set of labels."""
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {key: (dict(histogram.cumulative()), histogram.count, histogram.total)
+                          for key, histogram in self.histograms.items()}
+
+        result: Dict[str, Any] = {}
+
+        def family(name: str, kind: str) -> List[Dict[str, Any]]:
+            entry = result.setdefault(name, {'type': kind, 'help': DESCRIPTIONS.get(name, ""), 'samples': []})
+            return entry['samples']
+
+        for (name, labels), value in sorted(counters.items()):
+            family(name, 'counter').append({'labels': dict(labels), 'value': value})
+        for (name, labels), value in sorted(self.gauges().items()):
+            family(name, 'gauge').append({'labels': dict(labels), 'value': value})
+        for (name, labels), (buckets, count, total) in sorted(histograms.items()):
+            family(name, 'histogram').append(
+                {'labels': dict(labels), 'buckets': buckets, 'count': count, 'sum': total})
+        return result
+
+    def to_prometheus(self) -> str:
+        """Every metric in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for name, entry in self.snapshot().items():
+            lines.append(f"# HELP {name} {entry['help']}")
+            lines.append(f"# TYPE {name} {entry['type']}")
+            for sample in entry['samples']:
+                labels = sample['labels']
+                if entry['type'] != 'histogram':
+                    lines.append(f"{name}{format_labels(labels)} {format_value(sample['value'])}")
+                    continue
+                for bound, count in sample['buckets'].items():
+                    lines.append(f"{name}_bucket{format_labels({**labels, 'le': bound})} {count}")
+                lines.append(f"{name}_sum{format_labels(labels)} {format_value(sample['sum'])}")
+                lines.append(f"{name}_count{format_labels(labels)} {sample['count']}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        name + '="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def format_value(value: float) -> str:
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+REGISTRY = Registry()
+
+
+def enable():
+    REGISTRY.enabled = True
+
+
+def disable():
+    REGISTRY.enabled = False
+
+
+def reset():
+    REGISTRY.reset()
+
+
+def snapshot() -> Dict[str, Any]:
+    return REGISTRY.snapshot()
+
+
+def to_prometheus() -> str:
+    return REGISTRY.to_prometheus()
@@ -0,0 +1,189 @@
+"""Interning of identical pure expressions and sharing of their values."""
+from dataclasses import fields
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ringneck.analysis import Analyzer, Effects, overlaps
+from ringneck.ast import expression, statement
+from ringneck.ast.base import Node
+
+
+WRITES = (expression.Assign, expression.AugmentedAssign, expression.MultiAssign, expression.AssignIterator)
+
+
+def is_path(name: str) -> bool:
+    """Whether a variable name goes into an object, which other names may alias."""
+    return "." in name or name.startswith("$")
+
+
+def reads_path(node: Node) -> bool:
+    pending = [node]
+    while pending:
+        item = pending.pop()
+        if isinstance(item, expression.Variable) and is_path(item.name.literal):
+            return True
+        pending.extend(child for _, _, child in children(item))
+    return False
+
+
+def writes_path(write: expression.Expression) -> bool:
+    if isinstance(write, expression.Assign):
+        return is_path(write.name.literal)
+    if isinstance(write, expression.AugmentedAssign):
+        return not isinstance(write.left, expression.Variable) or is_path(write.left.name.literal)
+    if isinstance(write, expression.MultiAssign):
+        return any(not isinstance(target, expression.Variable) or is_path(target.name.literal)
+                   for target in write.identifiers.values)
+    return True
+
+
+def children(node: Node) -> Iterator[Tuple[str, Optional[int], Node]]:
+    """Child nodes with the field, and list index if any, holding them."""
+    for item in fields(node):
+        if not item.compare:
+            continue
+
+        value = getattr(node, item.name)
+        if isinstance(value, Node):
+            yield item.name, None, value
+        elif isinstance(value, list):
+            for index, element in enumerate(value):
+                if isinstance(element, Node):
+                    yield item.name, index, element
+
+
+def replace(node: Node, name: str, index: Optional[int], value: Node):
+    if index is None:
+        setattr(node, name, value)
+    else:
+        getattr(node, name)[index] = value
+
+
+class Optimizer:
+    """Interns pure expressions and shares the ones used more than once.
+
+    Literals, variables and operators over them are hash-consed: a node
+    whose children are already interned is identified by its type,
+    operator and the identity of its children, so identical subtrees end
+    up as one node. Operators referenced from more than one place are
+    wrapped in an `expression.Shared`, which the interpreter evaluates
+    once and remembers. Every assignment gets the keys of the shared
+    expressions reading what it writes, the interpreter forgets those
+    after the write; calls forget everything, as builtins can change
+    any state. As objects can be reached by more than one name, such as
+    after `s = $.stats`, a write into an object, to `$` or a dotted
+    name, also forgets every shared expression reading into one.
+    """
+
+    table: Dict[Hashable, Node]
+    keys: Dict[int, Hashable]
+    shared: Dict[Hashable, expression.Shared]
+
+    def __init__(self):
+        self.table = {}
+        self.keys = {}
+        self.shared = {}
+
+    def optimize(self, statements: List[statement.Statement]):
+        for stmt in statements:
+            self.intern(stmt)
+        self.share(statements)
+
+    def key(self, node: Node) -> Optional[Hashable]:
+        """Structural key of a node whose children are interned, None if not pure."""
+        if isinstance(node, expression.Literal):
+            try:
+                hash(node.value)
+            except TypeError:
+                return None
+            return ("literal", type(node.value), node.value)
+
+        if isinstance(node, expression.Variable):
+            return ("variable", node.name.literal)
+
+        if isinstance(node, expression.Unary):
+            operands = [node.right]
+        elif isinstance(node, expression.Binary):
+            operands = [node.left, node.right]
+        elif isinstance(node, expression.Grouping):
+            operands = [node.expression]
+        else:
+            return None
+
+        if not all(id(operand) in self.keys for operand in operands):
+            return None
+        operator = getattr(node, "operator", None)
+        return (type(node).__name__, operator.lexeme if operator else None, *map(id, operands))
+
+    def intern(self, root: Node):
+        # Children before parents, with a stack as operator chains can be long.
+        pending: List[Tuple[Node, bool]] = [(root, False)]
+        while pending:
+            node, visited = pending.pop()
+            if not visited:
+                pending.append((node, True))
+                pending.extend(reversed([(child, False) for _, _, child in children(node)]))
+                continue
+
+            for name, index, child in list(children(node)):
+                key = self.keys.get(id(child)) or self.key(child)
+                if key is not None:
+                    canonical = self.table.setdefault(key, child)
+                    self.keys[id(canonical)] = key
+                    replace(node, name, index, canonical)
+
+    def share(self, statements: List[statement.Statement]):
+        references: Dict[int, int] = {}
+        seen: Set[int] = set()
+        pending: List[Node] = list(statements)
+        while pending:
+            node = pending.pop()
+            for _, _, child in children(node):
+                references[id(child)] = references.get(id(child), 0) + 1
+                if id(child) not in seen:
+                    seen.add(id(child))
+                    pending.append(child)
+
+        inputs: Dict[Hashable, Effects] = {}
+        object_reads: Set[Hashable] = set()
+        for key, node in self.table.items():
+            if isinstance(node, (expression.Binary, expression.Unary)) and references.get(id(node), 0) > 1:
+                self.shared[key] = expression.Shared(node, key)
+                inputs[key] = self.effects(node)
+                if reads_path(node):
+                    object_reads.add(key)
+
+        writes: List[expression.Expression] = []
+        seen = set()
+        pending = list(statements)
+        while pending:
+            node = pending.pop()
+            if isinstance(node, WRITES):
+                writes.append(node)
+            for name, index, child in list(children(node)):
+                key = self.keys.get(id(child))
+                if key in self.shared:
+                    replace(node, name, index, self.shared[key])
+                if id(child) not in seen:
+                    seen.add(id(child))
+                    pending.append(child)
+
+        for write in writes:
+            written = self.effects(write)
+            into_object = writes_path(write)
+            write.invalidates = tuple(
+                key for key, read in inputs.items()
+                if written.writes & read.reads or overlaps(written.global_writes, read.global_reads)
+                or into_object and key in object_reads
+            )
+
+    def effects(self, node: Node) -> Effects:
+        analyzer: Analyzer[Any] = Analyzer()
+        analyzer.effects = Effects()
+        node.accept(analyzer)
+        return analyzer.effects
+
+
+def optimize(statements: Iterable[statement.Statement]) -> Optimizer:
+    optimizer = Optimizer()
+    optimizer.optimize(list(statements))
+    return optimizer
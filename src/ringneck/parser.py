@@ -1,31 +1,70 @@
 """Ringneck parser."""
-from typing import List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from ringneck.ast import expression, statement
 from ringneck.error_handler import ErrorHandler
 
 from ringneck.tokens import Token, TokenType
 
 
+EQUALITY = 1
+LOGICAL = 2
+COMPARISON = 3
+TERM = 4
+FACTOR = 5
+
+# Entries of the operator stack of `Parser.binary` that are not binary operators.
+PREFIX = 100
+GROUP = -1
+
+# How tightly each binary operator binds, all of them associate left.
+BINDING_POWER: Dict[TokenType, int] = {
+    TokenType.BANG_EQUAL: EQUALITY,
+    TokenType.EQUAL_EQUAL: EQUALITY,
+    TokenType.AND: LOGICAL,
+    TokenType.OR: LOGICAL,
+    TokenType.GREATER: COMPARISON,
+    TokenType.GREATER_EQUAL: COMPARISON,
+    TokenType.LESS: COMPARISON,
+    TokenType.LESS_EQUAL: COMPARISON,
+    TokenType.PLUS: TERM,
+    TokenType.MINUS: TERM,
+    TokenType.SLASH: FACTOR,
+    TokenType.STAR: FACTOR,
+}
+
+
 class Parser:
+    """Parses tokens into statements.
+
+    Parsing stops at the first error, unless recover is set: then the
+    parser reports the error, skips to the next statement, see
+    `synchronize`, and goes on, so one pass finds every error. The
+    statements with errors are left out.
+    """
+
     tokens: List[Token]
     current: int = 0
+    recover: bool
+    # Errors found, in order, also reported to the `ErrorHandler`.
+    errors: List['ParserError']
+    # If statements being parsed.
+    depth: int = 0
 
-    def __init__(self, tokens: List[Token]):
+    def __init__(self, tokens: List[Token], recover: bool = False):
         self.tokens = tokens
+        self.recover = recover
+        self.errors = []
 
     def match(self, *args: TokenType) -> bool:
-        for tokentype in args:
-            if self.check(tokentype):
-                self.advance()
-                return True
+        tokentype = self.tokens[self.current].tokentype
+        if tokentype in args and tokentype != TokenType.EOF:
+            self.current += 1
+            return True
 
         return False
 
     def check(self, tokentype: TokenType):
-        if self.is_at_end():
-            return False
-
-        return self.peek().tokentype == tokentype
+        return tokentype != TokenType.EOF and self.tokens[self.current].tokentype == tokentype
 
     def advance(self):
         if not self.is_at_end():
@@ -43,13 +82,26 @@ class Parser:
         return self.tokens[self.current - 1]
 
     def parse(self):
-        statements: List[statement.Statement] = []
+        return list(self.statements())
+
+    def statements(self) -> Iterator[statement.Statement]:
+        """Parse one statement at a time."""
         while not self.is_at_end():
-            statements.append(self.statement())
+            stmt = self.declaration()
+            if stmt is not None:
+                yield stmt
             while self.match(TokenType.EOL):
                 pass
 
-        return statements
+    def declaration(self) -> Optional[statement.Statement]:
+        """A statement, or None if it has an error and the parser recovers."""
+        if not self.recover:
+            return self.statement()
+        try:
+            return self.statement()
+        except ParserError:
+            self.synchronize()
+            return None
 
     def statement(self):
         if self.match(TokenType.IF):
@@ -70,14 +122,30 @@ class Parser:
         return statement.Repeat(times, stmt)
 
     def if_statement(self):
-        condition = self.parse_expression()
-        self.consume(TokenType.COLON, "Expected colon after if statement")
-        self.consume(TokenType.EOL, "Expected a newline")
+        try:
+            condition = self.parse_expression()
+            self.consume(TokenType.COLON, "Expected colon after if statement")
+            self.consume(TokenType.EOL, "Expected a newline")
+        except ParserError:
+            if not self.recover:
+                raise
+            # Parse the body anyway, so its endif does not end up at the top level.
+            condition = expression.Literal(False)
+            self.synchronize()
+
         then_branch = []
-        while not self.match(TokenType.ENDIF):
-            then_branch.append(self.statement())
-            while self.match(TokenType.EOL):
-                ...
+        self.depth += 1
+        try:
+            while not self.match(TokenType.ENDIF):
+                if self.is_at_end():
+                    raise self.error(self.peek(), "Expected 'endif' to close if statement")
+                stmt = self.declaration()
+                if stmt is not None:
+                    then_branch.append(stmt)
+                while self.match(TokenType.EOL):
+                    ...
+        finally:
+            self.depth -= 1
         stmt = statement.If(condition, then_branch)
         return stmt
 
@@ -121,7 +189,7 @@ class Parser:
         return expr
 
     def equality(self):
-        expr = self.logical()
+        expr = self.binary(LOGICAL)
 
         if self.peek().tokentype == TokenType.IF:
             self.consume(TokenType.IF, "Expected conditional")
@@ -135,63 +203,84 @@ class Parser:
 
             return expression.Conditional(expr, condition, other)
 
-        while self.match(TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL):
-            operator = self.previous()
-            right = self.logical()
-            expr = expression.Binary(expr, operator, right)
-
-        return expr
-
-    def logical(self):
-        expr = self.comparison()
-
-        while (self.match(TokenType.AND, TokenType.OR)):
-            operator = self.previous()
-            right = self.comparison()
-            expr = expression.Binary(expr, operator, right)
-
-        return expr
-
-    def comparison(self):
-        expr = self.term()
-
-        while (self.match(TokenType.GREATER, TokenType.GREATER_EQUAL,
-                          TokenType.LESS, TokenType.LESS_EQUAL)):
-            operator = self.previous()
-            right = self.term()
-            expr = expression.Binary(expr, operator, right)
-
-        return expr
-
-    def term(self):
-        expr = self.factor()
-        while self.match(TokenType.PLUS, TokenType.MINUS):
-            operator = self.previous()
-            right = self.factor()
-            expr = expression.Binary(expr, operator, right)
-
-        return expr
-
-    def factor(self):
-        expr = self.unary()
-
-        while self.match(TokenType.SLASH, TokenType.STAR):
-            operator = self.previous()
-            right = self.unary()
-            expr = expression.Binary(expr, operator, right)
-
-        return expr
+        return self.binary(EQUALITY, expr)
+
+    def binary(self, binding_power: int, left: Optional[expression.Expression] = None) -> expression.Expression:
+        """Parse binary operators binding at least as tight as binding_power.
+
+        Operators, prefix operators and parentheses are kept on a stack
+        instead of recursing, so machine written formulas can nest deeper
+        than the recursion limit. A parenthesis holding anything else, such
+        as a tuple or a conditional, or one that is called, is parsed again
+        from its start by `call`, recursively.
+        """
+        operands: List[expression.Expression] = []
+        # Binary operators as (power, token), prefix operators as (PREFIX, token),
+        # open parentheses as (GROUP, (token index, operand count)).
+        pending: List[Tuple[int, Any]] = []
+        groups = 0
+        expect_operand = left is None
+        if left is not None:
+            operands.append(left)
 
-    def unary(self) -> expression.Expression:
-        if self.match(TokenType.MINUS):
-            operator = self.previous()
-            right = self.unary()
-            return expression.Unary(operator, right)
-        if self.match(TokenType.STAR):
-            operator = self.previous()
-            right = self.unary()
-            return expression.Starred(operator, right)
-        return self.call()
+        while True:
+            if expect_operand:
+                token = self.tokens[self.current]
+                if token.tokentype in (TokenType.MINUS, TokenType.STAR):
+                    self.current += 1
+                    pending.append((PREFIX, token))
+                    continue
+                if token.tokentype == TokenType.LEFT_PAREN:
+                    pending.append((GROUP, (self.current, len(operands))))
+                    groups += 1
+                    self.current += 1
+                    continue
+                operands.append(self.call())
+                expect_operand = False
+                self.reduce_prefixes(operands, pending)
+                continue
+
+            operator = self.tokens[self.current]
+            operator_power = BINDING_POWER.get(operator.tokentype)
+            if operator_power is not None and operator_power >= (EQUALITY if groups else binding_power):
+                while pending and pending[-1][0] != GROUP and pending[-1][0] >= operator_power:
+                    self.reduce_binary(operands, pending)
+                pending.append((operator_power, operator))
+                self.current += 1
+                expect_operand = True
+                continue
+
+            while pending and pending[-1][0] != GROUP:
+                self.reduce_binary(operands, pending)
+            if not groups:
+                return operands[-1]
+
+            _, (index, count) = pending.pop()
+            groups -= 1
+            if operator.tokentype == TokenType.RIGHT_PAREN and \
+                    self.tokens[self.current + 1].tokentype != TokenType.LEFT_PAREN:
+                self.current += 1
+                operands[-1] = expression.Grouping(operands[-1])
+            else:
+                self.current = index
+                del operands[count:]
+                operands.append(self.call())
+            self.reduce_prefixes(operands, pending)
+
+    @staticmethod
+    def reduce_binary(operands: List[expression.Expression], pending: List[Tuple[int, Any]]):
+        _, operator = pending.pop()
+        right = operands.pop()
+        operands[-1] = expression.Binary(operands[-1], operator, right)
+
+    @staticmethod
+    def reduce_prefixes(operands: List[expression.Expression], pending: List[Tuple[int, Any]]):
+        while pending and pending[-1][0] == PREFIX:
+            _, operator = pending.pop()
+            if operator.tokentype == TokenType.MINUS:
+                operands[-1] = expression.Unary(operator, operands[-1])
+            else:
+                operands[-1] = expression.Starred(operator, operands[-1])
 
     def call(self):
         expr = self.primary()
@@ -217,15 +306,6 @@ class Parser:
         return expression.Call(callee, paren, expression.ExpressionList(arguments))
 
     def primary(self):
-        if self.match(TokenType.FALSE):
-            return expression.Literal(False)
-
-        if self.match(TokenType.TRUE):
-            return expression.Literal(True)
-
-        if self.match(TokenType.NOT):
-            return expression.Literal('not')
-
         if self.match(TokenType.IDENTIFIER):
             if self.peek().tokentype == TokenType.LEFT_BRACKET:
                 prefix = self.previous()
@@ -237,6 +317,15 @@ class Parser:
         if self.match(TokenType.NUMBER, TokenType.STRING):
             return expression.Literal(self.previous().literal)
 
+        if self.match(TokenType.FALSE):
+            return expression.Literal(False)
+
+        if self.match(TokenType.TRUE):
+            return expression.Literal(True)
+
+        if self.match(TokenType.NOT):
+            return expression.Literal('not')
+
         if self.match(TokenType.LEFT_PAREN):
             expr = self.expression_list()
             self.consume(TokenType.RIGHT_PAREN, "Expect ')' after expression")
@@ -294,20 +383,25 @@ class Parser:
 
     def error(self, token: Token, message: str):
         ErrorHandler.error(token, message)
-        return ParserError(token, message)
+        error = ParserError(token, message)
+        self.errors.append(error)
+        return error
 
     def synchronize(self):
-        # TODO: This is where we should try to
-        # find the start of a new statement.
-        self.advance()
+        """Skip the rest of a statement with an error.
 
+        Stops after the end of the line, or before an `endif` closing an
+        if statement being parsed. A stray `endif` is skipped as well.
+        """
         while not self.is_at_end():
-            if self.previous().tokentype == TokenType.EOL:
+            tokentype = self.peek().tokentype
+            if tokentype == TokenType.EOL:
+                self.advance()
                 return
-
-            if self.peek().tokentype in []:
+            if tokentype == TokenType.ENDIF:
+                if self.depth == 0:
+                    self.advance()
                 return
-
             self.advance()
 
 
@@ -0,0 +1,357 @@
+"""Programs that are parsed once and run many times."""
+from itertools import count
+from dataclasses import fields
+from time import perf_counter
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from weakref import WeakSet
+
+from ringneck.analysis import Effects, analyze, backward_slice
+from ringneck.ast import statement
+from ringneck.ast.base import Node
+from ringneck.compiler import compile_statements
+from ringneck.error_handler import Error, ErrorHandler
+from ringneck.interpreter import Interpreter, InterpreterPool, OutputMode
+from ringneck.metrics import REGISTRY, SIZES, Sample
+from ringneck.optimizer import Optimizer, children, optimize as optimize_statements
+from ringneck.parser import Parser, ParserError
+from ringneck.resolver import Resolver, Scope, resolve
+from ringneck.runcache import RunCache
+from ringneck.scanner import Scanner
+from ringneck.stores import LazyGlobals, read_keys
+from ringneck.tokens import Token, TokenType
+
+
+Span = Tuple[int, int]
+
+VERSIONS = count()
+
+
+def parse(tokens: Sequence[Token]) -> Tuple[List[statement.Statement], List[Span]]:
+    """Parse top level statements along with the lines each one covers."""
+    statements: List[statement.Statement] = []
+    spans: List[Span] = []
+
+    parser = Parser(tokens)
+    start = 0
+    for stmt in parser.statements():
+        while tokens[start].tokentype == TokenType.EOL:
+            start += 1
+        statements.append(stmt)
+        spans.append((tokens[start].line, tokens[parser.current - 1].line))
+        start = parser.current
+
+    return statements, spans
+
+
+def shift_lines(node: Node, delta: int):
+    """Move every token in a statement delta lines down."""
+    seen = set()
+    pending: List[Any] = [node]
+    while pending:
+        item = pending.pop()
+        if isinstance(item, list):
+            pending.extend(item)
+        elif isinstance(item, Token):
+            if id(item) not in seen:
+                seen.add(id(item))
+                item.line += delta
+        elif isinstance(item, Node):
+            pending.extend(getattr(item, field.name) for field in fields(item) if field.compare)
+
+
+def first_index(count: int, found: Callable[[int], bool]) -> int:
+    """The first of count indexes found is true for, count if none, assuming it stays true after."""
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        if found(middle):
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+class Program:
+    """A scanned, parsed and resolved script.
+
+    Tokens scanned ahead of time, such as those of a `Bundle`, may be
+    passed along with the source, which is then not scanned again. The
+    source may then be a function returning it, only called once the
+    source or its lines are read, such as by `update`.
+    """
+
+    scope: Scope
+    errors: List[Error]
+    fused: bool
+    optimizer: Optional[Optimizer]
+    slices: Dict[Tuple[FrozenSet[str], FrozenSet[str]], List[statement.Statement]]
+    # Changes on every update, unique among all programs.
+    version: int
+    slice_hits: int = 0
+    slice_misses: int = 0
+
+    def __init__(self, source: Union[str, Callable[[], str]], optimize: bool = False, fused: bool = True,
+                 tokens: Optional[Sequence[Token]] = None):
+        self.version = next(VERSIONS)
+        self.fused = fused
+        self._effects: Optional[List[Effects]] = None
+        self._global_keys: Optional[FrozenSet[str]] = None
+        self.slices = {}
+        if tokens is None and callable(source):
+            source = source()
+        self._read = source if callable(source) else None
+        self._lines = None if callable(source) else source.split("\n")
+        with ErrorHandler.lock:
+            ErrorHandler.reset()
+            started = perf_counter()
+            if tokens is None:
+                tokens = Scanner(source).scan_tokens()
+            scanned = perf_counter()
+            try:
+                self._statements, self._spans = parse(tokens)
+            except ParserError:
+                if REGISTRY.enabled:
+                    REGISTRY.increment('ringneck_errors_total', kind='syntax')
+                raise
+            parsed = perf_counter()
+            self.errors = list(ErrorHandler.errors)
+        # Lines each statement moved by since its tokens were last shifted.
+        self._offsets = [0] * len(self._statements)
+        self._moved = False
+        self.scope = resolve(self.statements)
+        self.optimizer = optimize_statements(self.statements) if optimize else None
+        if fused:
+            compile_statements(self.statements)
+
+        if REGISTRY.enabled:
+            REGISTRY.observe('ringneck_scan_seconds', scanned - started)
+            REGISTRY.observe('ringneck_parse_seconds', parsed - scanned)
+            REGISTRY.observe('ringneck_program_tokens', len(tokens), SIZES)
+            REGISTRY.observe('ringneck_program_nodes', sum(1 for _ in self.nodes()), SIZES)
+            if self.errors:
+                REGISTRY.increment('ringneck_errors_total', len(self.errors), kind='syntax')
+            TRACKED.add(self)
+
+    @property
+    def statements(self) -> List[statement.Statement]:
+        if self._moved:
+            self._settle()
+        return self._statements
+
+    @property
+    def spans(self) -> List[Span]:
+        """First and last line of every statement."""
+        if self._moved:
+            self._settle()
+        return self._spans
+
+    def _settle(self):
+        """Shift the tokens of statements moved by updates, see `update`."""
+        for index, offset in enumerate(self._offsets):
+            if offset:
+                shift_lines(self._statements[index], offset)
+                first, last = self._spans[index]
+                self._spans[index] = (first + offset, last + offset)
+                self._offsets[index] = 0
+        self._moved = False
+
+    @property
+    def lines(self) -> List[str]:
+        if self._lines is None:
+            self._lines = self._read().split("\n")
+        return self._lines
+
+    @property
+    def source(self) -> str:
+        if self._lines is None:
+            return self._read()
+        return "\n".join(self._lines)
+
+    def update(self, edit_range: Tuple[int, int], new_text: str):
+        """Replace lines start to end, inclusive and counted from 1, with new_text.
+
+        Only the statements on the edited lines are scanned and parsed
+        again. Other statements are kept as they are, the ones below the
+        edit are only marked as moved, their tokens are shifted the next
+        time the statements are read. An empty range, where end is start - 1,
+        inserts new_text before line start, an empty new_text removes the
+        lines. If the edited statements do not parse on their own, for
+        instance when a bracket now spans further lines, the whole program
+        is parsed again. So is an optimized program, as its statements
+        share nodes. If that fails too, the program is left unchanged.
+        """
+        start, end = edit_range
+        new_lines = new_text.split("\n") if new_text else []
+        delta = len(new_lines) - (end - start + 1)
+        spans, offsets = self._spans, self._offsets
+
+        def first_line(index: int) -> int:
+            return spans[index][0] + offsets[index]
+
+        def last_line(index: int) -> int:
+            return spans[index][1] + offsets[index]
+
+        # Statements touching the edit, widened to whole lines.
+        first = first_index(len(spans), lambda index: last_line(index) >= start)
+        last = first_index(len(spans), lambda index: first_line(index) > end) - 1
+        low, high = start, end
+        if first <= last:
+            low, high = min(low, first_line(first)), max(high, last_line(last))
+        while first > 0 and last_line(first - 1) >= low:
+            first -= 1
+            low = min(low, first_line(first))
+        while last + 1 < len(spans) and first_line(last + 1) <= high:
+            last += 1
+            high = max(high, last_line(last))
+
+        region = self.lines[low - 1:start - 1] + new_lines + self.lines[end:high]
+        removed = self.lines[start - 1:end]
+        self.lines[start - 1:end] = new_lines
+
+        with ErrorHandler.lock:
+            ErrorHandler.reset()
+            try:
+                statements, new_spans = parse(Scanner("\n".join(region), line=low).scan_tokens())
+                complete = not ErrorHandler.errors
+            except ParserError:
+                complete = False
+
+        if not complete or self.optimizer is not None:
+            try:
+                self.__init__(self.source, optimize=self.optimizer is not None, fused=self.fused)
+            except ParserError:
+                self.lines[start - 1:start - 1 + len(new_lines)] = removed
+                raise
+            return
+
+        if delta:
+            for index in range(last + 1, len(offsets)):
+                offsets[index] += delta
+            self._moved = True
+        self._statements[first:last + 1] = statements
+        spans[first:last + 1] = new_spans
+        offsets[first:last + 1] = [0] * len(statements)
+        self.errors = [
+            Error(error.line + delta, error.column, error.msg) if error.line > high else error
+            for error in self.errors if not low <= error.line <= high
+        ]
+        Resolver(self.scope).resolve(statements)
+        if self.fused:
+            compile_statements(statements)
+        if self._effects is not None:
+            self._effects[first:last + 1] = analyze(statements)
+        self._global_keys = None
+        self.slices.clear()
+        self.version = next(VERSIONS)
+
+    @property
+    def effects(self) -> List[Effects]:
+        """What each statement reads, writes and calls."""
+        if self._effects is None:
+            self._effects = analyze(self.statements)
+        return self._effects
+
+    def global_keys(self) -> FrozenSet[str]:
+        """Top level keys of `$` the program reads, empty when it may read any."""
+        if self._global_keys is None:
+            keys = read_keys(path for effects in self.effects for path in effects.global_reads)
+            self._global_keys = frozenset(keys or ())
+        return self._global_keys
+
+    def slice(self, outputs: Iterable[str], pure: Iterable[str] = ()) -> List[statement.Statement]:
+        """The statements needed to compute outputs, see `backward_slice`."""
+        key = (frozenset(outputs), frozenset(pure))
+        if key in self.slices:
+            self.slice_hits += 1
+        else:
+            self.slice_misses += 1
+            self.slices[key] = backward_slice(self.statements, self.effects, *key)
+        return self.slices[key]
+
+    def nodes(self) -> Iterator[Node]:
+        """Every node of the program once, shared nodes included."""
+        seen = set()
+        pending: List[Node] = list(self.statements)
+        while pending:
+            node = pending.pop()
+            yield node
+            for _, _, child in children(node):
+                if id(child) not in seen:
+                    seen.add(id(child))
+                    pending.append(child)
+
+    def specializations(self) -> Dict[str, int]:
+        """Hits, misses and deopts of the binary operators, summed."""
+        counters = {'sites': 0, 'specialized': 0, 'hits': 0, 'misses': 0, 'deopts': 0}
+        for node in self.nodes():
+            site = getattr(node, 'site', None)
+            if site is not None:
+                counters['sites'] += 1
+                counters['specialized'] += site.left is not None
+                counters['hits'] += site.hits
+                counters['misses'] += site.misses
+                counters['deopts'] += site.deopts
+        return counters
+
+    def caches(self) -> Dict[str, Tuple[int, int]]:
+        """Hits and misses of the path accessors, binary operators and slices."""
+        path = [0, 0]
+        binary = [0, 0]
+        for node in self.nodes():
+            for cache, counters in (('accessor', path), ('site', binary)):
+                value = getattr(node, cache, None)
+                if value is not None:
+                    counters[0] += value.hits
+                    counters[1] += value.misses
+        return {
+            'path': (path[0], path[1]),
+            'binary': (binary[0], binary[1]),
+            'slice': (self.slice_hits, self.slice_misses),
+        }
+
+    def run(self, global_variables: Any = None, builtins: Optional[Any] = None,
+            outputs: Optional[Iterable[str]] = None, pure: Iterable[str] = (),
+            cache: Optional[RunCache] = None, **options: Any):
+        """Run with a new interpreter, options are passed on to `Interpreter`.
+
+        With outputs, such as `['$.name']`, only the statements those
+        outputs depend on are run. Builtins are assumed to have side effects
+        unless their names are listed in pure. The keys read from lazy
+        globals are fetched in one batch first. With a cache, a run with the
+        same inputs as an earlier one is replayed, see `RunCache`.
+        """
+        if cache is not None:
+            return cache.run(self, global_variables, builtins, outputs, pure, **options)
+
+        statements = self.statements if outputs is None else self.slice(outputs, pure)
+        if isinstance(global_variables, LazyGlobals):
+            global_variables.store.prefetch(self.global_keys())
+        if options and (options.get('output') == OutputMode.STREAM or not POOLED.issuperset(options)):
+            # A stream keeps its interpreter busy after run returns.
+            interpreter = Interpreter(global_variables=global_variables, builtins=builtins, **options)
+            return interpreter.interpret(statements, self.scope)
+
+        interpreter = POOL.acquire(self.scope, global_variables, builtins, **options)
+        try:
+            return interpreter.interpret(statements, self.scope)
+        finally:
+            POOL.release(interpreter)
+
+
+# Interpreters reused by `Program.run`, and the options it can reset them with.
+POOL = InterpreterPool()
+POOLED = frozenset(['transactional', 'commit', 'output', 'strategy'])
+
+
+# Programs compiled while metrics were enabled, reporting their caches.
+TRACKED: 'WeakSet[Program]' = WeakSet()
+
+
+def collect_caches() -> Iterator[Sample]:
+    for program in list(TRACKED):
+        for cache, (hits, misses) in program.caches().items():
+            yield 'ringneck_cache_hits', {'cache': cache}, hits
+            yield 'ringneck_cache_misses', {'cache': cache}, misses
+
+
+REGISTRY.register(collect_caches)
@@ -0,0 +1,170 @@
+"""Static resolution of local variable names to slots."""
+from typing import Any, Dict, Iterable, List, Optional
+
+from ringneck.ast import expression, statement
+from ringneck.ast.base import Visitor, VisitorType
+
+
+def root_name(address: str) -> Optional[str]:
+    """Local name an address starts from, None for globals."""
+    name = address.split(".", 1)[0]
+    if name == "$":
+        return None
+    return name
+
+
+class Scope:
+    """Slot index of every plain local name in a program."""
+
+    names: Dict[str, int]
+
+    def __init__(self):
+        self.names = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def slot(self, name: str) -> int:
+        index = self.names.get(name)
+        if index is None:
+            index = self.names[name] = len(self.names)
+        return index
+
+
+class Resolver(Visitor[VisitorType]):
+    """Assigns slots to the local names used by statements.
+
+    Variables get the slot of the local their address starts from,
+    assignments to a plain name get the slot of that name. Resolving more
+    statements against the same scope keeps earlier slots.
+
+    The slots are stored on the nodes, so a statement is only resolved
+    once, and must then run with the scope it was resolved in.
+    """
+
+    scope: Scope
+
+    def __init__(self, scope: Optional[Scope] = None):
+        super().__init__()
+        self.scope = scope if scope is not None else Scope()
+
+    def resolve(self, statements: Iterable[statement.Statement]) -> Scope:
+        for stmt in statements:
+            self.resolve_statement(stmt)
+        return self.scope
+
+    def resolve_statement(self, stmt: statement.Statement):
+        """Resolve a top level statement, unless it was resolved before, in this scope or another."""
+        if stmt.scope is None:
+            stmt.accept(self)
+            stmt.scope = self.scope
+
+    def slot(self, address: str) -> Optional[int]:
+        name = root_name(address)
+        if name is None:
+            return None
+        return self.scope.slot(name)
+
+    def visit_all(self, values: Any):
+        if isinstance(values, expression.Expression):
+            values.accept(self)
+            return
+
+        for value in values:
+            value.accept(self)
+
+    def visit_Expression_Statement(self, stmt: statement.Expression):
+        stmt.expr.accept(self)
+
+    def visit_If_Statement(self, stmt: statement.If):
+        stmt.condition.accept(self)
+        self.visit_all(stmt.thenbranch)
+
+    def visit_Repeat_Statement(self, stmt: statement.Repeat):
+        stmt.count.accept(self)
+        stmt.stmt.accept(self)
+
+    def visit_Literal_Expression(self, expr: expression.Literal):
+        ...
+
+    def visit_IteratorValue_Expression(self, expr: expression.IteratorValue):
+        ...
+
+    def visit_Variable_Expression(self, expr: expression.Variable):
+        expr.slot = self.slot(expr.name.literal)
+
+    def visit_VariableIterator_Expression(self, expr: expression.VariableIterator):
+        self.slot(expr.prefix.literal)
+        expr.iterator.accept(self)
+
+    def visit_Assign_Expression(self, expr: expression.Assign):
+        slot = self.slot(expr.name.literal)
+        expr.slot = slot if "." not in expr.name.literal else None
+        expr.value.accept(self)
+
+    def visit_AugmentedAssign_Expression(self, expr: expression.AugmentedAssign):
+        expr.left.accept(self)
+        expr.right.accept(self)
+
+    def visit_MultiAssign_Expression(self, expr: expression.MultiAssign):
+        expr.identifiers.accept(self)
+        expr.values.accept(self)
+
+    def visit_AssignIterator_Expression(self, expr: expression.AssignIterator):
+        expr.iterator.accept(self)
+        expr.value.accept(self)
+
+    def visit_Grouping_Expression(self, expr: expression.Grouping):
+        self.visit_Binary_Expression(expr)
+
+    def visit_Binary_Expression(self, expr: expression.Binary | expression.Grouping):
+        # Walked with a stack, long chains of operators are too deep to recurse.
+        pending: List[expression.Expression] = [expr]
+        while pending:
+            node = pending.pop()
+            if isinstance(node, expression.Binary):
+                pending.extend([node.right, node.left])
+            elif isinstance(node, expression.Grouping):
+                pending.append(node.expression)
+            else:
+                node.accept(self)
+
+    def visit_Unary_Expression(self, expr: expression.Unary):
+        expr.right.accept(self)
+
+    def visit_Starred_Expression(self, expr: expression.Starred):
+        expr.value.accept(self)
+
+    def visit_ExpressionList_Expression(self, expr: expression.ExpressionList):
+        self.visit_all(expr.expressions)
+
+    def visit_Tuple_Expression(self, expr: expression.Tuple):
+        self.visit_all(expr.values)
+
+    def visit_List_Expression(self, expr: expression.List):
+        self.visit_all(expr.values)
+
+    def visit_KeyDatum_Expression(self, expr: expression.KeyDatum):
+        expr.key.accept(self)
+        expr.datum.accept(self)
+
+    def visit_Dict_Expression(self, expr: expression.Dict):
+        self.visit_all(expr.values)
+
+    def visit_Shared_Expression(self, expr: expression.Shared):
+        expr.expression.accept(self)
+
+    def visit_Call_Expression(self, expr: expression.Call):
+        expr.callee.accept(self)
+        if expr.arguments is not None:
+            expr.arguments.accept(self)
+
+    def visit_Conditional_Expression(self, expr: expression.Conditional):
+        expr.left.accept(self)
+        expr.condition.accept(self)
+        if expr.right is not None:
+            expr.right.accept(self)
+
+
+def resolve(statements: List[statement.Statement], scope: Optional[Scope] = None) -> Scope:
+    return Resolver(scope).resolve(statements)
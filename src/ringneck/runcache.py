@@ -0,0 +1,259 @@
+"""Whole run results cached for deterministic scripts.
+
+A script that calls only pure builtins computes the same `$` writes and
+the same results every time it is run with the same inputs. Its inputs
+are the `$` paths it reads, as found by the analysis, the values of
+builtins it reads without calling, and which functions it calls under
+the pure names. `RunCache.run` hashes those; when
+the hash was seen before, it applies the recorded writes and returns the
+recorded results without running anything.
+
+Only values made of dicts, lists, tuples, strings, numbers, booleans and
+None can be hashed. Runs with other inputs, or of scripts that call a
+builtin or method not declared pure, are run as usual and counted as
+bypasses. Cached runs are transactional: a run that fails writes nothing.
+"""
+import hashlib
+import pickle
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, AbstractSet, Dict, FrozenSet, Hashable, Iterable, List, Mapping, Optional, Set, Tuple
+from weakref import WeakKeyDictionary
+
+from ringneck.accessor import walk
+from ringneck.ast import expression, statement
+from ringneck.interpreter import OutputMode
+from ringneck.transaction import Changeset
+
+
+Path = Tuple[str, ...]
+
+
+class Uncacheable(Exception):
+    """An input that has no canonical hash."""
+
+
+def canonical(value: Any, out: List[bytes]):
+    """Append an encoding of value that equal values share, whatever their dict order."""
+    kind = type(value)
+    if value is None or kind is bool:
+        out.append(repr(value).encode())
+    elif kind is int or kind is float:
+        out.append(b"n" + repr(value).encode() + b";")
+    elif kind is str:
+        data = value.encode()
+        out.append(b"s%d:" % len(data) + data)
+    elif kind is bytes:
+        out.append(b"b%d:" % len(value) + value)
+    elif isinstance(value, Mapping):
+        items = []
+        for key, item in value.items():
+            encoded: List[bytes] = []
+            canonical(key, encoded)
+            canonical(item, encoded)
+            items.append(b"".join(encoded))
+        out.append(b"{%d:" % len(items) + b"".join(sorted(items)) + b"}")
+    elif kind is list or kind is tuple:
+        out.append(b"[%d:" % len(value))
+        for item in value:
+            canonical(item, out)
+        out.append(b"]")
+    else:
+        raise Uncacheable(f"Cannot hash a {kind.__name__}")
+
+
+@dataclass
+class Plan:
+    """What a program's cache key is made of."""
+
+    fingerprint: bytes
+    # `$` paths read, None when any of `$` may be read.
+    paths: Optional[List[Path]]
+    # Names read before they are assigned, so may come from the builtins.
+    names: List[str]
+    # Pure names called, the functions behind them are part of the key.
+    calls: List[str]
+
+
+def calls_only_pure(program: Any, pure: AbstractSet[str]) -> bool:
+    """Whether every builtin and method the program calls is in pure."""
+    for node in program.nodes():
+        if isinstance(node, expression.Call):
+            callee = node.callee
+            if not isinstance(callee, expression.Variable) or callee.name.literal not in pure:
+                return False
+    return True
+
+
+def plan(program: Any, pure: AbstractSet[str]) -> Optional[Plan]:
+    """The plan of a program, None if it cannot be cached."""
+    if not calls_only_pure(program, pure):
+        return None
+
+    paths: Optional[List[Path]] = []
+    # Names read before the script assigns them, in statement order. Only
+    # plain statements always run, so only their assignments count.
+    inputs: Set[str] = set()
+    assigned: Set[str] = set()
+    calls: Set[str] = set()
+    for stmt, effects in zip(program.statements, program.effects):
+        inputs |= effects.reads - assigned
+        calls |= effects.calls
+        if isinstance(stmt, statement.Expression):
+            assigned |= effects.writes
+        for path in effects.global_reads:
+            if paths is not None:
+                paths = None if not path else paths + [path]
+
+    fingerprint = hashlib.blake2b(program.source.encode(), digest_size=16).digest()
+    return Plan(fingerprint, None if paths is None else sorted(set(paths)), sorted(inputs - pure),
+                sorted(calls & pure))
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    bypasses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+
+class RunCache:
+    """Recorded `$` writes and results of runs, by program and inputs.
+
+    At most `max_entries` runs and `max_bytes` of pickled records are
+    kept, the least recently used are evicted first.
+    """
+
+    max_entries: int
+    max_bytes: int
+    stats: CacheStats
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self.entries: 'OrderedDict[bytes, bytes]' = OrderedDict()
+        self.plans: 'WeakKeyDictionary[Any, Dict[FrozenSet[str], Tuple[int, Optional[Plan]]]]' = WeakKeyDictionary()
+        # Pure functions keyed on, by id, kept alive so no other function gets their id.
+        self.functions: Dict[int, Any] = {}
+        self._lock = threading.Lock()
+
+    def plan(self, program: Any, pure: FrozenSet[str]) -> Optional[Plan]:
+        with self._lock:
+            plans = self.plans.setdefault(program, {})
+        cached = plans.get(pure)
+        if cached is None or cached[0] != program.version:
+            cached = plans[pure] = (program.version, plan(program, pure))
+        return cached[1]
+
+    def key(self, program_plan: Plan, global_variables: Any, builtins: Optional[Mapping[str, Any]],
+            settings: Tuple[Hashable, ...]) -> bytes:
+        out: List[bytes] = [program_plan.fingerprint, repr(settings).encode()]
+        if program_plan.paths is None:
+            canonical(global_variables if global_variables is not None else {}, out)
+        else:
+            for path in program_plan.paths:
+                out.append(b"|" + ".".join(path).encode() + b"=")
+                canonical(walk(global_variables, path) if global_variables is not None else None, out)
+
+        builtins = builtins or {}
+        for name in program_plan.names:
+            out.append(b"|" + name.encode() + b"=")
+            canonical(builtins.get(name), out)
+
+        for name in program_plan.calls:
+            function = builtins.get(name)
+            if function is not None:
+                self.functions.setdefault(id(function), function)
+                out.append(b"|%s()=%d" % (name.encode(), id(function)))
+
+        return hashlib.blake2b(b"".join(out), digest_size=20).digest()
+
+    def run(self, program: Any, global_variables: Any = None, builtins: Optional[Any] = None,
+            outputs: Optional[Iterable[str]] = None, pure: Iterable[str] = (), **options: Any):
+        """Run the program, or replay a recorded run with the same inputs."""
+        pure = frozenset(pure)
+        output = options.get('output', OutputMode.COLLECT)
+        program_plan = self.plan(program, pure)
+        if program_plan is None or output == OutputMode.STREAM:
+            return self.bypass(program, global_variables, builtins, outputs, pure, options)
+
+        outputs = None if outputs is None else tuple(sorted(outputs))
+        settings = (outputs, output.value, options.get('strategy'))
+        try:
+            key = self.key(program_plan, global_variables, builtins, settings)
+        except Uncacheable:
+            return self.bypass(program, global_variables, builtins, outputs, pure, options)
+
+        with self._lock:
+            record = self.entries.get(key)
+            if record is not None:
+                self.entries.move_to_end(key)
+                self.stats.hits += 1
+
+        if record is not None:
+            writes, result = pickle.loads(record)
+            changeset = Changeset()
+            changeset.writes = pickle.loads(writes)
+            changeset.apply(global_variables if global_variables is not None else {}, options.get('commit'))
+            return result
+
+        commit = options.get('commit')
+        recorded: List[Optional[bytes]] = []
+
+        def record_writes(target: Any, changeset: Changeset):
+            # Pickled before they are applied, as the host may change them later.
+            try:
+                recorded.append(pickle.dumps(changeset.writes))
+            except (pickle.PicklingError, TypeError, AttributeError):
+                recorded.append(None)
+            return changeset.apply(target, commit)
+
+        options = dict(options, transactional=True, commit=record_writes)
+        result = program.run(global_variables, builtins, outputs, pure, **options)
+
+        try:
+            if not recorded or recorded[0] is None:
+                raise TypeError("Writes cannot be pickled")
+            record = pickle.dumps((recorded[0], result))
+        except (pickle.PicklingError, TypeError, AttributeError):
+            with self._lock:
+                self.stats.bypasses += 1
+            return result
+
+        self.store(key, record)
+        return result
+
+    def bypass(self, program: Any, global_variables: Any, builtins: Any, outputs: Any, pure: Any,
+               options: Dict[str, Any]):
+        with self._lock:
+            self.stats.bypasses += 1
+        return program.run(global_variables, builtins, outputs, pure, **options)
+
+    def store(self, key: bytes, record: bytes):
+        with self._lock:
+            self.stats.misses += 1
+            if len(record) > self.max_bytes:
+                return
+
+            entries = self.entries
+            previous = entries.pop(key, None)
+            if previous is not None:
+                self.stats.bytes -= len(previous)
+            entries[key] = record
+            self.stats.bytes += len(record)
+            while len(entries) > self.max_entries or self.stats.bytes > self.max_bytes:
+                _, evicted = entries.popitem(last=False)
+                self.stats.bytes -= len(evicted)
+                self.stats.evictions += 1
+            self.stats.entries = len(entries)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.functions.clear()
+            self.stats.entries = self.stats.bytes = 0
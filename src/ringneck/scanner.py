@@ -1,4 +1,7 @@
-from typing import Any, List
+import mmap
+from os import PathLike
+from typing import Any, List, Union
+from ringneck.bytescanner import Buffer, ByteScanner
 from ringneck.tokens import Token, TokenType, keywords
 from ringneck.error_handler import ErrorHandler
 
@@ -12,8 +15,25 @@ class Scanner:
     _line: int = 1
     _column: int = 0
 
-    def __init__(self, source: str):
+    def __init__(self, source: str, line: int = 1):
         self.source = source
+        self._line = line
+
+    @classmethod
+    def from_buffer(cls, buffer: Buffer, line: int = 1) -> ByteScanner:
+        """Scanner for UTF-8 bytes, a memoryview or an mmap, without decoding it."""
+        return ByteScanner(buffer, line)
+
+    @classmethod
+    def from_file(cls, path: Union[str, PathLike[str]]) -> ByteScanner:
+        """Scanner reading a file through a read only memory map."""
+        with open(path, "rb") as file:
+            try:
+                buffer: Buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped.
+                buffer = b""
+        return ByteScanner(buffer)
 
     def scan_tokens(self) -> List[Token]:
         self.tokens = []
@@ -128,10 +148,11 @@ class Scanner:
         ErrorHandler.report(self._line, self._column, f"Unexepected character: {char}")
 
     def comment(self):
-        while self.peek() != "\n":
+        while self.peek() != "\n" and not self.is_at_end():
             self.advance()
-        self.advance_line()
-        self.advance()
+        if not self.is_at_end():
+            self.advance()
+            self.advance_line()
         return
 
     def advance_line(self):
@@ -0,0 +1,123 @@
+"""Many runs interleaved on one thread, with step quotas per tenant.
+
+Runs submitted to a `Scheduler` execute as suspendable generators, see
+`Interpreter.suspendable`. Each round the scheduler visits the tenants
+in turn and lets each run its quota of steps, shared round robin among
+its runs, at most `quantum` steps at a time. A long script then only
+delays others by a bounded number of steps, and a tenant submitting
+many runs does not starve the other tenants.
+"""
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Generator, Iterable, List, Optional
+
+from ringneck.interpreter import Interpreter
+
+
+@dataclass
+class Task:
+    """One submitted run."""
+
+    tenant: str
+    interpreter: Interpreter
+    generator: Generator[None, None, Any]
+    limit: Optional[int] = None
+    steps: int = 0
+    done: bool = False
+    result: Any = None
+    error: Optional[BaseException] = None
+    callbacks: List[Callable[['Task'], None]] = field(default_factory=list)
+
+    @property
+    def globals(self) -> Any:
+        return self.interpreter.globals
+
+    def resume(self, budget: int) -> int:
+        """Run at most budget steps, returning the steps taken."""
+        interpreter = self.interpreter
+        if self.limit is not None:
+            budget = min(budget, self.limit - self.steps)
+        interpreter.budget = budget
+        try:
+            next(self.generator)
+        except StopIteration as stop:
+            self.finish(result=stop.value)
+        except Exception as error:  # pylint: disable=broad-except
+            self.finish(error=error)
+
+        # Count at least one step, so finishing an empty run uses some of the quota.
+        taken = max(budget - max(interpreter.budget, 0), 1)
+        self.steps += taken
+        # A run pauses before a step, so one still going has more steps to take.
+        if not self.done and self.limit is not None and self.steps >= self.limit:
+            self.generator.close()
+            self.finish(error=RuntimeError(f"Step limit of {self.limit} exceeded"))
+        return taken
+
+    def finish(self, result: Any = None, error: Optional[BaseException] = None):
+        self.done = True
+        self.result = result
+        self.error = error
+        for callback in self.callbacks:
+            callback(self)
+
+
+class Scheduler:
+    """Round robin runs of many tenants.
+
+    Tenants get `quotas[tenant]` steps per round, or `default_quota`.
+    """
+
+    quantum: int
+    default_quota: int
+    quotas: Dict[str, int]
+
+    def __init__(self, quantum: int = 1000, default_quota: Optional[int] = None,
+                 quotas: Optional[Dict[str, int]] = None):
+        self.quantum = quantum
+        self.default_quota = default_quota or quantum
+        self.quotas = dict(quotas or {})
+        self.queues: 'OrderedDict[str, Deque[Task]]' = OrderedDict()
+
+    def submit(self, program: Any, tenant: str = "default", global_variables: Any = None,
+               builtins: Optional[Any] = None, outputs: Optional[Iterable[str]] = None, pure: Iterable[str] = (),
+               limit: Optional[int] = None, callback: Optional[Callable[[Task], None]] = None,
+               **options: Any) -> Task:
+        """Queue a run of a program, see `Program.run` for the arguments.
+
+        A run still going after limit steps is stopped with an error.
+        """
+        statements = program.statements if outputs is None else program.slice(outputs, pure)
+        interpreter = Interpreter(global_variables=global_variables, builtins=builtins, **options)
+        task = Task(tenant, interpreter, interpreter.suspendable(statements, program.scope, self.quantum), limit)
+        if callback is not None:
+            task.callbacks.append(callback)
+        self.queues.setdefault(tenant, deque()).append(task)
+        return task
+
+    def __len__(self):
+        return sum(len(queue) for queue in self.queues.values())
+
+    def round(self) -> int:
+        """Give every tenant its quota of steps once, returning the steps taken."""
+        total = 0
+        for tenant, queue in list(self.queues.items()):
+            allowance = self.quotas.get(tenant, self.default_quota)
+            while allowance > 0 and queue:
+                task = queue.popleft()
+                taken = task.resume(min(allowance, self.quantum))
+                allowance -= taken
+                total += taken
+                if not task.done:
+                    queue.append(task)
+            if not queue:
+                del self.queues[tenant]
+        return total
+
+    def run(self, rounds: Optional[int] = None) -> int:
+        """Run rounds until every task is done, or at most rounds of them."""
+        count = 0
+        while self.queues and (rounds is None or count < rounds):
+            self.round()
+            count += 1
+        return count
@@ -0,0 +1,79 @@
+"""Binary operators specialized for the operand types they keep seeing."""
+import operator
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+Operation = Callable[[Any, Any], Any]
+
+
+ARITHMETIC = (operator.add, operator.sub, operator.mul, operator.truediv)
+COMPARISON = (operator.lt, operator.le, operator.gt, operator.ge, operator.eq, operator.ne)
+
+# Operations that cannot raise TypeError for the given pair of exact types.
+SPECIALIZABLE: Dict[Tuple[type, type], Tuple[Operation, ...]] = {
+    (int, int): ARITHMETIC + COMPARISON,
+    (float, float): ARITHMETIC + COMPARISON,
+    (int, float): ARITHMETIC + COMPARISON,
+    (float, int): ARITHMETIC + COMPARISON,
+    (str, str): (operator.add,) + COMPARISON,
+    (str, int): (operator.mul, operator.eq, operator.ne),
+    (int, str): (operator.mul, operator.eq, operator.ne),
+}
+
+# Executions with the same operand types before specializing.
+WARMUP = 8
+# Guard failures before a specialization is dropped.
+DEOPT_AFTER = 4
+
+
+class BinarySite:
+    """One binary operator in a program, adapting to its operand types.
+
+    The first executions go through the generic operation while the
+    operand types are observed. Once the same pair of exact types has
+    been seen `WARMUP` times in a row, and the operation cannot fail for
+    them, the site is specialized: `left` and `right` hold the guarded
+    types and callers that see them may call `operation` directly,
+    counting a hit. Other types go through `generic`, counting a miss.
+    After `DEOPT_AFTER` misses the specialization is dropped and the
+    types are observed again.
+    """
+
+    operation: Operation
+    left: Optional[type] = None
+    right: Optional[type] = None
+    observed: Optional[Tuple[type, type]] = None
+    streak: int = 0
+
+    hits: int = 0
+    misses: int = 0
+    deopts: int = 0
+
+    def __init__(self, operation: Operation):
+        self.operation = operation
+
+    def __call__(self, left: Any, right: Any):
+        if type(left) is self.left and type(right) is self.right:
+            self.hits += 1
+            return self.operation(left, right)
+        return self.generic(left, right)
+
+    def generic(self, left: Any, right: Any):
+        types = (type(left), type(right))
+
+        if self.left is not None:
+            self.misses += 1
+            self.streak += 1
+            if self.streak >= DEOPT_AFTER:
+                self.deopts += 1
+                self.left = self.right = None
+                self.observed, self.streak = None, 0
+        elif types == self.observed:
+            self.streak += 1
+            if self.streak >= WARMUP and self.operation in SPECIALIZABLE.get(types, ()):
+                self.left, self.right = types
+                self.streak = 0
+        else:
+            self.observed, self.streak = types, 1
+
+        return self.operation(left, right)
@@ -0,0 +1,342 @@
+"""Lazy `$` globals read through from large external stores.
+
+A `Store` looks values up by top level key in some backend, keeping the
+most recently used ones, still encoded, in a bounded LRU cache.
+`Store.globals()` makes a `LazyGlobals` mapping to pass as a run's
+`global_variables`: keys are fetched and decoded when a script reads
+them and writes stay in the mapping, so the store is never changed and
+can be shared by any number of runs.
+
+`Program.run` prefetches the keys a script reads, as found by the
+analysis, in one batch before running it.
+
+Values are stored as JSON. Backends are `SqliteStore`, `DbmStore` and
+`JsonLinesStore`, a memory mapped file of sorted `[key, value]` lines.
+"""
+import dbm
+import json
+import mmap
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from os import PathLike
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from ringneck.accessor import KeyedMapping
+
+
+StrPath = Union[str, PathLike]
+
+
+class Missing:
+    def __repr__(self):
+        return "<missing>"
+
+
+MISSING = Missing()
+
+
+class Store(ABC):
+    """Encoded values by key in a backend, with the `cache_size` most recent kept in memory.
+
+    Keys that are not in the backend are cached as missing too.
+    """
+
+    cache_size: int
+    hits: int = 0
+    misses: int = 0
+
+    def __init__(self, cache_size: int = 1024):
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[str, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def fetch(self, key: str) -> Any:
+        """Encoded value of key in the backend, MISSING if there is none."""
+
+    def fetch_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Encoded values of several keys, leaving out missing ones."""
+        values = {}
+        for key in keys:
+            value = self.fetch(key)
+            if value is not MISSING:
+                values[key] = value
+        return values
+
+    @abstractmethod
+    def keys(self) -> Iterator[str]:
+        """Every key in the backend."""
+
+    def __len__(self):
+        return sum(1 for _ in self.keys())
+
+    def decode(self, encoded: Any) -> Any:
+        return json.loads(encoded)
+
+    def close(self):
+        """Release the backend."""
+
+    def lookup(self, key: str) -> Any:
+        """Encoded value of key, MISSING if there is none, from the cache when it has it."""
+        with self._lock:
+            value = self._cache.get(key, self)
+            if value is not self:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        value = self.fetch(key)
+        self.remember({key: value})
+        return value
+
+    def prefetch(self, keys: Iterable[str]):
+        """Fetch the keys that are not cached yet in one batch."""
+        with self._lock:
+            wanted = [key for key in keys if key not in self._cache]
+        if not wanted:
+            return
+
+        found = self.fetch_many(wanted)
+        self.remember({key: found.get(key, MISSING) for key in wanted})
+
+    def remember(self, values: Dict[str, Any]):
+        with self._lock:
+            cache = self._cache
+            cache.update(values)
+            for key in values:
+                cache.move_to_end(key)
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
+
+    def globals(self) -> 'LazyGlobals':
+        """A new mapping of this store for one run."""
+        return LazyGlobals(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info: Any):
+        self.close()
+
+
+class LazyGlobals(KeyedMapping):
+    """The keys of a store, fetched when read, with writes kept in the mapping.
+
+    Every mapping decodes its own copy of a value, so a script changing a
+    nested value does not change it for other runs. Scripts only reach
+    keys, so neither the attributes nor the methods of the mapping hide
+    keys of the same name.
+    """
+
+    def __init__(self, store: Store):
+        self._store = store
+        self._values: Dict[str, Any] = {}
+        self._written: Set[str] = set()
+
+    @property
+    def store(self) -> Store:
+        return self._store
+
+    def changes(self) -> Dict[str, Any]:
+        """Keys set by scripts, or changed below the top level, with their values."""
+        changed = {key: self._values[key] for key in self._written}
+        for key, value in self._values.items():
+            # Nested writes change the decoded value in place, so it is compared to the stored one.
+            if value is not MISSING and key not in changed and value != self._store.decode(self._store.lookup(key)):
+                changed[key] = value
+        return changed
+
+    def __getitem__(self, key: str):
+        value = self._values.get(key, MISSING)
+        if value is MISSING:
+            if key in self._values:
+                raise KeyError(key)
+
+            encoded = self._store.lookup(key)
+            # Missing keys are remembered as well, as are deleted ones.
+            value = self._values[key] = MISSING if encoded is MISSING else self._store.decode(encoded)
+            if value is MISSING:
+                raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        self._written.add(key)
+        self._values[key] = value
+
+    def __delitem__(self, key: str):
+        self[key]
+        self._values[key] = MISSING
+        self._written.discard(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._written
+        for key in self._store.keys():
+            if key not in self._written and self._values.get(key) is not MISSING:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class SqliteStore(Store):
+    """Keys and JSON values in two columns of an SQLite table, opened read only."""
+
+    def __init__(self, path: StrPath, table: str = "globals", key: str = "key", value: str = "value",
+                 cache_size: int = 1024):
+        super().__init__(cache_size)
+        self._connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._select = f'SELECT "{key}", "{value}" FROM "{table}"'
+        self._table = table
+        self._key = key
+        self._query_lock = threading.Lock()
+
+    def query(self, sql: str, parameters: Tuple[Any, ...] = ()) -> List[Tuple[Any, ...]]:
+        with self._query_lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def fetch(self, key: str) -> Any:
+        rows = self.query(f'{self._select} WHERE "{self._key}" = ?', (key,))
+        return rows[0][1] if rows else MISSING
+
+    def fetch_many(self, keys: List[str]) -> Dict[str, Any]:
+        values = {}
+        # Stay below SQLite's default limit on parameters.
+        for start in range(0, len(keys), 900):
+            batch = tuple(keys[start:start + 900])
+            marks = ", ".join("?" * len(batch))
+            for key, value in self.query(f'{self._select} WHERE "{self._key}" IN ({marks})', batch):
+                values[key] = value
+        return values
+
+    def keys(self) -> Iterator[str]:
+        # Page through the keys, so they are never all in memory.
+        last = None
+        while True:
+            if last is None:
+                rows = self.query(f'SELECT "{self._key}" FROM "{self._table}" ORDER BY 1 LIMIT 1000')
+            else:
+                rows = self.query(f'SELECT "{self._key}" FROM "{self._table}" WHERE "{self._key}" > ? '
+                                  'ORDER BY 1 LIMIT 1000', (last,))
+            for (key,) in rows:
+                yield key
+            if len(rows) < 1000:
+                return
+            last = rows[-1][0]
+
+    def __len__(self):
+        return self.query(f'SELECT COUNT(*) FROM "{self._table}"')[0][0]
+
+    def close(self):
+        self._connection.close()
+
+
+class DbmStore(Store):
+    """Keys and JSON values in a `dbm` database, opened read only."""
+
+    def __init__(self, path: StrPath, cache_size: int = 1024):
+        super().__init__(cache_size)
+        self._database = dbm.open(str(path), "r")
+        self._database_lock = threading.Lock()
+
+    def fetch(self, key: str) -> Any:
+        with self._database_lock:
+            value = self._database.get(key.encode())
+        return MISSING if value is None else value
+
+    def keys(self) -> Iterator[str]:
+        with self._database_lock:
+            keys = list(self._database.keys())
+        for key in keys:
+            yield key.decode()
+
+    def __len__(self):
+        with self._database_lock:
+            return len(self._database)
+
+    def close(self):
+        self._database.close()
+
+
+LINE_KEY = re.compile(rb'\["((?:[^"\\]|\\.)*)"')
+
+
+class JsonLinesStore(Store):
+    """A memory mapped file of `[key, value]` JSON lines, sorted by key.
+
+    Keys are found by binary search over the mapped file, so no index is
+    kept in memory. `write` makes such a file.
+    """
+
+    def __init__(self, path: StrPath, cache_size: int = 1024):
+        super().__init__(cache_size)
+        with open(path, "rb") as file:
+            try:
+                self._buffer: Any = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped.
+                self._buffer = b""
+
+    @staticmethod
+    def write(path: StrPath, items: Iterable[Tuple[str, Any]]):
+        with open(path, "w", encoding="utf-8") as file:
+            for key, value in sorted(items, key=lambda item: item[0]):
+                file.write(json.dumps([key, value], ensure_ascii=False) + "\n")
+
+    def line_at(self, position: int) -> Tuple[int, int]:
+        """Start and end of the line containing position."""
+        buffer = self._buffer
+        start = buffer.rfind(b"\n", 0, position) + 1
+        end = buffer.find(b"\n", position)
+        return start, len(buffer) if end == -1 else end
+
+    def key_at(self, start: int) -> str:
+        match = LINE_KEY.match(self._buffer, start)
+        if match is None:
+            raise ValueError(f"Not a [key, value] line at byte {start}")
+        return json.loads(b'"' + match.group(1) + b'"')
+
+    def fetch(self, key: str) -> Any:
+        low, high = 0, len(self._buffer)
+        while low < high:
+            start, end = self.line_at((low + high) // 2)
+            if start == end:
+                # A blank last line.
+                high = start
+                continue
+            found = self.key_at(start)
+            if found == key:
+                return self._buffer[start:end]
+            if found < key:
+                low = end + 1
+            else:
+                high = start
+        return MISSING
+
+    def decode(self, encoded: Any) -> Any:
+        return json.loads(encoded)[1]
+
+    def keys(self) -> Iterator[str]:
+        position, size = 0, len(self._buffer)
+        while position < size:
+            start, end = self.line_at(position)
+            if start < end:
+                yield self.key_at(start)
+            position = end + 1
+
+    def close(self):
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+
+def read_keys(global_reads: Iterable[Tuple[str, ...]]) -> Optional[Set[str]]:
+    """Top level keys of the `$` paths read, None when all of `$` may be read."""
+    keys = set()
+    for path in global_reads:
+        if not path:
+            return None
+        keys.add(path[0])
+    return keys
@@ -0,0 +1,250 @@
+"""Data tables loaded from CSV and JSON files, shared by every run.
+
+Tables are opt in: a host gives scripts a `TableLoader` for a directory,
+as the `table` builtin of a run or, with `install`, as an intrinsic of
+every run. Scripts then load a table with `names = table("names.csv")`
+or `items = table("items.json", "id")`, and cannot load files outside
+the directory. A table is read into memory once per loader, and again
+only when the file's modification time or size changes, and the same
+immutable `Table` is returned to every run and thread. Files are read,
+not memory mapped.
+
+Tables are stored by column. Columns of integers or floats are arrays,
+other columns tuples of strings. With a key column the rows are also
+indexed by key, for `get` and `between` lookups.
+"""
+import csv
+import json
+import os
+import re
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from os import PathLike
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+from ringneck.frame import INTRINSICS
+
+
+Column = Union[array, Tuple[Any, ...]]
+
+
+def column_of(values: List[Any]) -> Column:
+    """The most compact column holding values."""
+    if values and all(type(value) is int for value in values):
+        try:
+            return array("q", values)
+        except OverflowError:
+            return tuple(values)
+    if values and all(type(value) in (int, float) for value in values):
+        return array("d", values)
+    return tuple(sys.intern(value) if type(value) is str else value for value in values)
+
+
+DECIMAL = re.compile(r"[+-]?[0-9]+(\.[0-9]+)?")
+
+
+def number(text: str) -> Any:
+    """A CSV cell as an int or float if it is a decimal number, otherwise the text."""
+    match = DECIMAL.fullmatch(text)
+    if match is None:
+        return text
+    return float(text) if match.group(1) else int(text, 10)
+
+
+def order(value: Any) -> Tuple[Any, ...]:
+    """Sort key of a table key, ordering numbers, then strings, then other values by their repr."""
+    kind = type(value)
+    if kind is int or kind is float:
+        return (0, value)
+    if kind is str:
+        return (1, value)
+    return (2, kind.__name__, repr(value))
+
+
+class Row(Mapping[str, Any]):
+    """One row of a table, by column name."""
+
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table: 'Table', index: int):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, name: str):
+        return self._table._columns[name][self._index]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table._columns)
+
+    def __len__(self):
+        return len(self._table._columns)
+
+    def __repr__(self):
+        return f"Row({dict(self)})"
+
+
+class Table(Sequence[Row]):
+    """Immutable rows stored by column, optionally indexed by a key column.
+
+    Columns can be read as attributes, `names.first`, or with `column`,
+    and are read only views.
+    """
+
+    __slots__ = ('_columns', '_length', 'key', '_keys', '_positions')
+
+    key: Optional[str]
+
+    def __init__(self, columns: Dict[str, Column], key: Optional[str] = None):
+        self._columns = columns
+        self._length = len(next(iter(columns.values()))) if columns else 0
+        self.key = key
+        self._keys: Tuple[Any, ...] = ()
+        self._positions: Optional[array] = None
+        if key is not None:
+            if key not in columns:
+                raise KeyError(f"No column '{key}' to index")
+            # Rows without a key are left out of the index.
+            keys = columns[key]
+            positions = sorted((position for position in range(self._length) if keys[position] is not None),
+                               key=lambda position: order(keys[position]))
+            self._keys = tuple(order(keys[position]) for position in positions)
+            self._positions = array("q", positions)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Mapping[str, Any]], key: Optional[str] = None) -> 'Table':
+        names: Dict[str, None] = {}
+        for row in rows:
+            names.update(dict.fromkeys(row))
+        return cls({name: column_of([row.get(name) for row in rows]) for name in names}, key)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def column(self, name: str) -> Sequence[Any]:
+        values = self._columns[name]
+        return memoryview(values).toreadonly() if isinstance(values, array) else values
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self.column(name)
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [Row(self, i) for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("table index out of range")
+        return Row(self, index)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """The first row whose key is key."""
+        if self._positions is None:
+            raise TypeError("Table has no key column")
+        wanted = order(key)
+        index = bisect_left(self._keys, wanted)
+        if index < len(self._keys) and self._keys[index] == wanted:
+            return Row(self, self._positions[index])
+        return default
+
+    def between(self, low: Any, high: Any) -> List[Row]:
+        """Rows with keys from low to high, both included, in key order."""
+        if self._positions is None:
+            raise TypeError("Table has no key column")
+        start, end = bisect_left(self._keys, order(low)), bisect_right(self._keys, order(high))
+        return [Row(self, self._positions[index]) for index in range(start, end)]
+
+    def __repr__(self):
+        return f"<Table {self._length} rows, columns {', '.join(self._columns)}>"
+
+
+def load_csv(path: Path, key: Optional[str]) -> Table:
+    with open(path, newline="", encoding="utf-8") as file:
+        reader = csv.reader(file)
+        header = next(reader, [])
+        cells: List[List[Any]] = [[] for _ in header]
+        for row in reader:
+            for index, column in enumerate(cells):
+                column.append(number(row[index]) if index < len(row) else None)
+    return Table({name: column_of(column) for name, column in zip(header, cells)}, key)
+
+
+def load_json(path: Path, key: Optional[str]) -> Table:
+    """A list of objects, a list of values, as a `value` column, or an object, as `key` and `value`."""
+    with open(path, encoding="utf-8") as file:
+        data = json.load(file)
+
+    if isinstance(data, dict):
+        return Table({'key': column_of(list(data)), 'value': column_of(list(data.values()))}, key or 'key')
+    if not isinstance(data, list):
+        raise ValueError(f"{path} holds neither a list nor an object")
+    if all(isinstance(item, dict) for item in data) and data:
+        return Table.from_rows(data, key)
+    return Table({'value': column_of(data)}, key)
+
+
+LOADERS = {'.csv': load_csv, '.json': load_json}
+
+
+class TableLoader:
+    """The `table` builtin, loading files of a directory into tables cached by path and mtime."""
+
+    directory: Path
+
+    def __init__(self, directory: Union[str, PathLike]):
+        self.directory = Path(directory).resolve()
+        self.cache: Dict[Tuple[str, Optional[str]], Tuple[Tuple[int, int], Table]] = {}
+        self.loads = 0
+        self._lock = threading.Lock()
+
+    def resolve(self, path: Union[str, PathLike]) -> Path:
+        """The file a script names, relative to the directory, which it may not leave."""
+        resolved = (self.directory / path).resolve()
+        if not resolved.is_relative_to(self.directory):
+            raise PermissionError(f"Cannot load a table from '{path}', outside the table directory")
+        return resolved
+
+    def __call__(self, path: Union[str, PathLike], key: Optional[str] = None) -> Table:
+        resolved = self.resolve(path)
+        loader = LOADERS.get(resolved.suffix.lower())
+        if loader is None:
+            raise ValueError(f"Cannot load a table from '{path}', use a .csv or .json file")
+
+        stat = os.stat(resolved)
+        version = (stat.st_mtime_ns, stat.st_size)
+        cache_key = (str(resolved), key)
+        cached = self.cache.get(cache_key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        with self._lock:
+            cached = self.cache.get(cache_key)
+            if cached is None or cached[0] != version:
+                self.loads += 1
+                cached = self.cache[cache_key] = (version, loader(resolved, key))
+        return cached[1]
+
+    def clear(self):
+        with self._lock:
+            self.cache.clear()
+
+
+def install(directory: Union[str, PathLike]) -> TableLoader:
+    """Give every run a `table` intrinsic loading from directory, unless its builtins have one."""
+    loader = INTRINSICS['table'] = TableLoader(directory)
+    return loader
+
+
+def uninstall():
+    INTRINSICS.pop('table', None)
@@ -57,6 +57,12 @@ testcases: Sequence[TestCase] = [
     TestCase("a = 7 if 1 < 2 else 9", 9, ["(assign a (if 7 (< 1 2) 9))"], state={"a": 7}),
     TestCase("a = 7 if 2 < 1 else 9", 9, state={"a": 9}),
     TestCase("1 and 2", 3, ["(and 1 2)"], [2]),
+    TestCase(
+        "a = 1 == 2 and 3 < 4 + 5 * 6 - 7 / 8 or 9 != 10",
+        21,
+        ["(assign a (!= (== 1 (or (and 2 (< 3 (- (+ 4 (* 5 6)) (/ 7 8)))) 9)) 10))"],
+        state={"a": True},
+    ),
     TestCase("a = 1\nb ?= 2\na ?= 3", 11, state={"a": 1, "b": 2}),
     TestCase("a = foo(bar, b) + baz(zoo, c)", 15, ["(assign a (+ (call foo bar b) (call baz zoo c)))"]),
     TestCase(
@@ -72,9 +78,14 @@ b = 2
         8,
         ["(assign a 1)", "(assign b 2)"],
     ),
+    TestCase("a = 1 # comment", 3, ["(assign a 1)"], state={"a": 1}),
     TestCase("a, b = 1, 2", 7, ["(assign (tuple a, b) (tuple 1, 2))"], state={"a": 1, "b": 2}),
     TestCase("a=[*(1, 2, 3)]", 12, ["(assign a (starred (tuple 1, 2, 3)))"], state={"a": [1, 2, 3]}),
     TestCase("$.['a', 'b', 'c'] = %", 10, globals={"a": "a", "b": "b", "c": "c"}),
+    TestCase('a={"x": 1, "y": 2}\nb=[*a.["x", "y"]]', 23, state={"a": {"x": 1, "y": 2}, "b": [1, 2]}),
+    TestCase('a={"x": 1, "y": 2}\nb=a.["x", "y"]\na.x=5\nc=[*b]\nd=[*b]', 38,
+             state={"a": {"x": 5, "y": 2}, "b": [1, 2], "c": [1, 2], "d": [1, 2]}),
+    TestCase('k=["x", "y"]\na={"x": 0, "y": 0}\na.[*k] = %', 27, state={"k": ["x", "y"], "a": {"x": "x", "y": "y"}}),
     TestCase("$.'Name with spaces' = 5", 3, ["(assign $.'Name with spaces' 5)"], globals={"Name with spaces": 5}),
     TestCase("a=(1, 2)\nb, c = a", 13, ["(assign a (tuple 1, 2))", "(assign (tuple b, c) a)"], state={"a": (1, 2), "b": 1, "c": 2}),
     TestCase("a=1\na-=1", 7, ["(assign a 1)", "(-= a 1)"], state={"a": 0}),
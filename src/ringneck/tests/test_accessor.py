@@ -0,0 +1,36 @@
+"""Test the inline cached path accessor."""
+from dataclasses import dataclass
+from typing import Any
+
+from ringneck.accessor import PathAccessor
+
+
+@dataclass
+class Stats:
+    strength: Any
+
+
+def test_attribute_and_item_segments():
+    accessor = PathAccessor(("$", "stats", "strength"))
+
+    assert accessor({"stats": Stats(10)}) == 10
+    assert accessor({"stats": Stats(12)}) == 12
+    assert accessor.misses == 2
+    assert accessor.hits == 2
+
+
+def test_deoptimize_on_new_type():
+    accessor = PathAccessor(("$", "stats", "strength"))
+
+    assert accessor({"stats": Stats(10)}) == 10
+    assert accessor({"stats": {"strength": 11}}) == 11
+    assert accessor.deopts == 1
+    assert accessor({"stats": {"strength": 12}}) == 12
+
+
+def test_missing_key_falls_back():
+    accessor = PathAccessor(("$", "name"))
+
+    assert accessor({"name": "A"}) == "A"
+    assert accessor({}) is None
+    assert accessor.deopts == 0
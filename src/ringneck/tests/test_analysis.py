@@ -0,0 +1,76 @@
+"""Test read/write analysis and slicing programs by their outputs."""
+from ringneck.program import Program
+
+
+def test_effects():
+    program = Program('a = $.x + b\n$.y.z = len(a)\nnames.append(a)\n$.["p", "q"] = 1\n$.[*keys] = 2')
+
+    first, second, third, fourth, fifth = program.effects
+
+    assert first.reads == {'b'}
+    assert first.writes == {'a'}
+    assert first.global_reads == {('x',)}
+    assert second.global_writes == {('y', 'z')}
+    assert second.calls == {'len'}
+    assert third.writes == {'names'}
+    assert third.calls == {'names.append'}
+    assert fourth.global_writes == {('p',), ('q',)}
+    assert fifth.reads == {'keys'}
+    assert fifth.global_writes == {()}
+
+
+def test_slice_by_output():
+    program = Program('a = 1\nb = 2\n$.name = "x" + str(a)\n$.other = b\nif a == 1:\nc = 3\nendif')
+
+    data = {}
+    program.run(global_variables=data, builtins={'str': str}, outputs=['$.name'], pure={'str'})
+
+    assert data == {'name': 'x1'}
+    assert len(program.slice(['$.name'], {'str'})) == 2
+
+
+def test_slice_keeps_effectful_builtins():
+    calls = []
+
+    def log(value):
+        calls.append(value)
+
+    program = Program('a = 1\nb = 2\nlog(b)\n$.name = a')
+
+    data = {}
+    program.run(global_variables=data, builtins={'log': log}, outputs=['$.name'])
+
+    assert data == {'name': 1}
+    assert calls == [2]
+    assert len(program.slice(['$.name'])) == 4
+
+
+def test_slice_keeps_dotted_calls():
+    calls = []
+    log = type('Log', (), {'info': staticmethod(calls.append)})()
+    program = Program('log.info(1)\n$.name = 2')
+
+    data = {}
+    program.run(global_variables=data, builtins={'log': log}, outputs=['$.name'])
+
+    assert data == {'name': 2}
+    assert calls == [1]
+    assert len(program.slice(['$.name'], {'log.info'})) == 1
+
+
+def test_slice_by_prefix():
+    program = Program('$.a.b = 1\n$.c = 2\nx = $.a')
+
+    assert len(program.slice(['x'])) == 2
+    assert len(program.slice(['$.a.b.c'])) == 1
+
+
+def test_slice_after_update():
+    program = Program('a = 1\nb = 2\n$.name = a')
+    program.slice(['$.name'])
+
+    program.update((3, 3), '$.name = b')
+
+    data = {}
+    program.run(global_variables=data, outputs=['$.name'])
+    assert data == {'name': 2}
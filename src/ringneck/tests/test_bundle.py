@@ -0,0 +1,83 @@
+"""Test bundles of scanned scripts."""
+from pathlib import Path
+
+import pytest
+
+from ringneck.bundle import Bundle, BundleError, write_bundle
+from ringneck.program import Program
+
+
+SCRIPTS = {
+    'totals.rn': "total = 0\nrepeat total += 2 times $.n\n$.total = total\n",
+    'nested/names.rn': "$.name = 'é' + $.x\nif $.x == 'a':\n$.first = True\nendif",
+    'empty.rn': "",
+}
+
+
+@pytest.fixture
+def bundle(tmp_path: Path) -> Bundle:
+    directory = tmp_path / "scripts"
+    for name, source in SCRIPTS.items():
+        path = directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source, encoding="utf-8")
+    (directory / "notes.txt").write_text("not a script")
+
+    assert write_bundle(directory, tmp_path / "lib.rnb") == 3
+    return Bundle(tmp_path / "lib.rnb")
+
+
+def test_lookup(bundle: Bundle):
+    assert sorted(bundle) == ['empty', 'nested/names', 'totals']
+    assert 'totals' in bundle and 'notes' not in bundle
+    assert bundle.programs == {}
+
+    assert bundle['totals'] is bundle['totals']
+    assert list(bundle.programs) == ['totals']
+    with pytest.raises(KeyError):
+        bundle['missing']
+
+
+@pytest.mark.parametrize("name", ['totals', 'nested/names', 'empty'])
+def test_same_as_source(bundle: Bundle, name: str):
+    source = SCRIPTS[name + '.rn']
+    assert bundle.source(name) == source
+
+    expected_record = {'n': 3, 'x': 'a'}
+    expected = Program(source).run(expected_record)
+    record = {'n': 3, 'x': 'a'}
+    assert bundle[name].run(record) == expected
+    assert record == expected_record
+
+
+def test_source_read_when_needed(bundle: Bundle):
+    program = bundle['totals']
+    assert program._lines is None
+
+    assert program.source == SCRIPTS['totals.rn']
+    program.update((1, 1), program.lines[0])
+    assert program.source == SCRIPTS['totals.rn']
+
+
+def test_not_a_bundle(tmp_path: Path):
+    path = tmp_path / "lib.rnb"
+    path.write_bytes(b"RNB\0" + b"\x09" * 20)
+
+    with pytest.raises(BundleError):
+        Bundle(path)
+
+
+def test_rebuild_leaves_open_bundle_readable(tmp_path: Path, bundle: Bundle):
+    directory = tmp_path / "scripts"
+    (directory / "totals.rn").write_text("$.total = 1", encoding="utf-8")
+    mode = (tmp_path / "lib.rnb").stat().st_mode
+
+    assert write_bundle(directory, tmp_path / "lib.rnb") == 3
+
+    assert bundle.source('totals') == SCRIPTS['totals.rn']
+    record = {'n': 2}
+    bundle['totals'].run(record)
+    assert record['total'] == 4
+    assert Bundle(tmp_path / "lib.rnb").source('totals') == "$.total = 1"
+    assert (tmp_path / "lib.rnb").stat().st_mode == mode
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["lib.rnb", "scripts"]
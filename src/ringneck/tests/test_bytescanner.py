@@ -0,0 +1,49 @@
+"""Test scanning bytes, memoryviews and memory mapped files."""
+import pytest
+
+from ringneck.interpreter import Interpreter
+from ringneck.parser import Parser
+from ringneck.scanner import Scanner
+from ringneck.tests.cases import testcases
+
+
+def fields(tokens):
+    return [(t.tokentype, t.lexeme, t.literal, t.line, t.column) for t in tokens]
+
+
+@pytest.mark.parametrize("program", [case.program for case in testcases] + [
+    "a = 'x\ny' # comment\n\n\tb = 1.5 + 2\n$'a b'.c = 1",
+])
+def test_same_tokens_as_str(program: str):
+    assert fields(Scanner.from_buffer(program.encode()).scan_tokens()) == fields(Scanner(program).scan_tokens())
+
+
+def test_columns_count_characters():
+    tokens = Scanner.from_buffer("a = 'é' + 'ü'".encode()).scan_tokens()
+
+    assert fields(tokens)[:-1] == fields(Scanner("a = 'é' + 'ü'").scan_tokens())[:-1]
+
+
+def test_memoryview():
+    data = bytearray(b"a = 1\nb = a + 2")
+    tokens = Scanner.from_buffer(memoryview(data)).scan_tokens()
+
+    assert [token.lexeme for token in tokens][:-1] == ["a", "=", "1", "\n", "b", "=", "a", "+", "2"]
+
+
+def test_from_file(tmp_path):
+    path = tmp_path / "script.rn"
+    path.write_text("names = {1: 'A', 2: 'B'}\n$.name = names.get(2)\n", encoding="utf-8")
+
+    tokens = Scanner.from_file(path).scan_tokens()
+    data = {}
+    Interpreter(global_variables=data).interpret(Parser(tokens).parse())
+
+    assert data == {'name': 'B'}
+
+
+def test_from_empty_file(tmp_path):
+    path = tmp_path / "empty.rn"
+    path.write_text("")
+
+    assert fields(Scanner.from_file(path).scan_tokens()) == fields(Scanner("").scan_tokens())
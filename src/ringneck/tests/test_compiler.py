@@ -0,0 +1,107 @@
+"""Test fused handlers for common statement shapes."""
+import pytest
+
+from ringneck.interpreter import OutputMode
+from ringneck.program import Program
+
+
+@pytest.mark.parametrize("source,fused", [
+    ("$.a = choice(colors)", True),
+    ("$.a = randint(2, 5)", True),
+    ("a = 1", True),
+    ("a += 1", True),
+    ("a -= 1.5", True),
+    ("if a == 1:\na = 2\nendif", True),
+    ("a ?= 1", False),
+    ("$.a = choice(colors.x)", True),
+    ("$.a = choice(a + 1)", False),
+    ("a += b", False),
+    ("if a > 1:\na = 2\nendif", False),
+])
+def test_shapes(source: str, fused: bool):
+    program = Program(source)
+
+    assert (program.statements[0].handler is not None) == fused
+    assert Program(source, fused=False).statements[0].handler is None
+
+
+def test_same_results_as_visitor():
+    source = """colors = ['red', 'green']
+n = 0
+n += 2
+n -= 1
+$.color = pick(colors, n)
+$.size = pick(['s', 'm'], 0)
+if n == 1:
+$.big = True
+n += 10
+endif
+if $.color == 'green':
+$.green = True
+endif
+n"""
+
+    def pick(values, index):
+        return values[index]
+
+    results = []
+    for fused in (True, False):
+        data = {}
+        result = Program(source, fused=fused).run(global_variables=data, builtins={'pick': pick})
+        results.append((data, result))
+
+    assert results[0] == results[1]
+    assert results[0][0] == {'color': 'green', 'size': 's', 'big': True, 'green': True}
+    assert results[0][1][-1] == 11
+
+
+def test_builtin_sees_state():
+    def custom():
+        return state['b'] + globals['c']
+
+    data = {'c': 2}
+    Program("b = 1\n$.d = custom()").run(global_variables=data, builtins={'custom': custom})
+
+    assert data['d'] == 3
+
+
+def test_if_output_modes():
+    program = Program("a = 1\nif a == 1:\nb = 2\n3\nendif")
+
+    assert program.run() == [None, [None, 3]]
+    assert program.run(output=OutputMode.LAST) == 3
+
+
+def test_transactional_write():
+    program = Program("$.a = pick(1)\n$.b = $.a")
+    data = {}
+    program.run(global_variables=data, builtins={'pick': lambda value: value}, transactional=True)
+
+    assert data == {'a': 1, 'b': 1}
+
+
+@pytest.mark.parametrize("source,value", [
+    ("a = 1\nrepeat a += 2 times 1000", 2001),
+    ("a = 10\nrepeat a -= 3 times 3", 1),
+    ("a = 'x'\nrepeat a += 'ab' times 3", 'xababab'),
+    ("a = 0.5\nrepeat a += 0.1 times 3", 0.5 + 0.1 + 0.1 + 0.1),
+    ("a = 1\nrepeat a += 2 times 0 - 4", 1),
+    ("a = 1\nn = 3\nrepeat a += a times n", 8),
+])
+def test_repeat(source: str, value):
+    for fused in (True, False):
+        assert Program(source + "\na", fused=fused).run()[-1] == value
+
+
+def test_repeat_calls_builtin():
+    rolls = []
+    Program("repeat $.last = roll(6) times 4").run(global_variables={}, builtins={'roll': rolls.append})
+
+    assert rolls == [6, 6, 6, 6]
+
+
+@pytest.mark.parametrize("count", ["'3'", "True", "2.0", "None"])
+def test_repeat_count_must_be_int(count: str):
+    for fused in (True, False):
+        with pytest.raises(RuntimeError, match="Repeat count must be an int"):
+            Program(f"a = 1\nrepeat a += 1 times {count}", fused=fused).run()
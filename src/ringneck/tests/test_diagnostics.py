@@ -0,0 +1,45 @@
+"""Test checking scripts for errors."""
+from pathlib import Path
+
+import pytest
+
+from ringneck import check, diagnostics
+from ringneck.diagnostics import Diagnostic
+
+
+@pytest.fixture
+def scripts(tmp_path: Path) -> Path:
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "good.rn").write_text("a = 1\n")
+    (tmp_path / "nested" / "bad.rn").write_text("a = (1 +\nb = 2 ~\nc = )\n")
+    (tmp_path / "notes.txt").write_text("a = (\n")
+    return tmp_path
+
+
+def test_check_reports_every_error(scripts: Path):
+    assert check([scripts]) == [
+        Diagnostic(str(scripts / "nested" / "bad.rn"), 1, 9, "Expect expression"),
+        Diagnostic(str(scripts / "nested" / "bad.rn"), 2, 7, "Unexepected character: ~"),
+        Diagnostic(str(scripts / "nested" / "bad.rn"), 3, 5, "Expect expression"),
+    ]
+
+
+def test_check_in_processes(scripts: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(diagnostics, "PARALLEL_FROM", 2)
+    (scripts / "unterminated.rn").write_text('a = 1\n$.a = "oops')
+    files = [scripts / "good.rn", scripts / "nested" / "bad.rn", scripts / "notes.txt", scripts / "missing.rn",
+             scripts / "unterminated.rn"]
+
+    found = check(files, workers=2)
+
+    assert [(Path(diagnostic.path).name, diagnostic.line) for diagnostic in found] == [
+        ("bad.rn", 1), ("bad.rn", 2), ("bad.rn", 3), ("notes.txt", 1), ("missing.rn", 0), ("unterminated.rn", 2),
+    ]
+
+
+@pytest.mark.parametrize("source,expected", [
+    ('a = 1\n$.a = "oops', [(2, 7, "Unexpected end of script")]),
+    ('a = (\nb = $"x\ny"', [(2, 5, "No newlines in global names")]),
+])
+def test_scanner_giving_up(source: str, expected: list):
+    assert [(found.line, found.column, found.message) for found in diagnostics.check_source(source)] == expected
@@ -1,7 +1,9 @@
 from typing import Any, List, Union, Dict
 from pydantic import BaseModel
+import pytest
 
 from ringneck import run
+from ringneck.transaction import Changeset
 
 
 class Character(BaseModel):
@@ -78,3 +80,77 @@ def test_global_variable_access():
         builtins={'custom': custom})
 
     assert data == {'a': 19, 'c': 12}
+
+
+def test_transactional_bulk_commit():
+    def fail():
+        raise RuntimeError("Failed")
+
+    data = {'a': 1}
+    with pytest.raises(RuntimeError):
+        run("$.b = 2\n$.c = fail()", global_variables=data, builtins={'fail': fail}, transactional=True)
+    assert data == {'a': 1}
+
+    run("$.b = 2\n$.c = $.b + $.a", global_variables=data, transactional=True)
+    assert data == {'a': 1, 'b': 2, 'c': 3}
+
+
+def test_transactional_model_copy():
+    committed: List[Character] = []
+
+    def commit(target: Character, changeset: Changeset):
+        committed.append(target.model_copy(update=changeset.updates))
+        return committed[-1]
+
+    char = Character(kin='Human', name='A')
+    run("$.name = 'B'", global_variables=char, transactional=True, commit=commit)
+
+    assert char.name == 'A'
+    assert committed[0].name == 'B'
+
+
+class Stats(BaseModel):
+    strength: int
+
+
+class Hero(BaseModel):
+    name: str
+    stats: Stats
+
+
+def test_transactional_nested_model():
+    stats = Stats(strength=1)
+    hero = Hero(name='A', stats=stats)
+
+    with pytest.raises(RuntimeError):
+        run("$.name = 'B'\n$.stats.strength = 9\n$.c = fail()", global_variables=hero,
+            builtins={'fail': lambda: 1 + 'a'}, transactional=True)
+    assert hero == Hero(name='A', stats=Stats(strength=1))
+
+    run("$.name = 'B'\n$.stats.strength = 9", global_variables=hero, transactional=True)
+
+    assert hero == Hero(name='B', stats=Stats(strength=9))
+    # The old stats may be shared, so it is replaced rather than changed.
+    assert stats.strength == 1
+
+
+def test_transactional_write_below_written_value():
+    shared = {'x': 1}
+    data = {'shared': shared}
+
+    run("$.a = $.shared\n$.a.x = 2", global_variables=data, transactional=True)
+
+    assert data == {'shared': {'x': 1}, 'a': {'x': 2}}
+
+
+@pytest.mark.parametrize("transactional", [False, True])
+def test_read_parent_after_writing_child(transactional: bool):
+    hero = Hero(name='A', stats=Stats(strength=1))
+    data = {'stats': {'strength': 1, 'speed': 2}}
+    source = "$.stats.strength = 9\ns = $.stats\n$.out = s.strength\n$.speed = $.stats.speed"
+
+    run(source, global_variables=data, transactional=transactional)
+    run("$.stats.strength = 9\n$.stats = $.stats", global_variables=hero, transactional=transactional)
+
+    assert data == {'stats': {'strength': 9, 'speed': 2}, 'out': 9, 'speed': 2}
+    assert hero.stats.strength == 9
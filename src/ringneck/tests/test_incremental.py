@@ -0,0 +1,74 @@
+"""Test incremental updates of programs."""
+import pytest
+
+from ringneck.parser import ParserError
+from ringneck.program import Program
+
+
+source = """a = 1
+b = {
+    'x': 2
+}
+# comment
+if a == 1:
+c = 3
+endif
+d = b.x + a"""
+
+
+def assert_fresh(program: Program):
+    fresh = Program(program.source)
+    assert repr(program.statements) == repr(fresh.statements)
+    assert program.spans == fresh.spans
+
+
+@pytest.mark.parametrize("edit_range,new_text", [
+    ((1, 1), "a = 2"),
+    ((1, 1), "a = 2\ne = 5"),
+    ((3, 3), "    'x': 4,\n    'y': 5"),
+    ((5, 5), ""),
+    ((7, 7), "c = 4\nc = c + 1"),
+    ((10, 9), "f = d * 2"),
+])
+def test_update_matches_fresh_parse(edit_range, new_text):
+    program = Program(source)
+    program.update(edit_range, new_text)
+
+    assert_fresh(program)
+
+
+def test_update_keeps_untouched_statements():
+    program = Program(source)
+    kept = program.statements[1:]
+
+    program.update((1, 1), "a = 5\n\n")
+
+    assert all(new is old for new, old in zip(program.statements[1:], kept))
+    assert program.statements[3].expr.operator.line == 11
+
+    data = {}
+    program.update((11, 11), "$.d = b.x + a")
+    program.run(global_variables=data)
+    assert data == {'d': 7}
+
+
+def test_update_with_errors():
+    program = Program(source)
+
+    with pytest.raises(ParserError):
+        program.update((2, 2), "b = [")
+
+    assert program.source == source
+    assert_fresh(program)
+
+
+def test_update_moves_later_statements_once_read():
+    program = Program(source)
+    last = program._statements[-1]
+
+    program.update((1, 1), "a = 5\n")
+    program.update((2, 1), "e = 6")
+
+    assert last.expr.operator.line == 9
+    assert program.statements[-1].expr.operator.line == 11
+    assert_fresh(program)
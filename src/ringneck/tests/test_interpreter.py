@@ -1,9 +1,11 @@
 """Test miscellanous Troll rolls."""
+import sys
 from typing import Any, Dict, List
 
 import pytest
 
-from ringneck.interpreter import Interpreter
+from ringneck.evaluator import EvaluationStrategy
+from ringneck.interpreter import Interpreter, OutputMode
 from ringneck.parser import Parser
 from ringneck.scanner import Scanner
 
@@ -41,3 +43,52 @@ def test_interpreter_globals(program: str, globals: Dict[str, Any]):
     interpreter = Interpreter()
     interpreter.interpret(expression)
     assert interpreter.globals == globals
+
+
+@pytest.mark.parametrize("mode,result", [
+    (OutputMode.COLLECT, [None, None, 3]),
+    (OutputMode.LAST, 3),
+    (OutputMode.DISCARD, None),
+])
+def test_output_mode(mode: OutputMode, result: Any):
+    parser = Parser(Scanner("a = 1\nb = 2\na + b").scan_tokens())
+
+    interpreter = Interpreter(output=mode)
+    assert interpreter.interpret(parser.statements()) == result
+
+
+def test_output_mode_stream():
+    parser = Parser(Scanner("a = 1\nif a == 1:\na = 2\na + 1\nendif").scan_tokens())
+
+    interpreter = Interpreter(output=OutputMode.STREAM)
+    results = interpreter.interpret(parser.statements())
+    assert next(results) is None
+    assert interpreter.state == {"a": 1}
+    assert list(results) == [3]
+
+
+@pytest.mark.parametrize("program,result", [(case.program, case.interpret_result) for case in testcases if case.interpret_result is not None])
+def test_interpret_iterative(program: str, result: List[Any]):
+    parser = Parser(Scanner(program).scan_tokens())
+
+    interpreter = Interpreter(strategy=EvaluationStrategy.ITERATIVE)
+    assert interpreter.interpret(parser.parse()) == result, program
+
+
+def test_iterative_deep_expression():
+    program = "a = 1" + " + 1" * 5000 + "\nb = a > 10 and (((((a - 1)))))"
+    parser = Parser(Scanner(program).scan_tokens())
+
+    interpreter = Interpreter(strategy=EvaluationStrategy.ITERATIVE)
+    interpreter.interpret(parser.parse())
+    assert interpreter.state == {"a": 5001, "b": 5000}
+
+
+def test_iterative_deeply_nested_parentheses():
+    depth = sys.getrecursionlimit() * 2
+    program = "a = " + "(" * depth + "1" + " + 1)" * depth
+    parser = Parser(Scanner(program).scan_tokens())
+
+    interpreter = Interpreter(strategy=EvaluationStrategy.ITERATIVE)
+    interpreter.interpret(parser.parse())
+    assert interpreter.state == {"a": depth + 1}
@@ -0,0 +1,106 @@
+"""Test loading script directories."""
+import os
+import threading
+import time
+from pathlib import Path
+
+from ringneck.error_handler import ErrorHandler
+from ringneck.library import ScriptLibrary
+
+
+def write(path: Path, source: str, mtime: int):
+    path.write_text(source, encoding="utf-8")
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_load_and_reload(tmp_path: Path):
+    write(tmp_path / "a.rn", "$.a = 1", 1_000_000_000)
+    (tmp_path / "sub").mkdir()
+    write(tmp_path / "sub" / "b.rn", "$.b = 2", 1_000_000_000)
+
+    library = ScriptLibrary(tmp_path, pattern="**/*.rn", measure_memory=True)
+    assert sorted(library) == ["a", "sub/b"]
+    assert library.stats["a"].memory > 0
+
+    old = library["a"]
+    write(tmp_path / "a.rn", "$.a = 3", 2_000_000_000)
+    assert library.refresh() == ["a"]
+
+    data = {}
+    old.run(global_variables=data)
+    library["a"].run(global_variables=data)
+    assert data == {"a": 3}
+    assert library.refresh() == []
+
+
+def test_broken_script_keeps_previous_version(tmp_path: Path):
+    write(tmp_path / "a.rn", "$.a = 1", 1_000_000_000)
+    library = ScriptLibrary(tmp_path)
+    program = library["a"]
+
+    write(tmp_path / "a.rn", "$.a = (1", 2_000_000_000)
+    library.refresh()
+
+    assert library["a"] is program
+    assert library.stats["a"].errors[0].line == 1
+
+    (tmp_path / "a.rn").unlink()
+    assert library.refresh() == ["a"]
+    assert "a" not in library
+
+
+def test_refresh_waits_for_other_parses(tmp_path: Path):
+    write(tmp_path / "a.rn", "$.a = 1", 1_000_000_000)
+    library = ScriptLibrary(tmp_path)
+    write(tmp_path / "a.rn", "$.a = 2", 2_000_000_000)
+
+    with ErrorHandler.lock:
+        ErrorHandler.reset()
+        ErrorHandler.report(1, 1, "parsed in the foreground")
+        watcher = threading.Thread(target=library.refresh)
+        watcher.start()
+        watcher.join(0.1)
+        assert watcher.is_alive()
+        assert [error.msg for error in ErrorHandler.errors] == ["parsed in the foreground"]
+    watcher.join()
+
+    assert library.stats["a"].errors == []
+    assert "a" in library
+
+
+def test_unterminated_string(tmp_path: Path):
+    write(tmp_path / "a.rn", "$.a = 'open", 1_000_000_000)
+    write(tmp_path / "b.rn", "$.b = 1", 1_000_000_000)
+
+    library = ScriptLibrary(tmp_path)
+
+    assert sorted(library) == ["b"]
+    assert [(error.line, error.msg) for error in library.stats["a"].errors] == [(1, "Unexpected end of script")]
+
+
+def test_watch_survives_failed_refresh(tmp_path: Path, monkeypatch):
+    write(tmp_path / "a.rn", "$.a = 1", 1_000_000_000)
+    library = ScriptLibrary(tmp_path)
+    refresh = library.refresh
+    failures = []
+
+    def flaky():
+        if not failures:
+            failures.append(1)
+            raise RuntimeError("disk gone")
+        return refresh()
+
+    monkeypatch.setattr(library, "refresh", flaky)
+    write(tmp_path / "a.rn", "$.a = 'open", 2_000_000_000)
+    library.watch(0.01)
+    try:
+        for _ in range(500):
+            if library.stats["a"].errors:
+                break
+            time.sleep(0.01)
+    finally:
+        library.stop()
+
+    assert str(library.error) == "disk gone"
+    assert library.stats["a"].errors
+    assert "a" in library
@@ -0,0 +1,105 @@
+"""Test the command line interface."""
+import json
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from ringneck.bundle import Bundle
+from ringneck.main import app
+
+
+RECORDS = '{"x": 1}\n{"x": 2}\n\n{"x": "a"}\n'
+
+
+@pytest.fixture
+def script(tmp_path: Path) -> Path:
+    path = tmp_path / "script.rn"
+    path.write_text("$.y = $.x + 1\n$.n = upper('a')\n")
+    return path
+
+
+def run(*args: str, stdin: str = RECORDS):
+    return CliRunner().invoke(app, ["run", *args, "-b", "ringneck.tests.test_main:BUILTINS"], input=stdin)
+
+
+BUILTINS = {'upper': str.upper}
+
+
+def test_run_stdin(script: Path):
+    result = run(str(script), "--on-error", "skip")
+
+    assert result.exit_code == 0
+    assert [json.loads(line) for line in result.stdout.splitlines()] == [
+        {'x': 1, 'y': 2, 'n': 'A'},
+        {'x': 2, 'y': 3, 'n': 'A'},
+    ]
+
+
+def test_run_file_emit_errors(script: Path, tmp_path: Path):
+    records = tmp_path / "records.jsonl"
+    records.write_text(RECORDS)
+
+    result = run(str(script), str(records), "--on-error", "emit", stdin="")
+
+    lines = [json.loads(line) for line in result.stdout.splitlines()]
+    assert result.exit_code == 0
+    assert lines[-1]['line'] == 4
+    assert "Wrong types" in lines[-1]['error']
+
+
+def test_run_fails_on_error(script: Path):
+    result = run(str(script))
+
+    assert result.exit_code == 1
+    assert len(result.stdout.splitlines()) == 2
+
+
+def test_run_workers_keep_order(script: Path):
+    stdin = "".join(json.dumps({'x': i}) + "\n" for i in range(50))
+
+    result = run(str(script), "--workers", "2", "--stats", stdin=stdin)
+
+    assert result.exit_code == 0
+    assert [json.loads(line)['y'] for line in result.stdout.splitlines()] == list(range(1, 51))
+
+
+@pytest.mark.parametrize("source", ["$.a = (1 +\n", "$.a = 1 ~\n"])
+def test_compile_errors(tmp_path: Path, source: str):
+    path = tmp_path / "broken.rn"
+    path.write_text(source)
+
+    result = run(str(path))
+
+    assert result.exit_code == 1
+    assert result.exception is None or isinstance(result.exception, SystemExit)
+    assert "broken.rn:1:" in result.stderr
+
+
+def test_check(tmp_path: Path):
+    (tmp_path / "good.rn").write_text("a = 1\n")
+    (tmp_path / "bad.rn").write_text("a = (1 +\nb = )\n")
+
+    result = CliRunner().invoke(app, ["check", str(tmp_path), "--json"])
+
+    assert result.exit_code == 1
+    assert [(diagnostic['line'], diagnostic['message']) for diagnostic in json.loads(result.stdout)] == [
+        (1, "Expect expression"), (2, "Expect expression"),
+    ]
+    assert CliRunner().invoke(app, ["check", str(tmp_path / "good.rn")]).exit_code == 0
+
+
+def test_bundle(tmp_path: Path):
+    (tmp_path / "scripts").mkdir()
+    (tmp_path / "scripts" / "a.rn").write_text("$.y = $.x + 1\n")
+    output = tmp_path / "lib.rnb"
+
+    result = CliRunner().invoke(app, ["bundle", str(tmp_path / "scripts"), "-o", str(output)])
+    assert result.exit_code == 0
+    assert list(Bundle(output)) == ['a']
+
+    (tmp_path / "scripts" / "b.rn").write_text("$.y = (\n")
+    result = CliRunner().invoke(app, ["bundle", str(tmp_path / "scripts"), "-o", str(tmp_path / "broken.rnb")])
+    assert result.exit_code == 1
+    assert "b.rn:1:" in result.stderr
+    assert not (tmp_path / "broken.rnb").exists()
@@ -0,0 +1,82 @@
+"""Test the runtime metrics registry."""
+import pytest
+
+from ringneck import metrics
+from ringneck.metrics import Registry
+from ringneck.parser import ParserError
+from ringneck.program import Program
+
+
+@pytest.fixture
+def enabled():
+    metrics.reset()
+    metrics.enable()
+    yield metrics.REGISTRY
+    metrics.disable()
+    metrics.reset()
+
+
+def samples(snapshot, name):
+    return {tuple(sorted(sample['labels'].items())): sample for sample in snapshot[name]['samples']}
+
+
+def test_disabled_records_nothing():
+    metrics.reset()
+    Program("$.a = f(1)").run(global_variables={}, builtins={'f': abs})
+
+    assert not metrics.REGISTRY.counters
+    assert not metrics.REGISTRY.histograms
+
+
+def test_program_metrics(enabled: Registry):
+    program = Program("x = 1\n$.a = x + 1\n$.b = f(x)\n$.c = $.d.e")
+    for _ in range(3):
+        program.run(global_variables={'d': {'e': 1}}, builtins={'f': abs})
+
+    snapshot = metrics.snapshot()
+    assert samples(snapshot, 'ringneck_scan_seconds')[()]['count'] == 1
+    assert samples(snapshot, 'ringneck_parse_seconds')[()]['count'] == 1
+    assert samples(snapshot, 'ringneck_exec_seconds')[()]['count'] == 3
+    assert samples(snapshot, 'ringneck_program_tokens')[()]['sum'] == 21
+    assert samples(snapshot, 'ringneck_builtin_calls_total')[(('builtin', 'abs'),)]['value'] == 3
+    assert samples(snapshot, 'ringneck_builtin_seconds')[(('builtin', 'abs'),)]['count'] == 3
+    # Both segments of $.d.e miss on the first run and hit on the others.
+    assert samples(snapshot, 'ringneck_cache_hits')[(('cache', 'path'),)]['value'] == 4
+    assert enabled.hit_rate('path') == pytest.approx(4 / 6)
+
+
+def test_errors_by_kind(enabled: Registry):
+    Program("$.a = 1 ~")
+    with pytest.raises(ParserError):
+        Program("$.a = (1 +")
+    with pytest.raises(RuntimeError):
+        Program("$.a = 'a' + 1").run(global_variables={})
+    with pytest.raises(RuntimeError):
+        Program("$.a = f(1, 2)").run(global_variables={}, builtins={'f': abs})
+
+    errors = samples(metrics.snapshot(), 'ringneck_errors_total')
+    assert errors[(('kind', 'syntax'),)]['value'] == 2
+    assert errors[(('kind', 'TypeError'),)]['value'] == 2
+
+
+def test_slice_cache(enabled: Registry):
+    program = Program("$.a = 1\n$.b = 2")
+    program.run(global_variables={}, outputs=['$.a'])
+    program.run(global_variables={}, outputs=['$.a'])
+
+    assert enabled.hit_rate('slice') == 0.5
+
+
+def test_prometheus_format():
+    registry = Registry(enabled=True)
+    registry.increment('ringneck_builtin_calls_total', builtin='say "hi"')
+    registry.observe('ringneck_exec_seconds', 0.002)
+
+    text = registry.to_prometheus()
+
+    assert '# TYPE ringneck_builtin_calls_total counter' in text
+    assert 'ringneck_builtin_calls_total{builtin="say \\"hi\\""} 1' in text
+    assert 'ringneck_exec_seconds_bucket{le="0.001"} 0' in text
+    assert 'ringneck_exec_seconds_bucket{le="0.01"} 1' in text
+    assert 'ringneck_exec_seconds_bucket{le="+Inf"} 1' in text
+    assert 'ringneck_exec_seconds_count 1' in text
@@ -0,0 +1,87 @@
+"""Test interning and sharing of repeated expressions."""
+from typing import Any, List
+
+import pytest
+
+from ringneck.ast import expression
+from ringneck.evaluator import EvaluationStrategy
+from ringneck.program import Program
+from ringneck.tests.cases import testcases
+
+
+class Stats:
+    def __init__(self, strength: int):
+        self._strength = strength
+        self.reads = 0
+
+    @property
+    def strength(self):
+        self.reads += 1
+        return self._strength
+
+
+@pytest.mark.parametrize("program,result", [(case.program, case.interpret_result) for case in testcases if case.interpret_result is not None])
+def test_interpret_optimized(program: str, result: List[Any]):
+    assert Program(program, optimize=True).run() == result, program
+
+
+def test_identical_expressions_interned():
+    program = Program("a = $.x * 2 + 1\nb = $.x * 2 + 1\nc = $.x", optimize=True)
+
+    first, second, third = [stmt.expr.value for stmt in program.statements]
+    assert first is second
+    assert isinstance(first, expression.Shared)
+    assert first.expression.left.left is third
+
+
+def test_shared_across_condition():
+    once = Stats(6)
+    Program("$.stats.strength * 2").run(global_variables={'stats': once})
+
+    stats = Stats(6)
+    program = Program("if $.stats.strength * 2 > 10:\n$.bonus = $.stats.strength * 2\nendif", optimize=True)
+    data = {'stats': stats}
+    program.run(global_variables=data)
+
+    assert data['bonus'] == 12
+    assert stats.reads == once.reads
+
+
+@pytest.mark.parametrize("source", [
+    "a = 1\nb = a * 2\na = 5\na * 2",
+    "a = 1\nb = a * 2\na += 4\na * 2",
+    "a = 1\nb = a * 2\na, d = 5, 0\na * 2",
+    "$.a = 1\nb = $.a * 2\n$.['a', 'z'] = 5\n$.a * 2",
+])
+def test_writes_invalidate(source: str):
+    assert Program(source, optimize=True).run(global_variables={})[-1] == 10
+
+
+@pytest.mark.parametrize("source,expected", [
+    ("x = $.stats.strength * 2\ns = $.stats\ns.strength = 9\n$.y = $.stats.strength * 2", 18),
+    ("stats = {'strength': 1}\nx = stats.strength * 2\ns = stats\ns.strength = 5\n$.y = stats.strength * 2", 10),
+    ("x = $.stats.strength * 2\ns = $.stats\ns.['strength', 'speed'] = 3\n$.y = $.stats.strength * 2", 6),
+])
+@pytest.mark.parametrize("optimize", [False, True])
+def test_writes_through_aliases_invalidate(source: str, expected: int, optimize: bool):
+    data = {'stats': {'strength': 1}}
+    Program(source, optimize=optimize).run(global_variables=data)
+
+    assert data['y'] == expected
+
+
+def test_calls_invalidate():
+    def bump():
+        globals['n'] += 1
+
+    data = {'n': 1}
+    Program("b = $.n * 2\nbump()\n$.c = $.n * 2", optimize=True).run(global_variables=data, builtins={'bump': bump})
+
+    assert data['c'] == 4
+
+
+def test_deep_expression():
+    program = Program("a = 1" + " + 1" * 5000 + "\nb = 1" + " + 1" * 5000, optimize=True)
+
+    assert program.statements[0].expr.value is program.statements[1].expr.value
+    assert program.run(strategy=EvaluationStrategy.ITERATIVE) == [None, None]
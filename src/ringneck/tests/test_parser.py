@@ -1,6 +1,8 @@
+import sys
 import pytest
 from typing import List
 
+from ringneck.ast import expression
 from ringneck.ast.printer import ASTPrinter
 
 from ringneck.tests.cases import testcases
@@ -16,3 +18,54 @@ def test_parse(program: str, result: List[str]):
     expression = parser.parse()
     res = ASTPrinter().print(expression)
     assert res == result, program
+
+
+def test_recover_after_errors():
+    program = "a = (1 +\nb = 2\nif a ==\nc = )\nendif\nendif\nd = 3"
+    parser = Parser(Scanner(program).scan_tokens(), recover=True)
+
+    statements = parser.parse()
+
+    assert [(error.args[0].line, error.args[1]) for error in parser.errors] == [
+        (1, "Expect expression"), (3, "Expect expression"), (4, "Expect expression"), (6, "Expect expression"),
+    ]
+    assert ASTPrinter().print([statements[0], statements[-1]]) == ["(assign b 2)", "(assign d 3)"]
+
+
+def test_recover_unclosed_if():
+    parser = Parser(Scanner("if a == 1:\nb = 2").scan_tokens(), recover=True)
+
+    assert parser.parse() == []
+    assert [error.args[1] for error in parser.errors] == ["Expected 'endif' to close if statement"]
+
+
+def test_nesting_deeper_than_recursion_limit():
+    depth = sys.getrecursionlimit() * 2
+    program = "a = " + "(" * depth + "1" + " + 1)" * depth + "\nb = " + "-" * depth + "c"
+
+    first, second = Parser(Scanner(program).scan_tokens()).parse()
+
+    nested = first.expr.value
+    for _ in range(depth):
+        assert isinstance(nested, expression.Grouping)
+        nested = nested.expression.left
+    assert nested == expression.Literal(1)
+
+    nested = second.expr.value
+    for _ in range(depth):
+        assert isinstance(nested, expression.Unary)
+        nested = nested.right
+    assert isinstance(nested, expression.Variable)
+
+
+@pytest.mark.parametrize("program", [
+    "(1 + 2) * (3 - 4)",
+    "(a if b else c) + (1, 2)",
+    "f((1), (2 + 3))((4))",
+    "(1 + 2 if a else 3)",
+])
+def test_parentheses_parsed_like_nested_expressions(program: str):
+    plain = ASTPrinter().print(Parser(Scanner(program).scan_tokens()).parse())
+    nested = ASTPrinter().print(Parser(Scanner(f"(({program}))").scan_tokens()).parse())
+
+    assert nested == [f"(grouping (grouping {plain[0]}))"]
@@ -0,0 +1,85 @@
+"""Test resetting and pooling interpreters."""
+import threading
+
+from ringneck.interpreter import Interpreter, InterpreterPool, OutputMode
+from ringneck.program import POOL, Program
+
+
+def test_reset_drops_locals():
+    program = Program("a ?= 1\na += 1\n$.a = a")
+    interpreter = Interpreter(global_variables={}, builtins={'b': 1})
+    interpreter.interpret(program.statements, program.scope)
+    first = interpreter.globals
+
+    interpreter.reset(global_variables={}, scope=program.scope)
+    interpreter.interpret(program.statements, program.scope)
+
+    assert first == {'a': 2}
+    assert interpreter.globals == {'a': 2}
+    assert interpreter.builtins == {}
+    assert interpreter.state.get('b') is None
+
+
+def test_reset_builtins_fill_slots():
+    program = Program("$.a = f(2)")
+    interpreter = Interpreter(builtins={'f': abs})
+
+    interpreter.reset(global_variables={}, builtins={'f': str}, scope=program.scope)
+    interpreter.interpret(program.statements, program.scope)
+
+    assert interpreter.globals == {'a': '2'}
+
+
+def test_run_reuses_interpreters():
+    program = Program("x = 1\n$.a = x")
+    program.run(global_variables={})
+    interpreter = POOL.idle()[-1]
+
+    record: dict = {}
+    program.run(global_variables=record, transactional=True)
+
+    assert record == {'a': 1}
+    assert POOL.idle()[-1] is interpreter
+    assert interpreter.globals is None
+
+
+def test_nested_runs():
+    inner = Program("$.b = 2")
+    outer = Program("$.a = nested()\n$.c = 3")
+
+    def nested():
+        record: dict = {}
+        inner.run(global_variables=record)
+        return record
+
+    record: dict = {}
+    outer.run(global_variables=record, builtins={'nested': nested})
+
+    assert record == {'a': {'b': 2}, 'c': 3}
+
+
+def test_stream_not_pooled():
+    program = Program("a = 1\n$.a = a")
+    results = program.run(global_variables={}, output=OutputMode.STREAM)
+    other = Program("$.b = 2")
+    record: dict = {}
+    other.run(global_variables=record)
+
+    list(results)
+
+    assert record == {'b': 2}
+
+
+def test_pool_per_thread():
+    pool = InterpreterPool(size=1)
+    program = Program("$.a = 1")
+    main = pool.acquire(program.scope, {})
+    pool.release(main)
+    seen = []
+
+    thread = threading.Thread(target=lambda: seen.append(pool.acquire(program.scope, {})))
+    thread.start()
+    thread.join()
+
+    assert seen[0] is not main
+    assert pool.acquire(program.scope, {}) is main
@@ -0,0 +1,60 @@
+"""Test programs that are parsed once and run many times."""
+from ringneck.interpreter import Interpreter
+from ringneck.program import Program
+
+
+def test_run_twice():
+    program = Program("a = $.x + 1\n$.y = a * 2")
+
+    first = {'x': 1}
+    second = {'x': 5}
+    program.run(global_variables=first)
+    program.run(global_variables=second)
+
+    assert first == {'x': 1, 'y': 4}
+    assert second == {'x': 5, 'y': 12}
+
+
+def test_locals_in_slots():
+    program = Program("a = 1\nb = a\nif b == 1:\nc = b + a\nendif")
+
+    assert program.scope.names == {'a': 0, 'b': 1, 'c': 2}
+
+
+def test_builtins_resolved_per_run():
+    def custom():
+        return state['a'] + 1
+
+    program = Program("a = 1\n$.b = custom()")
+    data = {}
+    program.run(global_variables=data, builtins={'custom': custom})
+
+    assert data == {'b': 2}
+
+
+def test_local_shadows_builtin():
+    builtins = {'a': 1}
+    program = Program("b = a\na = 2\nc = a")
+
+    interpreter = Interpreter(builtins=builtins)
+    interpreter.interpret(program.statements, program.scope)
+
+    assert interpreter.state['b'] == 1
+    assert interpreter.state['c'] == 2
+    assert builtins == {'a': 1}
+
+
+def test_statements_keep_their_scope():
+    first = Program("a = 1\nb = 2\n$.x = a + b")
+    second = Program("c = 3\n$.y = c")
+    interpreter = Interpreter(global_variables={})
+
+    interpreter.interpret(first.statements)
+    interpreter.interpret(second.statements)
+
+    assert interpreter.globals == {'x': 3, 'y': 3}
+    assert second.scope.names == {'c': 0}
+    data = {}
+    second.run(data)
+    first.run(data)
+    assert data == {'x': 3, 'y': 3}
@@ -0,0 +1,165 @@
+"""Test caching whole runs of deterministic scripts."""
+import pytest
+
+from ringneck.program import Program
+from ringneck.runcache import RunCache
+
+
+SOURCE = """bonus = double($.level)
+$.stats = {'strength': bonus + 1, 'name': $.name}
+$.stats.tags = tags
+bonus"""
+
+
+def double(value):
+    calls.append(value)
+    return value * 2
+
+
+calls: list = []
+
+
+def run(cache: RunCache, program: Program, record: dict, **options):
+    return program.run(global_variables=record, builtins={'double': double, 'tags': ['a', 'b']},
+                       pure={'double'}, cache=cache, **options)
+
+
+def test_replays_writes_and_results():
+    cache = RunCache()
+    program = Program(SOURCE)
+    calls.clear()
+
+    first = {'level': 2, 'name': 'Bo', 'unread': 1}
+    second = {'level': 2, 'name': 'Bo', 'unread': 2}
+    results = run(cache, program, first)
+    replayed = run(cache, program, second)
+
+    assert calls == [2]
+    assert replayed == results
+    assert second == {'level': 2, 'name': 'Bo', 'unread': 2,
+                      'stats': {'strength': 5, 'name': 'Bo', 'tags': ['a', 'b']}}
+    assert cache.stats.hits == 1 and cache.stats.misses == 1
+
+    # Replayed values are copies, changing them leaves the cache alone.
+    second['stats']['strength'] = 0
+    third: dict = {'name': 'Bo', 'level': 2}
+    run(cache, program, third)
+    assert third['stats']['strength'] == 5
+
+
+def test_inputs_change_key():
+    cache = RunCache()
+    program = Program(SOURCE)
+
+    run(cache, program, {'level': 2, 'name': 'Bo'})
+    run(cache, program, {'level': 3, 'name': 'Bo'})
+    run(cache, program, {'name': 'Bo', 'level': 2.0})
+    program.run(global_variables={'level': 2, 'name': 'Bo'}, builtins={'double': double, 'tags': ['c', 'd']},
+                pure={'double'}, cache=cache)
+
+    assert cache.stats.hits == 0
+    assert cache.stats.misses == 4
+
+
+@pytest.mark.parametrize("source", ["$.out = bonus\nbonus = 0", "if $.a:\nbonus = 0\nendif\n$.out = bonus"])
+def test_builtins_read_before_assigned_are_inputs(source: str):
+    cache = RunCache()
+    program = Program(source)
+
+    outputs = []
+    for bonus in (1, 5, 5):
+        record: dict = {'a': False}
+        program.run(global_variables=record, builtins={'bonus': bonus}, cache=cache)
+        outputs.append(record['out'])
+
+    assert outputs == [1, 5, 5]
+    assert (cache.stats.hits, cache.stats.misses) == (1, 2)
+
+
+def test_bypasses():
+    cache = RunCache()
+
+    Program("$.a = double(1)\n$.b = roll(1)").run(
+        global_variables={}, builtins={'double': double, 'roll': abs}, pure={'double'}, cache=cache)
+    run(cache, Program("$.a = $.items.copy()"), {'items': [1, 2]})
+    run(cache, Program("$.a = $.b"), {'b': object()})
+
+    assert cache.stats.bypasses == 3
+    assert cache.stats.entries == 0
+
+
+def test_update_invalidates():
+    cache = RunCache()
+    program = Program("$.a = 1\n$.b = 2")
+    record: dict = {}
+    run(cache, program, record)
+
+    program.update((2, 2), "$.b = 3")
+    record = {}
+    run(cache, program, record)
+
+    assert record == {'a': 1, 'b': 3}
+    assert cache.stats.hits == 0
+
+
+def test_eviction():
+    cache = RunCache(max_entries=2)
+    program = Program("$.b = $.a")
+    for value in [1, 2, 3, 1]:
+        run(cache, program, {'a': value})
+
+    assert cache.stats.evictions == 2
+    assert cache.stats.entries == 2
+    assert cache.stats.misses == 4
+
+    small = RunCache(max_bytes=200)
+    run(small, program, {'a': 'x' * 300})
+    assert small.stats.entries == 0 and small.stats.bytes == 0
+
+
+def test_commit_on_hit():
+    cache = RunCache()
+    program = Program("$.b = $.a + 1")
+    committed = []
+
+    def commit(target, changeset):
+        committed.append(dict(changeset.writes))
+        return changeset.apply(target)
+
+    for _ in range(2):
+        record = {'a': 1}
+        run(cache, program, record, commit=commit)
+        assert record == {'a': 1, 'b': 2}
+
+    assert committed == [{('b',): 2}] * 2
+    assert cache.stats.hits == 1
+
+
+def test_cached_runs_match_uncached():
+    source = "$.stats.strength = 9\ns = $.stats\n$.out = s.strength\ns.strength"
+    program = Program(source)
+    cache = RunCache()
+
+    uncached = {'stats': {'strength': 1}}
+    results = program.run(global_variables=uncached)
+    for _ in range(2):
+        cached = {'stats': {'strength': 1}}
+        assert program.run(global_variables=cached, cache=cache) == results
+        assert cached == uncached == {'stats': {'strength': 9}, 'out': 9}
+    assert cache.stats.hits == 1
+
+
+def test_functions_behind_pure_names_change_key():
+    program = Program("$.out = f(2)")
+    cache = RunCache()
+
+    for factor in (2, 3, 2):
+        record: dict = {}
+        program.run(global_variables=record, builtins={'f': lambda x, factor=factor: x * factor},
+                    pure={'f'}, cache=cache)
+        assert record == {'out': 2 * factor}
+
+    double_builtins = {'f': double}
+    for _ in range(2):
+        program.run(global_variables={}, builtins=double_builtins, pure={'f'}, cache=cache)
+    assert cache.stats.hits == 1
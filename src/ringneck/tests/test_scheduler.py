@@ -0,0 +1,95 @@
+"""Test suspendable runs and the scheduler."""
+import pytest
+
+from ringneck.interpreter import Interpreter, OutputMode
+from ringneck.program import Program
+from ringneck.scheduler import Scheduler, Task
+
+
+LONG = """n = 0
+repeat n += 1 times 100
+if n == 100:
+repeat $.count += 1 times 10
+endif
+$.n = n"""
+
+
+@pytest.mark.parametrize("output", [OutputMode.COLLECT, OutputMode.LAST, OutputMode.DISCARD])
+def test_same_results_as_interpret(output: OutputMode):
+    program = Program(LONG)
+    expected_record = {'count': 0}
+    expected = program.run(global_variables=expected_record, output=output)
+
+    record = {'count': 0}
+    interpreter = Interpreter(global_variables=record, output=output)
+    generator = interpreter.suspendable(program.statements, program.scope, quantum=7)
+    pauses = 0
+    with pytest.raises(StopIteration) as stop:
+        while True:
+            next(generator)
+            pauses += 1
+
+    assert stop.value.value == expected
+    assert record == expected_record == {'count': 10, 'n': 100}
+    # 1 + 100 + 1 + 10 + 1 steps, with a pause before every 7 steps after the first 7.
+    assert pauses == (113 - 1) // 7
+
+
+def test_budget_set_by_caller():
+    program = Program("repeat $.a += 1 times 10")
+    interpreter = Interpreter(global_variables={'a': 0})
+    generator = interpreter.suspendable(program.statements, program.scope)
+
+    interpreter.budget = 3
+    next(generator)
+    assert interpreter.globals == {'a': 3}
+    interpreter.budget = 4
+    next(generator)
+    assert interpreter.globals == {'a': 7}
+
+
+def test_round_robin_between_tenants():
+    scheduler = Scheduler(quantum=10, quotas={'big': 20})
+    finished = []
+    long = Program("repeat $.a += 1 times 1000")
+    short = Program("$.a = 1")
+
+    hog = [scheduler.submit(long, 'hog', {'a': 0}, callback=finished.append) for _ in range(5)]
+    big = scheduler.submit(long, 'big', {'a': 0}, callback=finished.append)
+    quick = scheduler.submit(short, 'quick', {}, callback=finished.append)
+
+    scheduler.round()
+    assert finished == [quick]
+    assert [task.globals['a'] for task in hog] == [10, 0, 0, 0, 0]
+    assert big.globals['a'] == 20
+
+    scheduler.run()
+    assert all(task.done and task.error is None for task in hog + [big])
+    assert big in finished[:2]
+    assert [task.globals['a'] for task in hog] == [1000] * 5
+    assert len(scheduler) == 0
+
+
+def test_errors_and_limits():
+    scheduler = Scheduler(quantum=5)
+    failing = scheduler.submit(Program("$.a = 'a' + 1"), global_variables={})
+    endless = scheduler.submit(Program("repeat $.a += 1 times 100000"), global_variables={'a': 0}, limit=50)
+
+    scheduler.run()
+
+    assert isinstance(failing.error, RuntimeError)
+    assert "Step limit" in str(endless.error)
+    assert endless.steps == 50
+    assert isinstance(endless, Task)
+
+
+def test_limit_is_inclusive():
+    scheduler = Scheduler(quantum=2)
+    exact = scheduler.submit(Program("$.a = 1\n$.b = 2\n$.c = 3"), global_variables={}, limit=3)
+    over = scheduler.submit(Program("$.a = 1\n$.b = 2\n$.c = 3\n$.d = 4"), global_variables={}, limit=3)
+
+    scheduler.run()
+
+    assert exact.error is None and exact.globals == {'a': 1, 'b': 2, 'c': 3}
+    assert "Step limit of 3" in str(over.error)
+    assert over.globals == {'a': 1, 'b': 2, 'c': 3}
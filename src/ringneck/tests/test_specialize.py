@@ -0,0 +1,70 @@
+"""Test binary operators specializing on their operand types."""
+import operator
+
+import pytest
+
+from ringneck.program import Program
+from ringneck.specialize import DEOPT_AFTER, WARMUP, BinarySite
+
+
+def test_specializes_after_warmup():
+    site = BinarySite(operator.add)
+    for _ in range(WARMUP):
+        assert site(1, 2) == 3
+    assert (site.left, site.right) == (int, int)
+
+    assert site(3, 4) == 7
+    assert site.hits == 1
+
+
+def test_polymorphic_site_stays_generic():
+    site = BinarySite(operator.add)
+    for index in range(WARMUP * 2):
+        site(1, 2) if index % 2 else site(1.0, 2)
+
+    assert site.left is None
+    assert site.hits == 0
+
+
+def test_operation_that_can_fail_stays_generic():
+    site = BinarySite(operator.sub)
+    for _ in range(WARMUP):
+        with pytest.raises(TypeError):
+            site("a", "b")
+
+    assert site.left is None
+
+
+def test_deopt_on_type_change():
+    site = BinarySite(operator.add)
+    for _ in range(WARMUP):
+        site(1, 2)
+
+    for _ in range(DEOPT_AFTER):
+        assert site("a", "b") == "ab"
+
+    assert site.misses == DEOPT_AFTER
+    assert site.deopts == 1
+    assert site.left is None
+
+
+def test_program_counters():
+    program = Program("a = $.x * 2\nb = a + 1 > 3")
+    for x in range(20):
+        program.run(global_variables={'x': x})
+    program.run(global_variables={'x': 1.5})
+
+    counters = program.specializations()
+    assert counters['sites'] == 3
+    assert counters['specialized'] == 3
+    assert counters['hits'] == 3 * (20 - WARMUP)
+    assert counters['misses'] == 3
+
+
+def test_type_error_after_specializing():
+    program = Program("a = $.x + 1")
+    for x in range(WARMUP):
+        program.run(global_variables={'x': x})
+
+    with pytest.raises(RuntimeError, match="Wrong types"):
+        program.run(global_variables={'x': "a"})
@@ -0,0 +1,127 @@
+"""Test lazy globals backed by external stores."""
+import dbm
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import pytest
+
+from ringneck.program import Program
+from ringneck.stores import MISSING, DbmStore, JsonLinesStore, SqliteStore, Store
+
+
+VALUES = {
+    'names': {'elf': ['Arwen', 'Legolas'], 'dwarf': ['Gimli', 'Balin']},
+    'items': ['sword', 'shield'],
+    'odd "key"': 1,
+    'ünicode': 'ü',
+}
+
+
+def sqlite_store(path: Path) -> Store:
+    connection = sqlite3.connect(path / "globals.db")
+    connection.execute("CREATE TABLE globals (key TEXT PRIMARY KEY, value TEXT)")
+    connection.executemany("INSERT INTO globals VALUES (?, ?)",
+                           [(key, json.dumps(value)) for key, value in VALUES.items()])
+    connection.commit()
+    connection.close()
+    return SqliteStore(path / "globals.db")
+
+
+def dbm_store(path: Path) -> Store:
+    with dbm.open(str(path / "globals"), "c") as database:
+        for key, value in VALUES.items():
+            database[key.encode()] = json.dumps(value)
+    return DbmStore(path / "globals")
+
+
+def jsonl_store(path: Path) -> Store:
+    JsonLinesStore.write(path / "globals.jsonl", VALUES.items())
+    return JsonLinesStore(path / "globals.jsonl")
+
+
+@pytest.fixture(params=[sqlite_store, dbm_store, jsonl_store])
+def store(request, tmp_path: Path) -> Iterator[Store]:
+    with request.param(tmp_path) as opened:
+        yield opened
+
+
+def test_lookup(store: Store):
+    lazy = store.globals()
+
+    assert {key: lazy[key] for key in VALUES} == VALUES
+    assert 'missing' not in lazy
+    assert sorted(lazy) == sorted(VALUES)
+    del lazy['items']
+    lazy['new'] = 1
+    assert 'items' not in lazy
+    assert sorted(lazy) == sorted(['new', *VALUES.keys() - {'items'}])
+    assert len(store) == len(VALUES)
+    assert store.lookup('zzz') is MISSING
+
+
+def test_run_reads_and_writes(store: Store):
+    program = Program("$.hero = $.names.elf\n$.names.elf = ['Elrond', 'Elros']\n$.count = 2")
+    first = store.globals()
+    program.run(global_variables=first)
+    second = store.globals()
+    program.run(global_variables=second)
+
+    assert first['hero'] == ['Arwen', 'Legolas']
+    assert first['names']['elf'] == ['Elrond', 'Elros']
+    # Changes stay in the mapping that made them.
+    assert second['hero'] == ['Arwen', 'Legolas']
+    # Nested writes count as changes of their top level key.
+    assert first.changes() == {'hero': ['Arwen', 'Legolas'], 'names': first['names'], 'count': 2}
+    assert set(store.globals().changes()) == set()
+
+
+def test_keys_named_like_methods():
+    store = CountingStore()
+    lazy = store.globals()
+
+    Program("$.out = [$.keys, $.kinds, $.store]").run(global_variables=lazy)
+
+    assert lazy['out'] == ['KEYS', 'KINDS', None]
+
+
+class CountingStore(Store):
+    def __init__(self, cache_size: int = 1024):
+        super().__init__(cache_size)
+        self.batches: List[List[str]] = []
+        self.fetched: List[str] = []
+
+    def fetch(self, key: str) -> Any:
+        self.fetched.append(key)
+        return json.dumps(key.upper()) if key.startswith('k') else MISSING
+
+    def fetch_many(self, keys: List[str]) -> Dict[str, Any]:
+        self.batches.append(sorted(keys))
+        return {key: json.dumps(key.upper()) for key in keys if key.startswith('k')}
+
+    def keys(self) -> Iterator[str]:
+        return iter(())
+
+
+def test_prefetch_from_analysis():
+    store = CountingStore()
+    program = Program("if $.k1 == 'K1':\n$.out = $.k2.x\nendif\n$.k3 = $.none")
+
+    program.run(global_variables=store.globals())
+    program.run(global_variables=store.globals())
+
+    assert store.batches == [['k1', 'k2', 'none']]
+    assert store.fetched == []
+    assert store.hits == 6
+
+
+def test_lru_bound():
+    store = CountingStore(cache_size=2)
+    lazy = store.globals()
+    for key in ['k1', 'k2', 'k1', 'k3']:
+        store.lookup(key)
+
+    assert list(store._cache) == ['k1', 'k3']
+    assert lazy['k2'] == 'K2'
+    assert store.fetched == ['k1', 'k2', 'k3', 'k2']
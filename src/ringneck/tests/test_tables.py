@@ -0,0 +1,142 @@
+"""Test data tables loaded by the table intrinsic."""
+import json
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from ringneck.program import Program
+from ringneck.tables import Table, TableLoader, install, number, uninstall
+
+
+CSV = "name,kin,age,height\nArwen,Elf,2700,1.78\nGimli,Dwarf,139,1.37\nBilbo,Hobbit,111,1.07\n"
+
+
+@pytest.fixture
+def names(tmp_path: Path) -> Path:
+    path = tmp_path / "names.csv"
+    path.write_text(CSV)
+    return path
+
+
+@pytest.fixture
+def table(tmp_path: Path) -> TableLoader:
+    return TableLoader(tmp_path)
+
+
+def test_csv_columns(names: Path, table: TableLoader):
+    loaded = table(names, "name")
+
+    assert loaded.columns == ['name', 'kin', 'age', 'height']
+    assert list(loaded.age) == [2700, 139, 111]
+    assert list(loaded.height) == [1.78, 1.37, 1.07]
+    assert loaded.kin == ('Elf', 'Dwarf', 'Hobbit')
+    assert dict(loaded[1]) == {'name': 'Gimli', 'kin': 'Dwarf', 'age': 139, 'height': 1.37}
+    assert loaded.get('Bilbo')['age'] == 111
+    assert loaded.get('Frodo') is None
+    assert [row['name'] for row in loaded.between('B', 'H')] == ['Bilbo', 'Gimli']
+    with pytest.raises(TypeError):
+        loaded.age[0] = 1
+
+
+def test_json_tables(tmp_path: Path, table: TableLoader):
+    (tmp_path / "rows.json").write_text(json.dumps([{'id': 2, 'name': 'b'}, {'id': 1, 'name': 'a', 'x': 1.5}]))
+    (tmp_path / "kin.json").write_text(json.dumps({'2': 'Elf', '1': 'Human'}))
+    (tmp_path / "values.json").write_text(json.dumps(['red', 'green']))
+
+    rows = table("rows.json", "id")
+    kin = table(tmp_path / "kin.json")
+    values = table("values.json")
+
+    assert rows.get(1)['name'] == 'a'
+    assert rows[0]['x'] is None
+    assert kin.get('2')['value'] == 'Elf'
+    assert values.value == ('red', 'green')
+
+
+def test_cached_by_mtime(names: Path, table: TableLoader):
+    first = table(names)
+    loads = table.loads
+
+    assert table(str(names)) is first
+    assert table.loads == loads
+
+    names.write_text(CSV + "Sam,Hobbit,38,1.22\n")
+    os.utime(names, ns=(0, 10 ** 9))
+
+    assert len(table(names)) == 4
+    assert table.loads == loads + 1
+
+
+def test_script_intrinsic(names: Path, tmp_path: Path, request: pytest.FixtureRequest):
+    program = Program("""names = table('names.csv', 'name')
+row = names.get($.name)
+$.kin = row.kin
+$.count = len(names.age)
+""")
+    with pytest.raises(RuntimeError):
+        program.run(global_variables={'name': 'Gimli'}, builtins={'len': len})
+
+    table = install(tmp_path)
+    request.addfinalizer(uninstall)
+    loads = table.loads
+    record = {'name': 'Gimli'}
+    program.run(global_variables=record, builtins={'len': len})
+    results = []
+
+    def run():
+        other = {'name': 'Arwen'}
+        program.run(global_variables=other, builtins={'len': len})
+        results.append(other['kin'])
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert record == {'name': 'Gimli', 'kin': 'Dwarf', 'count': 3}
+    assert results == ['Elf'] * 4
+    assert table.loads == loads + 1
+
+
+def test_builtins_override_intrinsic():
+    program = Program("$.a = table('x')")
+    record: dict = {}
+
+    program.run(global_variables=record, builtins={'table': str.upper})
+
+    assert record == {'a': 'X'}
+
+
+def test_unknown_format(table: TableLoader):
+    with pytest.raises(ValueError):
+        table("names.txt")
+    with pytest.raises(KeyError):
+        Table({'a': (1,)}, key='b')
+
+
+def test_files_outside_directory(tmp_path: Path, names: Path):
+    (tmp_path / "data").mkdir()
+    table = TableLoader(tmp_path / "data")
+
+    for path in (names, "../names.csv", "/etc/passwd.csv"):
+        with pytest.raises(PermissionError):
+            table(path)
+
+
+def test_only_decimal_numbers():
+    assert [number(text) for text in ("12", "-3", "1.5", "nan", "inf", "Infinity", "1e3", "1_000", "")] == [
+        12, -3, 1.5, "nan", "inf", "Infinity", "1e3", "1_000", ""]
+
+
+def test_key_index_of_mixed_and_empty_keys(tmp_path: Path, table: TableLoader):
+    (tmp_path / "mixed.csv").write_text("id,name\n2,b\nx,c\n,d\n1,a\n3\n")
+
+    mixed = table("mixed.csv", "id")
+
+    assert mixed.get(1)['name'] == 'a'
+    assert mixed.get('x')['name'] == 'c'
+    assert mixed.get('')['name'] == 'd'
+    assert [row['name'] for row in mixed.between(1, 3)] == ['a', 'b', None]
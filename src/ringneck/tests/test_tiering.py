@@ -0,0 +1,88 @@
+"""Test tiered programs."""
+import pytest
+
+from ringneck.interpreter import OutputMode
+from ringneck import tiering
+from ringneck.tiering import Tier, TieredProgram, TierPolicy
+
+
+SOURCE = """total = 0
+repeat total += 2 times $.n
+$.total = total"""
+
+
+def test_promoted_after_runs():
+    promoted = []
+    program = TieredProgram(SOURCE, TierPolicy(runs=3, background=False),
+                            on_promote=lambda tiered, promotion: promoted.append(promotion))
+    interpreted = program.program
+
+    for expected in range(1, 5):
+        record = {'n': expected}
+        program.run(record, output=OutputMode.DISCARD)
+        assert record['total'] == 2 * expected
+        assert program.tier == (Tier.COMPILED if expected >= 3 else Tier.INTERPRETED)
+
+    assert program.program is not interpreted
+    assert program.program.statements[1].handler is not None
+    assert interpreted.statements[1].handler is None
+    assert [(promotion.reason, promotion.runs) for promotion in promoted] == [('runs', 3)]
+    assert program.stats() == {'tier': 'compiled', 'runs': 4, 'iterations': 6, 'promotions': 1,
+                              'failures': 0}
+
+
+def test_promoted_by_hot_loop_in_background():
+    program = TieredProgram(SOURCE, TierPolicy(runs=1000, iterations=500))
+
+    program.run({'n': 100})
+    assert program.tier == Tier.INTERPRETED
+    program.run({'n': 400})
+    assert program.wait(5)
+    assert program.promotions[0].reason == 'iterations'
+    assert program.iterations == 500
+
+    record = {'n': 10}
+    program.run(record)
+    assert record['total'] == 20
+
+
+@pytest.mark.parametrize("background", [False, True])
+def test_failed_compile_stays_interpreted(monkeypatch, background):
+    promoted = []
+    program = TieredProgram(SOURCE, TierPolicy(runs=2, background=background),
+                            on_promote=lambda tiered, promotion: promoted.append(promotion))
+
+    def broken(*args, **kwargs):
+        raise MemoryError("no room to compile")
+
+    monkeypatch.setattr(tiering, 'Program', broken)
+    for expected in range(1, 5):
+        record = {'n': expected}
+        program.run(record)
+        program.wait(5)
+        assert record['total'] == 2 * expected
+
+    assert program.tier == Tier.INTERPRETED
+    assert [(promotion.tier, promotion.runs) for promotion in promoted] == [(Tier.INTERPRETED, 2)]
+    assert isinstance(promoted[0].error, MemoryError)
+    assert program.stats()['failures'] == 1
+
+    monkeypatch.undo()
+    program.promote()
+    assert program.wait(5)
+    assert program.stats()['promotions'] == 1
+
+
+def test_promoted_program_gives_same_results():
+    source = "x = $.stats.strength * 2\ns = $.stats\ns.strength = 9\n$.y = $.stats.strength * 2\n$.x = x"
+    program = TieredProgram(source, TierPolicy(runs=2, background=False))
+
+    results = []
+    for _ in range(4):
+        record = {'stats': {'strength': 1}}
+        results.append((program.run(record), record))
+
+    assert program.tier == Tier.COMPILED
+    assert all(result == results[0] for result in results)
+    assert results[0][1] == {'stats': {'strength': 9}, 'x': 2, 'y': 18}
+    assert program.program.optimizer is None
@@ -0,0 +1,165 @@
+"""Programs interpreted while cold and compiled once they are hot.
+
+A `TieredProgram` starts out as a plain `Program`, without fused
+handlers or optimizations, so a script run once or twice costs only a
+parse. It counts its runs, and the interpreter counts the iterations of
+every `repeat`. Once either passes the thresholds of its `TierPolicy`,
+the program is compiled again with fused handlers, and the optimizer
+if the policy opts in, on a background thread unless the policy says
+otherwise. The compiled
+program replaces the interpreted one in one assignment: runs that
+already started finish on the interpreted program, later runs use the
+compiled one. A compile that fails leaves the program interpreted, it
+is recorded as a promotion with its error and only retried by calling
+`promote`.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum, unique
+from itertools import count
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional
+
+from ringneck.ast import statement
+from ringneck.metrics import REGISTRY
+from ringneck.program import Program
+
+
+@unique
+class Tier(Enum):
+    INTERPRETED = 'interpreted'
+    COMPILED = 'compiled'
+
+
+@dataclass
+class TierPolicy:
+    # Runs before a program is compiled.
+    runs: int = 50
+    # Iterations of any one repeat before a program is compiled.
+    iterations: int = 10000
+    # Run the optimizer on the compiled program too. Off unless the caller
+    # opts in, as the program was not optimized before it was promoted.
+    optimize: bool = False
+    # Compile on a background thread, otherwise in the run that crosses a threshold.
+    background: bool = True
+
+
+@dataclass
+class Promotion:
+    # The tier afterwards, still interpreted when compiling failed with error.
+    tier: Tier
+    # Why, 'runs' or 'iterations', and the counts when it happened.
+    reason: str
+    runs: int
+    iterations: int
+    seconds: float
+    time: float
+    error: Optional[BaseException] = None
+
+
+class TieredProgram:
+    """A script run through the interpreter until it is hot, see the module docstring."""
+
+    source: str
+    policy: TierPolicy
+    program: Program
+    tier: Tier
+    promotions: List[Promotion]
+    listeners: List[Callable[['TieredProgram', Promotion], None]]
+
+    def __init__(self, source: str, policy: Optional[TierPolicy] = None,
+                 on_promote: Optional[Callable[['TieredProgram', Promotion], None]] = None):
+        self.source = source
+        self.policy = policy or TierPolicy()
+        self.program = Program(source, fused=False)
+        self.tier = Tier.INTERPRETED
+        self.promotions = []
+        self.listeners = [on_promote] if on_promote is not None else []
+        self._runs = count(1)
+        self.runs = 0
+        self._loops = [node for node in self.program.nodes() if isinstance(node, statement.Repeat)]
+        self._promoting = False
+        self._lock = threading.Lock()
+        self._compiler: Optional[threading.Thread] = None
+
+    @property
+    def iterations(self) -> int:
+        """Iterations of the hottest repeat while interpreted."""
+        return max((loop.iterations for loop in self._loops), default=0)
+
+    def run(self, *args: Any, **kwargs: Any):
+        """Run the current tier's program, arguments are those of `Program.run`."""
+        # Read once, so a promotion during the run does not switch programs midway.
+        program = self.program
+        self.runs = next(self._runs)
+        try:
+            return program.run(*args, **kwargs)
+        finally:
+            if not self._promoting:
+                self.check()
+
+    def check(self):
+        """Promote the program if it passed a threshold, and did not fail to compile before."""
+        if self.tier == Tier.COMPILED or self.promotions and self.promotions[-1].error is not None:
+            return
+        if self.runs >= self.policy.runs:
+            self.promote('runs')
+        elif self._loops and self.iterations >= self.policy.iterations:
+            self.promote('iterations')
+
+    def promote(self, reason: str = 'manual'):
+        """Compile the program, once, in the background if the policy says so."""
+        with self._lock:
+            if self._promoting or self.tier == Tier.COMPILED:
+                return
+            self._promoting = True
+
+        if self.policy.background:
+            self._compiler = threading.Thread(target=self.compile, args=(reason,), daemon=True,
+                                              name="ringneck-tiering")
+            self._compiler.start()
+        else:
+            self.compile(reason)
+
+    def compile(self, reason: str):
+        """Compile the program and switch to it, listeners are told either way."""
+        started = perf_counter()
+        try:
+            compiled = Program(self.source, optimize=self.policy.optimize, fused=True)
+        except Exception as error:  # pylint: disable=broad-except
+            # Kept on the promotion, a background thread has no one to raise to.
+            promotion = Promotion(Tier.INTERPRETED, reason, self.runs, self.iterations,
+                                  perf_counter() - started, time.time(), error)
+            self.promotions.append(promotion)
+            if REGISTRY.enabled:
+                REGISTRY.increment('ringneck_promotion_failures_total', reason=reason)
+        else:
+            seconds = perf_counter() - started
+            promotion = Promotion(Tier.COMPILED, reason, self.runs, self.iterations, seconds, time.time())
+            self.program = compiled
+            self.tier = Tier.COMPILED
+            self.promotions.append(promotion)
+            if REGISTRY.enabled:
+                REGISTRY.increment('ringneck_promotions_total', reason=reason)
+                REGISTRY.observe('ringneck_promotion_seconds', seconds)
+        finally:
+            self._promoting = False
+        for listener in self.listeners:
+            listener(self, promotion)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a background compile, returning whether the program is compiled."""
+        compiler = self._compiler
+        if compiler is not None:
+            compiler.join(timeout)
+        return self.tier == Tier.COMPILED
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'tier': self.tier.value,
+            'runs': self.runs,
+            'iterations': self.iterations,
+            'promotions': sum(promotion.error is None for promotion in self.promotions),
+            'failures': sum(promotion.error is not None for promotion in self.promotions),
+        }
@@ -0,0 +1,99 @@
+"""Buffered writes to the global variables."""
+import copy
+from typing import Any, Callable, Dict, MutableMapping, Optional, Tuple
+
+from ringneck.accessor import assign, descend, walk
+
+
+Path = Tuple[str, ...]
+
+
+def replaced(container: Any, parts: Path, value: Any):
+    """A shallow copy of container with the value at parts set, copying every container on the way."""
+    copied = copy.copy(container)
+    if len(parts) > 1:
+        value = replaced(descend(container, parts[:1]), parts[1:], value)
+    assign(copied, parts[0], value)
+    return copied
+
+
+class Changeset:
+    """Writes to `$`, recorded during a run and applied in one go at the end.
+
+    Paths are stored without the leading `$`. Reading a path that was
+    written, or a path below it, sees the buffered value. Reading the parent
+    of a buffered path sees a copy of the host value with the writes below
+    it applied, see `replaced`.
+
+    Objects of the host are never changed before the writes are applied.
+    A nested write copies the containers along its path, so objects
+    shared with other hosts are left alone, and the top level values are
+    set on the host object in place.
+    """
+
+    writes: Dict[Path, Any]
+    depth: int = 0
+
+    def __init__(self):
+        self.writes = {}
+
+    def __len__(self):
+        return len(self.writes)
+
+    def record(self, parts: Path, value: Any):
+        for length in range(1, min(len(parts), self.depth + 1)):
+            if parts[:length] in self.writes:
+                # The written value may be an object of the host, so it is copied.
+                self.writes[parts[:length]] = replaced(self.writes[parts[:length]], parts[length:], value)
+                return
+
+        if self.depth > len(parts):
+            for path in [path for path in self.writes if path[:len(parts)] == parts]:
+                del self.writes[path]
+        self.writes[parts] = value
+        self.depth = max(self.depth, len(parts))
+
+    def lookup(self, parts: Path, target: Any) -> Tuple[bool, Any]:
+        """Whether writes change the value at parts of target, and the value if so."""
+        for length in range(len(parts), 0, -1):
+            if parts[:length] in self.writes:
+                return True, walk(self.writes[parts[:length]], parts[length:])
+
+        if self.depth <= len(parts):
+            return False, None
+        below = [(path, value) for path, value in self.writes.items() if path[:len(parts)] == parts]
+        if not below:
+            return False, None
+        result = walk(target, parts)
+        for path, value in below:
+            result = replaced(result, path[len(parts):], value)
+        return True, result
+
+    @property
+    def updates(self) -> Dict[str, Any]:
+        """Top level writes, keyed on field name."""
+        return {path[0]: value for path, value in self.writes.items() if len(path) == 1}
+
+    def apply(self, target: Any, commit: Optional['Commit'] = None):
+        """Apply all writes to target, returning the committed globals."""
+        if commit is not None:
+            return commit(target, self)
+
+        updates = self.updates
+        for path, value in self.writes.items():
+            if len(path) > 1:
+                name = path[0]
+                current = updates[name] if name in updates else descend(target, path[:1])
+                updates[name] = replaced(current, path[1:], value)
+
+        if isinstance(target, MutableMapping):
+            target.update(updates)
+        else:
+            for name, value in updates.items():
+                setattr(target, name, value)
+
+        return target
+
+
+Commit = Callable[[Any, Changeset], Any]
+